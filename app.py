@@ -0,0 +1,352 @@
+"""
+Local HTTP/JSON password scoring service.
+
+Endpoints:
+    GET  /health           -> {"status": "ok", "queued": n}
+    GET  /metrics          -> per-stage timings and counters, Prometheus text format (with --stats)
+    GET  /range/<prefix>   -> hash suffixes listed under a 5 hex digit prefix, one per line (with --range)
+    GET  /range/info       -> {"algorithm", "normalize", "prefix_length"} of those hashes (with --range)
+    POST /evaluate         {"password": "..."}        -> evaluate_password result
+    POST /evaluate/batch   {"passwords": ["...", ...]} -> {"results": [...]}
+
+Scoring is CPU-bound, so it runs in a process pool while the event loop only does I/O.
+Single requests that arrive close together are batched into one call to the pool.
+The queue in front of the pool is bounded: when it is full the service answers 429 instead
+of letting latency grow without limit. Connections are kept alive (HTTP/1.1).
+New blacklist shards (ingest.py) are loaded by every worker within a few seconds.
+
+With --range the service is also a k-anonymity range server (backend/hash_range.py): clients
+send the first hex digits of a password hash and match the returned suffixes themselves.
+
+Run:
+    python app.py [--host 127.0.0.1] [--port 8080] [--workers N] [--stats] [--policy policy.json]
+                  [--range resources/blacklist.sha256 ...]
+Load test:
+    python loadtest.py --url http://127.0.0.1:8080
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'backend'))
+
+import blacklist
+import instrumentation
+from hash_range import RangeDataset
+from evaluator import evaluate_many
+from policy import load_policy, set_default_policy
+
+MAX_BODY = 1 << 20          # bytes per request body
+MAX_BATCH = 10000           # passwords per /evaluate/batch request
+MAX_HEADERS = 100           # header lines per request
+QUEUE_SIZE = 4096           # single requests waiting for the pool before answering 429
+BATCH_SIZE = 256            # single requests scored per pool call
+BATCH_WINDOW = 0.002        # seconds to wait for more requests to join a batch
+IDLE_TIMEOUT = 15           # seconds a kept-alive connection may stay idle
+
+METRICS_TYPE = "text/plain; version=0.0.4; charset=utf-8"  # Prometheus text format
+TEXT_TYPE = "text/plain; charset=utf-8"
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 429: "Too Many Requests",
+           431: "Request Header Fields Too Large", 500: "Internal Server Error"}
+
+
+def init_worker(stats: bool, policy_path: str = None):
+    blacklist.load_blacklist()
+    blacklist.start_auto_reload()  # new shards from ingest.py are picked up without a restart
+    if stats:
+        instrumentation.enable()
+    if policy_path:
+        set_default_policy(load_policy(policy_path))
+
+
+def score_batch(passwords: list):
+    """Runs in a worker process: (results as dicts in order, stats recorded for them or None)."""
+    batch = evaluate_many(passwords)
+    stats = instrumentation.drain() if instrumentation.enabled else None
+    return [row.as_dict() for row in batch], stats
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class ScoringService:
+    """Request batching and backpressure in front of a process pool."""
+
+    def __init__(self, workers: int = None, queue_size: int = QUEUE_SIZE, stats: bool = False, policy_path: str = None,
+                 ranges: RangeDataset = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.stats = stats
+        self.ranges = ranges  # hash prefix buckets for GET /range/..., None when not serving them
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                            initargs=(stats, policy_path))
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        # pool calls in flight, a couple per worker keeps every process busy
+        self.slots = asyncio.Semaphore(self.workers * 2)
+        # client batches allowed to wait for a slot before answering 429
+        self.max_waiting_batches = self.workers * 4
+        self.waiting_batches = 0
+        self.batcher = None
+
+    def start(self):
+        self.batcher = asyncio.ensure_future(self._batch_loop())
+
+    async def close(self):
+        if self.batcher is not None:
+            self.batcher.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def evaluate(self, password: str) -> dict:
+        """Score one password as part of the next batch. Raises HttpError(429) when the queue is full."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((password, future))
+        except asyncio.QueueFull:
+            raise HttpError(429, "server busy, retry later")
+        return await future
+
+    async def evaluate_batch(self, passwords: list) -> list:
+        """Score a client batch directly. Raises HttpError(429) when too many batches are already waiting."""
+        if self.waiting_batches >= self.max_waiting_batches:
+            raise HttpError(429, "server busy, retry later")
+        self.waiting_batches += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting_batches -= 1
+        try:
+            return await self._score(passwords)
+        finally:
+            self.slots.release()
+
+    async def _score(self, passwords: list) -> list:
+        results, stats = await asyncio.get_running_loop().run_in_executor(self.executor, score_batch, passwords)
+        if stats is not None:
+            instrumentation.merge(stats)  # the workers' counters add up in this process for /metrics
+        return results
+
+    async def _batch_loop(self):
+        while True:
+            items = [await self.queue.get()]
+            if self.queue.empty():
+                await asyncio.sleep(BATCH_WINDOW)  # give concurrent requests a moment to join
+            while len(items) < BATCH_SIZE and not self.queue.empty():
+                items.append(self.queue.get_nowait())
+            await self.slots.acquire()  # waits while the pool is saturated, the queue absorbs the backlog
+            asyncio.ensure_future(self._run_batch(items))
+
+    async def _run_batch(self, items):
+        try:
+            passwords = [password for password, _ in items]
+            results = await self._score(passwords)
+            for (_, future), result in zip(items, results):
+                if not future.done():
+                    future.set_result(result)
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self.slots.release()
+
+
+async def read_request(reader):
+    """(method, path, headers, body) of the next request, None when the client closed the connection."""
+    try:
+        line = await asyncio.wait_for(reader.readline(), IDLE_TIMEOUT)
+    except asyncio.TimeoutError:
+        return None
+    except ValueError:  # longer than the stream's limit (64 KiB)
+        raise HttpError(400, "request line too long")
+    if not line:
+        return None
+    try:
+        method, path, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(400, "malformed request line")
+
+    headers = {"_version": version}
+    for _ in range(MAX_HEADERS + 1):
+        try:
+            line = await reader.readline()
+        except ValueError:  # a line over the stream's limit (64 KiB)
+            raise HttpError(431, "header line too long")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HttpError(431, f"more than {MAX_HEADERS} header lines")
+
+    body = b""
+    if method == "POST":
+        if "content-length" not in headers:
+            raise HttpError(411, "Content-Length required")
+        try:
+            length = int(headers["content-length"])
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(400, "bad Content-Length")
+        if length > MAX_BODY:
+            raise HttpError(413, "request body too large")
+        body = await reader.readexactly(length)
+    return method, path, headers, body
+
+
+def keep_alive(headers: dict) -> bool:
+    connection = headers.get("connection", "").lower()
+    if headers.get("_version") == "HTTP/1.0":
+        return connection == "keep-alive"
+    return connection != "close"
+
+
+def response(status: int, payload, alive: bool) -> bytes:
+    """A JSON response, or text when payload is a (content type, str) tuple."""
+    if isinstance(payload, tuple):
+        content_type, text = payload
+        body = text.encode("utf-8")
+    else:
+        body, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+    head = (f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if alive else 'close'}\r\n")
+    if status == 429:
+        head += "Retry-After: 1\r\n"
+    return head.encode("latin-1") + b"\r\n" + body
+
+
+def parse_json(body: bytes) -> dict:
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HttpError(400, "body must be JSON")
+    if not isinstance(data, dict):
+        raise HttpError(400, "body must be a JSON object")
+    return data
+
+
+async def route(service: ScoringService, method: str, path: str, body: bytes):
+    path = path.split("?", 1)[0]  # no endpoint takes query parameters, "/health?" is "/health"
+    if path == "/health":
+        if method != "GET":
+            raise HttpError(405, "use GET")
+        return {"status": "ok", "queued": service.queue.qsize()}
+
+    if path == "/metrics":
+        if method != "GET":
+            raise HttpError(405, "use GET")
+        if not service.stats:
+            raise HttpError(404, "statistics are off, start the service with --stats")
+        return METRICS_TYPE, instrumentation.prometheus_text()
+
+    if path.startswith("/range/"):
+        if method != "GET":
+            raise HttpError(405, "use GET")
+        if service.ranges is None:
+            raise HttpError(404, "no range files, start the service with --range")
+        prefix = path[len("/range/"):]
+        if prefix == "info":
+            return service.ranges.info
+        try:
+            return TEXT_TYPE, service.ranges.bucket(prefix)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+
+    if path == "/evaluate":
+        if method != "POST":
+            raise HttpError(405, "use POST")
+        password = parse_json(body).get("password")
+        if not isinstance(password, str):
+            raise HttpError(400, '"password" must be a string')
+        return await service.evaluate(password)
+
+    if path == "/evaluate/batch":
+        if method != "POST":
+            raise HttpError(405, "use POST")
+        passwords = parse_json(body).get("passwords")
+        if not isinstance(passwords, list) or not all(isinstance(p, str) for p in passwords):
+            raise HttpError(400, '"passwords" must be a list of strings')
+        if len(passwords) > MAX_BATCH:
+            raise HttpError(413, f"at most {MAX_BATCH} passwords per batch")
+        return {"results": await service.evaluate_batch(passwords)}
+
+    raise HttpError(404, "not found")
+
+
+async def handle_connection(service: ScoringService, reader, writer):
+    try:
+        while True:
+            alive = False
+            try:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                alive = keep_alive(headers)
+                writer.write(response(200, await route(service, method, path, body), alive))
+            except HttpError as e:
+                writer.write(response(e.status, {"error": str(e)}, alive))
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            except Exception:
+                writer.write(response(500, {"error": "internal error"}, False))
+                alive = False
+            await writer.drain()
+            if not alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, workers: int = None, stats: bool = False, policy_path: str = None,
+                ranges: RangeDataset = None):
+    service = ScoringService(workers, stats=stats, policy_path=policy_path, ranges=ranges)
+    service.start()
+    server = await asyncio.start_server(lambda r, w: handle_connection(service, r, w), host, port)
+    print(f"scoring service on http://{host}:{port} with {service.workers} worker processes", file=sys.stderr)
+    if ranges is not None:
+        print(f"serving {len(ranges)} {ranges.info['algorithm']} hashes on /range/", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON password scoring service.")
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind (default 127.0.0.1, local only)")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=None, help="scoring processes (default: all CPU cores)")
+    parser.add_argument("--stats", action="store_true", help="record per-stage timings and serve them on GET /metrics")
+    parser.add_argument("--policy", metavar="PATH", help="scoring policy JSON file (default: the built-in policy)")
+    parser.add_argument("--range", metavar="PATH", nargs="+",
+                        help="hash index files to serve on GET /range/<prefix> (eg. from ingest.py export-hashes)")
+    args = parser.parse_args()
+    if args.policy:
+        load_policy(args.policy)  # fail here on a bad file, not in every worker
+    ranges = None
+    if args.range:
+        try:
+            ranges = RangeDataset(args.range)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.stats, args.policy, ranges))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
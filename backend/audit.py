@@ -0,0 +1,307 @@
+"""
+Command-line password auditor.
+
+Streams passwords (one per line) from files or stdin through evaluate_password and writes
+the results as they are produced, so memory use stays the same whatever the input size.
+Results don't include the passwords: output line N is the result for input password N.
+
+Examples (from the backend folder):
+    python audit.py dump.txt -o results.jsonl
+    python audit.py dump.txt --format csv -o results.csv
+    cat dump.txt | python audit.py --summary
+    python audit.py dump.txt --policy strict.json  # score with another policy (see policy.py)
+    python audit.py dump.txt --summary --metrics audit.prom   # also per-stage timings, Prometheus format
+    python audit.py dump.txt -o results.jsonl --store results.db           # reuse results of earlier runs
+    python audit.py dump.txt -o results.jsonl --store results.db --resume  # continue an interrupted run
+    python audit.py                      # type passwords interactively, Ctrl-D to stop
+"""
+import argparse
+import csv
+import json
+import hashlib
+import os
+import sys
+import time
+from collections import Counter
+from itertools import islice
+
+import instrumentation
+from evaluator import evaluate_password
+from patterns import PATTERN_LABELS
+from policy import load_policy
+
+CSV_FIELDS = ["length", "score", "strength", "entropy", "guesses_log10",
+              "has_upper", "has_lower", "has_digit", "has_symbol", "has_space", "has_non_ascii", "has_emoji",
+              "is_common", "patterns"]
+CHECKPOINT_EVERY = 10000  # passwords per chunk (and checkpoint) with --store
+
+
+def read_passwords(paths):
+    """
+    Yield passwords one line at a time from the given files ('-' means stdin).
+
+    Only the line ending is stripped, spaces are part of the password. Empty lines are skipped.
+    """
+    for path in paths:
+        if path == "-":
+            f = sys.stdin
+        else:
+            f = open(path, "r", encoding="utf-8", errors="replace", newline="")
+        try:
+            for line in f:
+                password = line.rstrip("\r\n")
+                if password:
+                    yield password
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+
+class Summary:
+    """Running aggregates over audited results. Holds a fixed number of counters, never the results."""
+
+    def __init__(self):
+        self.total = 0
+        self.common = 0
+        self.score_sum = 0
+        self.strengths = Counter({"Weak": 0, "Medium": 0, "Strong": 0})
+        self.patterns = Counter({label: 0 for _, label in PATTERN_LABELS})
+
+    def add(self, result: dict):
+        self.total += 1
+        self.score_sum += result["score"]
+        self.strengths[result["strength"]] += 1
+        self.patterns.update(result["patterns"])
+        if result["is_common"]:
+            self.common += 1
+
+    def state(self) -> dict:
+        """The raw counters, for a checkpoint (see from_state)."""
+        return {"total": self.total, "common": self.common, "score_sum": self.score_sum,
+                "strengths": dict(self.strengths), "patterns": dict(self.patterns)}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Summary":
+        summary = cls()
+        summary.total, summary.common, summary.score_sum = state["total"], state["common"], state["score_sum"]
+        summary.strengths.update(state["strengths"])
+        summary.patterns.update(state["patterns"])
+        return summary
+
+    def as_dict(self) -> dict:
+        total = self.total or 1  # avoid dividing by zero on empty input
+        return {
+            "total": self.total,
+            "strength": dict(self.strengths),
+            "patterns": dict(self.patterns),
+            "common": self.common,
+            "common_rate": round(self.common / total, 4),
+            "mean_score": round(self.score_sum / total, 2),
+        }
+
+
+class JsonlWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def flush(self):
+        self.out.flush()
+
+    def write(self, result: dict):
+        self.out.write(json.dumps(dict(result), ensure_ascii=False))
+        self.out.write("\n")
+
+
+class CsvWriter(JsonlWriter):
+    def __init__(self, out, header: bool = True):
+        self.out = out
+        self.writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction="ignore")
+        if header:  # not when appending to a resumed run's output
+            self.writer.writeheader()
+
+    def write(self, result: dict):
+        row = dict(result)
+        row["patterns"] = ";".join(result["patterns"])
+        self.writer.writerow(row)
+
+
+WRITERS = {"jsonl": JsonlWriter, "csv": CsvWriter}
+
+
+def run_audit(passwords, writer=None, summary: Summary = None, flush: bool = False, policy=None) -> int:
+    """
+    Evaluate every password (under policy, the default when None) and hand each result to the writer and/or summary.
+
+    Returns:
+        int: Number of passwords audited.
+    """
+    count = 0
+    for password in passwords:
+        result = evaluate_password(password, policy)
+        if writer is not None:
+            writer.write(result)
+            if flush:
+                writer.flush()
+        if summary is not None:
+            summary.add(result)
+        count += 1
+    return count
+
+
+def run_stored_audit(passwords, store, writer=None, summary: Summary = None, policy=None, job: str = None,
+                     chunk_size: int = CHECKPOINT_EVERY, audited: int = 0, output=None) -> int:
+    """
+    run_audit through a results store (results_store.ResultStore): passwords are handled chunk_size
+    at a time, only the ones the store has no result for are scored, and new results are stored.
+
+    After every chunk the output is flushed and, when job is given, a checkpoint is saved under
+    that name: passwords audited so far, the output file's size (output, when writing to a file),
+    the summary counters and the scoring context. main() resumes from it with --resume.
+
+    Args:
+        audited (int): Passwords already audited before these (when resuming).
+
+    Returns:
+        int: Number of passwords audited, including the ones before.
+    """
+    passwords = iter(passwords)
+    context = store.context_id(policy)
+    while True:
+        chunk = list(islice(passwords, chunk_size))
+        if not chunk:
+            return audited
+        for result in store.evaluate_many(chunk, policy):
+            if writer is not None:
+                writer.write(result)
+            if summary is not None:
+                summary.add(result)
+        audited += len(chunk)
+        if writer is not None:
+            writer.flush()
+        if job is not None:
+            store.save_checkpoint(job, {
+                "audited": audited,
+                "context": context,
+                "output_offset": None if output is None else output.tell(),
+                "summary": None if summary is None else summary.state(),
+            })
+
+
+def job_name(args) -> str:
+    """Checkpoint name of an audit: the same inputs, output and format resume the same job."""
+    if args.inputs == ["-"]:
+        inputs = ["-"]
+    else:
+        inputs = [path if path == "-" else os.path.abspath(path) for path in args.inputs]
+    output = args.output if args.output == "-" else os.path.abspath(args.output)
+    spec = json.dumps([inputs, output, args.format, args.summary])
+    return "audit:" + hashlib.sha256(spec.encode("utf-8")).hexdigest()[:16]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Audit passwords, one per line, from files or stdin.")
+    parser.add_argument("inputs", nargs="*", default=["-"], help="input files, '-' for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="output file, '-' for stdout (default)")
+    parser.add_argument("-f", "--format", choices=sorted(WRITERS), default="jsonl", help="output format (default jsonl)")
+    parser.add_argument("--summary", action="store_true",
+                        help="only print aggregate statistics (strength histogram, pattern counts, common-password rate)")
+    parser.add_argument("--policy", metavar="PATH", help="scoring policy JSON file (default: the built-in policy)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="record per-stage timings and counters and write them to PATH in Prometheus text format")
+    parser.add_argument("--store", metavar="PATH",
+                        help="results store (SQLite file, see results_store.py): passwords scored before are not scored again")
+    parser.add_argument("--store-key", metavar="PATH", help="file with the store's HMAC key (default: a random key kept in the store)")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue from the last checkpoint of the same audit (needs --store, and -o or --summary)")
+    parser.add_argument("--checkpoint-every", type=int, default=CHECKPOINT_EVERY, metavar="N",
+                        help=f"passwords between checkpoints with --store (default {CHECKPOINT_EVERY})")
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not report throughput on stderr")
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.resume and not args.store:
+        parser.error("--resume needs --store")
+    if args.resume and args.output == "-" and not args.summary:
+        parser.error("--resume needs an output file (-o) or --summary")
+    policy = load_policy(args.policy) if args.policy else None
+    if args.metrics:
+        instrumentation.enable()
+
+    store, job, state = None, None, None
+    if args.store:
+        from results_store import ResultStore
+        key = None
+        if args.store_key:
+            with open(args.store_key, "rb") as f:
+                key = f.read()
+        store = ResultStore(args.store, key)
+        job = job_name(args)
+        if args.resume:
+            state = store.checkpoint(job)
+            if state is not None and state["context"] != store.context_id(policy):
+                print("the policy, blacklist or dictionary changed since the checkpoint, starting over", file=sys.stderr)
+                state = None
+            elif state is None:
+                print("no checkpoint for this audit, starting from the beginning", file=sys.stderr)
+
+    if args.output == "-":
+        out = sys.stdout
+    elif state is not None and state["output_offset"] is not None:
+        # drop whatever was written after the checkpoint, those passwords are audited again
+        with open(args.output, "r+b") as f:
+            f.truncate(state["output_offset"])
+        out = open(args.output, "a", encoding="utf-8", newline="")
+    else:
+        out = open(args.output, "w", encoding="utf-8", newline="")
+    resumed = 0 if state is None else state["audited"]
+    try:
+        if state is not None and state["summary"] is not None:
+            summary = Summary.from_state(state["summary"])
+        else:
+            summary = Summary() if args.summary else None
+        if args.summary:
+            writer = None
+        elif args.format == "csv":
+            writer = CsvWriter(out, header=not resumed)
+        else:
+            writer = WRITERS[args.format](out)
+        # flush after every line when a person is typing, so each result shows up immediately
+        interactive = args.inputs == ["-"] and sys.stdin.isatty()
+
+        start = time.perf_counter()
+        if store is None:
+            count = run_audit(read_passwords(args.inputs), writer, summary, flush=interactive, policy=policy)
+        else:
+            passwords = islice(read_passwords(args.inputs), resumed, None)
+            count = run_stored_audit(passwords, store, writer, summary, policy, job, args.checkpoint_every,
+                                     audited=resumed, output=None if out is sys.stdout else out) - resumed
+            store.clear_checkpoint(job)  # finished, a later run starts over (and finds every result stored)
+        elapsed = time.perf_counter() - start
+
+        if summary is not None:
+            json.dump(summary.as_dict(), out, indent=2)
+            out.write("\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        if store is not None:
+            store.close()
+
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(instrumentation.prometheus_text())
+
+    if not args.quiet:
+        rate = count / elapsed if elapsed > 0 else 0.0
+        resumed_text = f" after {resumed} from the checkpoint" if resumed else ""
+        print(f"audited {count} passwords{resumed_text} in {elapsed:.2f}s ({rate:,.0f} passwords/sec)", file=sys.stderr)
+        if store is not None:
+            print(f"results store: {store.hits} reused, {store.misses} scored", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
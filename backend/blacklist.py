@@ -1,34 +1,244 @@
 import os
+import sys
+import threading
+import time
+
+from normalize import fold
+
 g = os.path.join(
-    os.path.dirname(__file__),    # location of the blacklist text file 
-    "..",                       
-    "resources",                
+    os.path.dirname(__file__),    # location of the blacklist text file
+    "..",
+    "resources",
     "blacklist.txt"
 )
 
-# Store all blacklisted passwords here
+# Compiled binary index of the same list (built with blacklist_index.py). Preferred over the text file when present.
+index_file = os.path.join(os.path.dirname(g), "blacklist.idx")
+
+# Optional bloom filter in front of the exact lookup (built with bloom.py), used when present
+bloom_file = os.path.join(os.path.dirname(g), "blacklist.bloom")
+
+# Shards written by ingest.py, listed in the folder's manifest.json. Used together with the files above.
+shard_dir = os.path.join(os.path.dirname(g), "blacklist.d")
+MANIFEST = "manifest.json"
+
+# Store all blacklisted passwords here (only used when there is no index file)
 blacklisted = set()
 
+# Range server client (hash_range.RangeClient) asked after the local lists, see set_remote
+_remote = None
+
+# Everything a lookup needs, as one tuple so a reload swaps it in a single assignment:
+# (the only store when there is exactly one and no bloom filter, hashes or remote, else None,
+#  (bloom filter or None, set or index) for every exact store, hash indexes, remote, info dict).
+# None until the blacklist is loaded.
+_store = None
+_lock = threading.Lock()
+_loaded_signature = None  # _signature() of the files the current _store was loaded from
+
 
 def load_blacklist():
     """
-    Load the blacklist file into a Python set.
-    Runs only once, when the module is imported.
+    Load (or reload) the blacklist now.
+    Maps the binary index file if it has been built (near-instant, pages are shared between processes),
+    otherwise reads the text file into a Python set.
+    A bloom filter next to it is loaded too, so most misses never reach the exact lookup, unless it
+    was built from another version of the list (see bloom.source_fingerprint).
+    Shards listed in blacklist.d/manifest.json (written by ingest.py) are mapped as well.
+
+    Nothing is loaded at import time: the first is_common_password call does it, or call this
+    function to control when the cost is paid (eg. at startup of a worker process). Thread-safe.
     """
-    if not os.path.exists(g):
-        print("blacklist file not found", g)
-        return
-    
-    with open(g, "r") as f:
-        for line in f:
-            password = line.strip().lower()
-            if password:
-                blacklisted.add(password)
+    with _lock:
+        return _load()
+
+
+def _load():
+    # caller holds _lock
+    global _store, blacklisted, _loaded_signature
+    signature = _signature()  # taken first, so a change while loading triggers another reload
+    exact = []
+    hashes = []
+    info = {"version": None, "entries": 0, "shards": 0, "fingerprint": _fingerprint(signature)}
+    words = set()
+
+    bloom = None
+    if os.path.exists(bloom_file):
+        from bloom import BloomFilter
+        bloom = BloomFilter.load(bloom_file)
+
+    if os.path.exists(index_file):
+        from blacklist_index import SortedIndex
+        exact.append((_matching(bloom, index_file), SortedIndex(index_file)))
+    elif os.path.exists(g):
+        # same decoding as bloom.py and ingest.py, so the set holds exactly what the filter was built over
+        with open(g, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                password = fold(line.strip())
+                if password:
+                    words.add(password)
+        exact.append((_matching(bloom, g), words))
+    elif bloom is not None:
+        bloom.close()
+
+    manifest = _read_manifest()
+    if manifest is not None:
+        from blacklist_index import SortedIndex, HashIndex
+        from bloom import BloomFilter
+        info["version"] = manifest["version"]
+        for shard in manifest["shards"]:
+            path = os.path.join(shard_dir, shard["file"])
+            if shard["kind"] == "sha1":
+                hashes.append(HashIndex(path))
+            else:
+                shard_bloom = BloomFilter.load(os.path.join(shard_dir, shard["bloom"])) if shard.get("bloom") else None
+                exact.append((_matching(shard_bloom, path), SortedIndex(path)))
+        info["shards"] = len(manifest["shards"])
+
+    if not exact and not hashes and _remote is None:
+        print("blacklist file not found", g, "and no shards in", shard_dir, file=sys.stderr)
+
+    info["entries"] = sum(len(store) for _, store in exact) + sum(len(h) for h in hashes)
+    blacklisted = words
+    _store = _assemble(tuple(exact), tuple(hashes), _remote, info)
+    _loaded_signature = signature
+    return _store
+
+
+def _matching(bloom, source: str):
+    """The filter if it was built from source as it is now, else None: a stale filter would hide new entries."""
+    if bloom is None or bloom.built_from(source):
+        return bloom
+    print("ignoring the bloom filter of", source, "- it was built from another version, rebuild it with bloom.py",
+          file=sys.stderr)
+    bloom.close()
+    return None
+
+
+def _assemble(exact, hashes, remote, info):
+    single = exact[0][1] if len(exact) == 1 and exact[0][0] is None and not hashes and remote is None else None
+    return single, exact, hashes, remote, dict(info, remote=None if remote is None else remote.url)
+
+
+def _read_manifest():
+    import json
+    try:
+        with open(os.path.join(shard_dir, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _signature():
+    """Identity of every file the blacklist is loaded from, changes whenever one is replaced."""
+    signature = []
+    for path in (g, index_file, bloom_file, os.path.join(shard_dir, MANIFEST)):
+        try:
+            st = os.stat(path)
+            signature.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def _fingerprint(signature) -> str:
+    import hashlib
+    return hashlib.sha256(repr(signature).encode("ascii")).hexdigest()[:16]
+
+
+def reload_if_changed() -> bool:
+    """
+    Reload the blacklist if any of its files (or the shard manifest) changed since it was loaded.
+
+    The new lists are opened while lookups keep using the old ones, then swapped in with one
+    assignment, so lookups never pause or see a half-loaded blacklist.
+
+    Returns:
+        bool: Whether a reload happened.
+    """
+    if _store is not None and _signature() == _loaded_signature:
+        return False
+    with _lock:
+        if _store is not None and _signature() == _loaded_signature:
+            return False
+        _load()
+    return True
+
+
+def start_auto_reload(interval: float = 5.0) -> threading.Thread:
+    """Check for new blacklist files every `interval` seconds in a daemon thread (see reload_if_changed)."""
+    def watch():
+        while True:
+            time.sleep(interval)
+            try:
+                reload_if_changed()
+            except Exception as e:  # eg. a shard deleted by hand, keep the current lists and retry later
+                print("blacklist reload failed:", e, file=sys.stderr)
+
+    thread = threading.Thread(target=watch, name="blacklist-reload", daemon=True)
+    thread.start()
+    return thread
+
+
+def set_remote(client):
+    """
+    Also check passwords against a range server, by hash prefix (k-anonymity, see hash_range.py).
+
+    Clients without a local copy of the list (eg. the GUI) only need this. The local files, if
+    any, are still checked first. Takes effect for the next lookup; pass None to stop.
+
+    Args:
+        client: A hash_range.RangeClient, or None.
+    """
+    global _remote, _store
+    with _lock:
+        _remote = client
+        if _store is not None:
+            _, exact, hashes, _, store_info = _store
+            _store = _assemble(exact, hashes, client, store_info)
+
+
+def info() -> dict:
+    """
+    What is loaded: {"version": shard manifest version or None, "entries": n, "shards": n, "remote": URL or None,
+    "fingerprint": hash of the files' identities, changes whenever a reload picks up other files}.
+    """
+    return dict((_store or _loaded_store())[4])
+
 
-load_blacklist() #function call
+def is_loaded() -> bool:
+    return _store is not None
 
 
-def is_common_password(password: str) -> bool:
-    return password.lower() in blacklisted  #returns whether or not password is in the blacklisted set. Based on that it affects the total score of the password found by evaluator python file 
+def _loaded_store():
+    # checked again under the lock, so threads racing on the first lookup load the list only once
+    with _lock:
+        return _store if _store is not None else _load()
 
 
+def is_common_password(password: str, remote: bool = True) -> bool:
+    #returns whether or not password is in the blacklist. Based on that it affects the total score of the password found by evaluator python file
+    #remote=False checks the local lists only, without a range server round trip (see set_remote)
+    single, exact, hashes, client, _ = _store or _loaded_store()
+    key = fold(password)  # case, accents, fullwidth forms and lookalike letters folded (see normalize.py)
+    if single is not None:
+        return key in single  # the usual layout: one set or index file
+    encoded = None
+    for bloom, store in exact:
+        if bloom is not None:
+            if encoded is None:
+                encoded = key.encode("utf-8", "surrogatepass")
+            if encoded not in bloom:
+                continue  # definitely not in this store, skip the exact lookup
+        if key in store:
+            return True
+    if hashes:
+        # hash lists (eg. Have I Been Pwned) hold the password exactly as it was leaked, not lowercased
+        from hashlib import sha1
+        digest = sha1(password.encode("utf-8", "surrogatepass")).digest()
+        for index in hashes:
+            if digest in index:
+                return True
+    if client is not None and remote:
+        return password in client  # only a hash prefix is sent, see hash_range.py
+    return False
@@ -0,0 +1,290 @@
+"""
+Sorted binary index of blacklisted passwords, queried through mmap.
+
+File layout (all integers little-endian uint64):
+
+    magic "PSCIDX01" | count | offsets[count + 1] | data
+
+data holds the normalized passwords (utf-8) back to back in sorted byte order, and entry i is
+data[offsets[i]:offsets[i + 1]]. A lookup is a binary search straight on the mapped file, so
+nothing is parsed at load time and the pages are shared by every process using the same file.
+
+Password hashes (eg. SHA-1 lists from Have I Been Pwned) use a fixed-width layout instead:
+
+    magic "PSCSHA01" | count | digests[count] (20 bytes each, sorted)
+
+or for SHA-256 digests (eg. exported for the hash range lookups in hash_range.py):
+
+    magic "PSC256H1" | count | digests[count] (32 bytes each, sorted)
+
+Build an index from a plain text list (one password per line):
+    python blacklist_index.py ../resources/blacklist.txt ../resources/blacklist.idx
+"""
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+
+from normalize import fold
+
+MAGIC = b"PSCIDX01"
+HASH_MAGIC = b"PSCSHA01"
+HASH_SIZE = 20  # SHA-1 digest
+# algorithm -> (magic, digest size) of the hash index layouts
+HASH_FORMATS = {"sha1": (HASH_MAGIC, HASH_SIZE), "sha256": (b"PSC256H1", 32)}
+_U64 = struct.Struct("<Q")
+HEADER_SIZE = len(MAGIC) + _U64.size
+
+
+def normalize(password: str) -> str:
+    """Normalization applied to every entry, the same one is_common_password uses."""
+    return fold(password.strip())
+
+
+def write_index(sorted_entries, path: str) -> int:
+    """
+    Write an index file from entries that are already sorted and unique.
+
+    The entries are streamed through two temporary files, so memory use does not depend on
+    how many there are. The file is replaced atomically, readers never see a half-written index.
+
+    Args:
+        sorted_entries: Iterable of bytes in ascending order, without duplicates.
+        path (str): Destination file.
+
+    Returns:
+        int: Number of entries written.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    count = 0
+    offset = 0
+    with tempfile.TemporaryFile(dir=folder) as offsets, tempfile.TemporaryFile(dir=folder) as data:
+        offsets.write(_U64.pack(0))
+        previous = None
+        for entry in sorted_entries:
+            if previous is not None and entry <= previous:
+                raise ValueError("index entries must be sorted and unique")
+            data.write(entry)
+            offset += len(entry)
+            offsets.write(_U64.pack(offset))
+            count += 1
+            previous = entry
+
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(MAGIC)
+                out.write(_U64.pack(count))
+                for part in (offsets, data):
+                    part.seek(0)
+                    shutil.copyfileobj(part, out)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return count
+
+
+def write_hash_index(sorted_digests, path: str, algorithm: str = "sha1") -> int:
+    """
+    Write a hash index file from digests that are already sorted and unique.
+
+    Streams the digests straight to a temporary file, which then atomically replaces path.
+
+    Args:
+        sorted_digests: Iterable of digests in ascending order, without duplicates.
+        path (str): Destination file.
+        algorithm (str): A key of HASH_FORMATS, 'sha1' (20-byte digests) or 'sha256' (32 bytes).
+
+    Returns:
+        int: Number of digests written.
+    """
+    magic, size = HASH_FORMATS[algorithm]
+    folder = os.path.dirname(os.path.abspath(path))
+    count = 0
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            out.write(magic)
+            out.write(_U64.pack(0))  # count, filled in below
+            previous = None
+            for digest in sorted_digests:
+                if len(digest) != size:
+                    raise ValueError(f"{algorithm} digests must be {size} bytes")
+                if previous is not None and digest <= previous:
+                    raise ValueError("index entries must be sorted and unique")
+                out.write(digest)
+                count += 1
+                previous = digest
+            out.seek(len(magic))
+            out.write(_U64.pack(count))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+def build_index(text_path: str, index_path: str, run_size: int = None) -> int:
+    """
+    Compile a plain text blacklist (one password per line, gzip or not) into an index file.
+
+    The entries go through ingest's external sort: runs of run_size entries are sorted in memory,
+    spilled to temporary files next to index_path and merged without duplicates, so memory stays
+    bounded whatever the size of the list.
+
+    Args:
+        text_path (str): The text list.
+        index_path (str): Destination index file.
+        run_size (int): Entries sorted in memory at a time (default ingest.DEFAULT_RUN_SIZE).
+
+    Returns:
+        int: Number of unique entries in the index.
+    """
+    from ingest import external_sort, read_entries, DEFAULT_RUN_SIZE  # ingest imports this module
+    folder = os.path.dirname(os.path.abspath(index_path))
+    with tempfile.TemporaryDirectory(dir=folder) as tmp:
+        entries = external_sort(read_entries(text_path, "text"), tmp, run_size or DEFAULT_RUN_SIZE)
+        return write_index(entries, index_path)
+
+
+class SortedIndex:
+    """Read-only view of an index file. Supports `password in index`, len(), iteration and `with`."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"{path} is not a blacklist index")
+        self._count = _U64.unpack_from(self._mm, len(MAGIC))[0]
+        self._data_start = HEADER_SIZE + _U64.size * (self._count + 1)
+        if sys.byteorder == "little":
+            # read the offsets table in place, no struct call per probe
+            self._offsets = memoryview(self._mm)[HEADER_SIZE:self._data_start].cast("Q")
+        else:
+            # big-endian hosts decode the table once into a list
+            self._offsets = [_U64.unpack_from(self._mm, HEADER_SIZE + _U64.size * i)[0] for i in range(self._count + 1)]
+
+    def __len__(self):
+        return self._count
+
+    def _entry(self, i: int) -> bytes:
+        start = self._data_start
+        return self._mm[start + self._offsets[i]:start + self._offsets[i + 1]]
+
+    def contains_bytes(self, key: bytes) -> bool:
+        """Binary search for an already normalized and encoded entry."""
+        mm, offsets, start = self._mm, self._offsets, self._data_start
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            entry = mm[start + offsets[mid]:start + offsets[mid + 1]]
+            if entry < key:
+                lo = mid + 1
+            elif entry > key:
+                hi = mid
+            else:
+                return True
+        return False
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains_bytes(password.encode("utf-8", "surrogatepass"))
+
+    def __iter__(self):
+        """Entries in sorted order, as bytes."""
+        for i in range(self._count):
+            yield self._entry(i)
+
+    def close(self):
+        if isinstance(self._offsets, memoryview):
+            self._offsets.release()
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HashIndex:
+    """
+    Read-only view of a hash index file. Supports `digest in index`, len(), iteration and `with`.
+
+    Attributes:
+        algorithm (str): 'sha1' or 'sha256', from the file's magic.
+        digest_size (int): Bytes per digest.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self._mm[:len(HASH_MAGIC)]
+        for algorithm, (expected, size) in HASH_FORMATS.items():
+            if magic == expected:
+                self.algorithm, self.digest_size = algorithm, size
+                break
+        else:
+            self._mm.close()
+            raise ValueError(f"{path} is not a hash index")
+        self._count = _U64.unpack_from(self._mm, len(magic))[0]
+
+    def __len__(self):
+        return self._count
+
+    def _search(self, key: bytes) -> int:
+        """Position of the first digest >= key (key may be a prefix)."""
+        mm, size = self._mm, self.digest_size
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = HEADER_SIZE + mid * size
+            if mm[start:start + size] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def __contains__(self, digest: bytes) -> bool:
+        size = self.digest_size
+        i = self._search(digest)
+        start = HEADER_SIZE + i * size
+        return i < self._count and self._mm[start:start + size] == digest
+
+    def __iter__(self):
+        """Digests in sorted order."""
+        return self.between(b"")
+
+    def between(self, low: bytes, high: bytes = None):
+        """
+        Digests d with low <= d < high, in sorted order (to the end of the file when high is None).
+
+        low and high may be shorter than a digest, eg. the bounds of a hash prefix bucket.
+        """
+        mm, size = self._mm, self.digest_size
+        first = self._search(low) if low else 0
+        last = self._count if high is None else self._search(high)
+        for start in range(HEADER_SIZE + first * size, HEADER_SIZE + last * size, size):
+            yield mm[start:start + size]
+
+    def close(self):
+        self._mm.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python blacklist_index.py <blacklist.txt> <blacklist.idx>", file=sys.stderr)
+        sys.exit(2)
+    n = build_index(sys.argv[1], sys.argv[2])
+    print(f"wrote {n} entries to {sys.argv[2]}")
@@ -0,0 +1,219 @@
+"""
+Bloom filter used as a compact front for the blacklist.
+
+A filter answers "definitely not in the blacklist" or "maybe in the blacklist". Most checked
+passwords are not blacklisted, so is_common_password can return early for them and only ask the
+exact store (set or index file) on a filter hit. The false positive rate is chosen at build time
+and sets the size, -ln(p) / ln(2)^2 bits per entry:
+
+    fp rate     bits/entry   14M entries (rockyou)   1 billion entries
+    0.1%          14.4            25 MB                  1.8 GB
+    1% (default)   9.6            17 MB                  1.2 GB
+    5%             6.2            11 MB                  780 MB
+    10%            4.8             8 MB                  600 MB
+    20%            3.4             6 MB                  420 MB
+
+A billion entries in a few hundred MB means a 20% or higher rate: the filter still answers 80% of
+the misses on its own, the rest cost an index lookup each. Building never holds the entries in
+memory, only the bits.
+
+File layout (integers little-endian uint64):
+
+    magic "PSCBLM02" | bit count m | hash count k | entries added | source fingerprint (16 bytes) | bits
+
+The source fingerprint identifies the index or text file the filter was built from (see
+source_fingerprint). The blacklist ignores a filter whose source has changed since, a stale filter
+would hide the new entries. Filters of the older "PSCBLM01" layout have no fingerprint and are
+never trusted.
+
+Build a filter from a blacklist index or text file:
+    python bloom.py ../resources/blacklist.idx ../resources/blacklist.bloom --fp-rate 0.01
+"""
+import argparse
+import math
+import mmap
+import os
+import struct
+import tempfile
+from hashlib import blake2b
+
+from blacklist_index import SortedIndex, MAGIC as INDEX_MAGIC, normalize
+
+MAGIC = b"PSCBLM02"
+_HEADER = struct.Struct("<8sQQQ16s")
+_OLD_MAGIC = b"PSCBLM01"
+_OLD_HEADER = struct.Struct("<8sQQQ")
+_MASK64 = (1 << 64) - 1
+SAMPLE_SIZE = 65536  # bytes hashed from each end of the source file
+
+
+def optimal_size(capacity: int, fp_rate: float):
+    """Number of bits m and hash functions k for `capacity` entries at the given false positive rate."""
+    if capacity < 1:
+        capacity = 1
+    if not 0 < fp_rate < 1:
+        raise ValueError("fp_rate must be between 0 and 1")
+    m = math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+    k = max(1, round(m / capacity * math.log(2)))
+    return m, k
+
+
+def source_fingerprint(path: str) -> bytes:
+    """
+    Identity of a blacklist file's contents: its size and its first and last SAMPLE_SIZE bytes, hashed.
+
+    Cheap enough to check at every load, and unlike a modification time it survives copying the
+    files elsewhere. Regenerating the list with entries added or removed changes it; an edit that
+    keeps the size and only touches the middle of a large file is not seen.
+    """
+    h = blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        h.update(size.to_bytes(8, "little"))
+        h.update(f.read(SAMPLE_SIZE))
+        if size > SAMPLE_SIZE:
+            f.seek(max(SAMPLE_SIZE, size - SAMPLE_SIZE))
+            h.update(f.read())
+    return h.digest()
+
+
+def _hashes(key: bytes):
+    # one 128-bit digest split into two 64-bit hashes, the k positions are h1 + i*h2 (double hashing)
+    h = int.from_bytes(blake2b(key, digest_size=16).digest(), "little")
+    return h & _MASK64, (h >> 64) | 1
+
+
+class BloomFilter:
+    """
+    Bloom filter over bytes keys.
+
+    Build one with BloomFilter(capacity, fp_rate) and add(), or open a saved one with
+    BloomFilter.load(path), which memory-maps the bits instead of reading them.
+
+    Attributes:
+        source (bytes): source_fingerprint of the file the filter was built from, None if unknown.
+    """
+
+    def __init__(self, capacity: int = 1000, fp_rate: float = 0.01, *, _bits=None, _m=0, _k=0, _count=0,
+                 _source=None, _mm=None):
+        if _bits is None:
+            _m, _k = optimal_size(capacity, fp_rate)
+            _bits = bytearray((_m + 7) // 8)
+        self.m = _m
+        self.k = _k
+        self.count = _count
+        self.source = _source
+        self._bits = _bits
+        self._mm = _mm
+
+    def add(self, key: bytes):
+        h1, h2 = _hashes(key)
+        bits, m = self._bits, self.m
+        for i in range(self.k):
+            pos = (h1 + i * h2) % m
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        h1, h2 = _hashes(key)
+        bits, m = self._bits, self.m
+        for i in range(self.k):
+            pos = (h1 + i * h2) % m
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+        return True
+
+    def built_from(self, path: str) -> bool:
+        """Whether the filter was built from path as it is now (see source_fingerprint)."""
+        return self.source is not None and self.source == source_fingerprint(path)
+
+    def estimated_fp_rate(self) -> float:
+        """False positive rate expected for the number of entries added so far."""
+        return (1 - math.exp(-self.k * self.count / self.m)) ** self.k
+
+    def save(self, path: str):
+        """Write the filter to disk. The file is replaced atomically."""
+        folder = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(_HEADER.pack(MAGIC, self.m, self.k, self.count, self.source or bytes(16)))
+                out.write(self._bits)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "BloomFilter":
+        """Open a saved filter. The bits stay on disk and are paged in through mmap."""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = mm[:len(MAGIC)]
+        if magic == MAGIC:
+            _, m, k, count, source = _HEADER.unpack_from(mm, 0)
+            source = source if any(source) else None  # saved without one
+            start = _HEADER.size
+        elif magic == _OLD_MAGIC:
+            _, m, k, count = _OLD_HEADER.unpack_from(mm, 0)
+            source = None
+            start = _OLD_HEADER.size
+        else:
+            mm.close()
+            raise ValueError(f"{path} is not a bloom filter")
+        bits = memoryview(mm)[start:start + (m + 7) // 8]
+        return cls(_bits=bits, _m=m, _k=k, _count=count, _source=source, _mm=mm)
+
+    def close(self):
+        """Unmap a loaded filter. Nothing to do for one built in memory."""
+        if self._mm is not None:
+            self._bits.release()
+            self._mm.close()
+            self._mm = None
+
+
+def build_filter(source: str, path: str, fp_rate: float = 0.01) -> BloomFilter:
+    """
+    Build a filter from a blacklist index file or a plain text blacklist and save it to path.
+
+    Entries get the same normalization as is_common_password, so a filter miss is always a blacklist miss.
+    The source's fingerprint is saved with the filter, so a filter left over from an older list is ignored.
+    A text list is read twice: once to count its lines (the filter is sized for that many entries,
+    duplicates included, so never too small), once to add them. Adding a duplicate again changes
+    no bit, it only makes the filter's count and estimated_fp_rate() a little pessimistic.
+    """
+    fingerprint = source_fingerprint(source)  # taken first: a list replaced during the build never matches
+    with open(source, "rb") as f:
+        is_index = f.read(len(INDEX_MAGIC)) == INDEX_MAGIC
+
+    if is_index:
+        index = SortedIndex(source)
+        try:
+            bloom = BloomFilter(len(index), fp_rate)
+            for entry in index:
+                bloom.add(entry)
+        finally:
+            index.close()
+    else:
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            capacity = sum(1 for line in f if line.strip())
+        bloom = BloomFilter(capacity, fp_rate)
+        with open(source, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                entry = normalize(line)
+                if entry:
+                    bloom.add(entry.encode("utf-8"))
+
+    bloom.source = fingerprint
+    bloom.save(path)
+    return bloom
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a bloom filter for the blacklist.")
+    parser.add_argument("source", help="blacklist index (.idx) or text file")
+    parser.add_argument("output", help="filter file to write")
+    parser.add_argument("--fp-rate", type=float, default=0.01, help="target false positive rate (default 0.01)")
+    args = parser.parse_args()
+    bloom = build_filter(args.source, args.output, args.fp_rate)
+    print(f"wrote {bloom.count} entries, {bloom.m // 8:,} bytes, k={bloom.k} to {args.output}")
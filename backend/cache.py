@@ -0,0 +1,125 @@
+"""
+Bounded LRU (optionally TTL) cache around evaluate_password.
+
+Services and scripts see the same weak passwords over and over. The cache answers repeats
+without re-scoring them.
+
+A result is only reused under the scoring context it was computed in: the same policy object,
+the same blacklist files and range server (blacklist.info()) and the same dictionary. A reload
+that picks up a new breach dump (reload_if_changed, start_auto_reload) or a rebuilt dictionary
+makes the older entries misses, like results_store.scoring_context does on disk.
+
+Entries are keyed on an HMAC-SHA256 of the password under a random per-process key, and
+evaluate_password results don't contain the password, so the cache never holds a raw secret.
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+import blacklist
+from dictionary import get_automaton
+from evaluator import evaluate_password, PasswordResult
+from policy import current_policy
+
+DEFAULT_MAXSIZE = 1024
+
+
+class EvaluationCache:
+    """
+    LRU cache of evaluation results with hit/miss/eviction counters. Thread-safe.
+
+    Args:
+        maxsize (int): Most results kept; the least recently used one is evicted beyond that.
+        ttl (float): Seconds a result stays valid, None to keep results until evicted.
+        evaluate: Function computing a result on a miss (default evaluate_password).
+        key (bytes): HMAC key, random by default. Only pass one to share keys between caches.
+        policy (Policy): Scoring policy, the current default when None. Results cached under
+            another policy (eg. before set_default_policy), blacklist or dictionary count as misses.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE, ttl: float = None, evaluate=None, key: bytes = None,
+                 policy=None):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._evaluate = evaluate
+        self._key = key or secrets.token_bytes(32)
+        self.policy = policy
+        self._entries = OrderedDict()  # digest -> (expiry time or None, scoring context, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _digest(self, password: str) -> bytes:
+        return hmac.new(self._key, password.encode("utf-8", "surrogatepass"), hashlib.sha256).digest()
+
+    def evaluate(self, password: str) -> PasswordResult:
+        """Result of evaluate_password (or of the evaluate function given) for this password, from the cache when possible."""
+        digest = self._digest(password)
+        policy = self.policy or current_policy()
+        context = _scoring_context(policy)
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires, entry_context, result = entry
+                if entry_context != context:
+                    del self._entries[digest]  # scored under another policy, blacklist or dictionary
+                elif expires is None or expires > time.monotonic():
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return _copy(result)
+                else:
+                    del self._entries[digest]
+                    self.expirations += 1
+            self.misses += 1
+
+        # scored outside the lock, so a slow evaluation doesn't block other threads' hits
+        result = self._evaluate(password) if self._evaluate else evaluate_password(password, policy)
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            self._entries[digest] = (expires, context, result)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return _copy(result)
+
+    __call__ = evaluate
+
+    def stats(self) -> dict:
+        """Counters and current size."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def clear(self):
+        """Drop every cached result (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+
+def _scoring_context(policy) -> tuple:
+    """What a result depends on besides the password (see results_store.scoring_context), cheap to compare."""
+    lists = blacklist.info()
+    return policy, lists["fingerprint"], lists["remote"], get_automaton().fingerprint
+
+
+def _copy(result):
+    # PasswordResults are read-only and handed out as they are. Dicts from a custom evaluate
+    # function are copied, with their lists: callers may modify them, the cached result must
+    # not change with it.
+    if not isinstance(result, dict):
+        return result
+    return {name: list(value) if isinstance(value, list) else value for name, value in result.items()}
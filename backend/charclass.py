@@ -0,0 +1,103 @@
+"""
+Character classes of a password in one pass, from a precomputed code point -> class bits table.
+
+The composition check used to ask str.isupper / islower / isdigit / isalnum of every character.
+Here the classes of the 256 Latin-1 code points are computed once at import into a tuple, and
+the rest of Unicode is classified on first sight and cached, so checking a character is an
+index (or a dict lookup) and an OR.
+
+Besides the four classes the score has always used (HAS_SYMBOL being any character that isn't
+a letter or digit, spaces and emoji included), there are finer ones for policies that want them
+(see "classes" in policy.py, they are worth 0 points by default):
+
+    HAS_SPACE      whitespace
+    HAS_NON_ASCII  letters outside ASCII (é, ß, ж, 中, ...)
+    HAS_EMOJI      emoji and pictographs (code point ranges, see EMOJI_RANGES)
+
+Bits 16 and 32 of the same flags are IS_COMMON and TRUNCATED, see policy.py.
+"""
+
+HAS_UPPER = 1
+HAS_LOWER = 2
+HAS_DIGIT = 4
+HAS_SYMBOL = 8
+HAS_SPACE = 64
+HAS_NON_ASCII = 128
+HAS_EMOJI = 256
+CLASS_BITS = HAS_UPPER | HAS_LOWER | HAS_DIGIT | HAS_SYMBOL | HAS_SPACE | HAS_NON_ASCII | HAS_EMOJI
+
+# Emoji blocks. The Unicode Emoji property isn't in unicodedata, these ranges hold nearly all
+# emoji in use (and few code points that aren't): pictographs, emoticons, transport, flags
+# (regional indicators), supplemental symbols, plus the older symbol and dingbat blocks.
+EMOJI_RANGES = (
+    (0x1F000, 0x1FAFF),
+    (0x2600, 0x27BF),
+    (0x2B00, 0x2BFF),
+    (0x2300, 0x23FF),
+)
+CACHE_LIMIT = 65536  # characters outside Latin-1 remembered
+
+
+def _classify(ch: str) -> int:
+    """Class bits of one character from the str methods (the reference the tables are built from)."""
+    mask = 0
+    if ch.isupper():
+        mask |= HAS_UPPER
+    if ch.islower():
+        mask |= HAS_LOWER
+    if ch.isdigit():
+        mask |= HAS_DIGIT
+    if not ch.isalnum():
+        mask |= HAS_SYMBOL
+    if ch.isspace():
+        mask |= HAS_SPACE
+    if ch.isalpha() and ord(ch) > 127:
+        mask |= HAS_NON_ASCII
+    code = ord(ch)
+    for low, high in EMOJI_RANGES:
+        if low <= code <= high:
+            mask |= HAS_EMOJI
+            break
+    return mask
+
+
+_LATIN1 = tuple(_classify(chr(code)) for code in range(256))
+_cache = {}
+
+
+def char_class(ch: str) -> int:
+    """Class bits of one character."""
+    code = ord(ch)
+    if code < 256:
+        return _LATIN1[code]
+    mask = _cache.get(ch)
+    if mask is None:
+        mask = _classify(ch)
+        if len(_cache) < CACHE_LIMIT:
+            _cache[ch] = mask
+    return mask
+
+
+def class_mask(chars) -> int:
+    """
+    OR of the class bits of the characters.
+
+    Args:
+        chars: A string, or any iterable of characters. The distinct characters are enough,
+            eg. the keys of a Counter of the password when there is one already.
+
+    Returns:
+        int: HAS_* bits for the classes present.
+    """
+    mask = 0
+    table = _LATIN1
+    for ch in chars:
+        code = ord(ch)
+        if code < 256:
+            mask |= table[code]
+        else:
+            other = _cache.get(ch)
+            if other is None:
+                other = char_class(ch)
+            mask |= other
+    return mask
@@ -0,0 +1,361 @@
+"""
+Dictionary word detector: finds common words, names and other listed strings anywhere inside a
+password, through case and leetspeak ("Summer2024!", "p@ssw0rdXYZ", "DR4G0N99").
+
+Passwords and words are folded the same way before matching: normalize.fold (case, accents,
+fullwidth forms, lookalike letters), then the leetspeak substitutions in LEET (0 -> o, @ -> a,
+1 and l -> i, ...). The words are compiled into an
+Aho-Corasick automaton (a trie with failure links), so one scan finds every embedded word in
+time linear in the password length, however many words there are.
+
+The automaton is stored in compact arrays (CSR layout: the edges of each node are one slice of
+a string of characters and an array of targets) and can be prebuilt into a file that loads
+without any parsing. Without resources/dictionary.trie the built-in COMMON_WORDS are used.
+Transitions actually taken are memoized per node, so scans of similar passwords cost about
+one dict lookup per character.
+
+Every word keeps its rank (position in the input, first list first), used by guesses.py:
+put the most common words first.
+
+Build a dictionary from word lists (one entry per line, eg. words, names, a blacklist):
+    python dictionary.py build words.txt names.txt -o ../resources/dictionary.trie
+"""
+import os
+import sys
+import threading
+from array import array
+from collections import deque
+
+import normalize
+
+# Prebuilt automaton, loaded on first use when present
+dictionary_file = os.path.join(os.path.dirname(__file__), "..", "resources", "dictionary.trie")
+
+MAGIC = b"PSCDICT2"
+# Shorter words match inside too many ordinary words and passphrases to mean anything ("love" in
+# "glove", "pass" in "compass"); the 4-letter COMMON_WORDS only count with --min-length 4
+MIN_LENGTH = 5
+MEMO_LIMIT = 256  # memoized transitions per node, odd characters past that are looked up every time
+
+# Leetspeak substitutions, applied after normalize.fold. l and 1 both go to i, so "he11o" matches "hello".
+LEET = str.maketrans({"0": "o", "1": "i", "!": "i", "|": "i", "l": "i", "3": "e", "4": "a", "@": "a",
+                      "5": "s", "$": "s", "7": "t", "+": "t", "8": "b", "9": "g"})
+_LEET_CHARS = {chr(code): sub for code, sub in LEET.items()}
+
+# Built into every dictionary: bases that show up again and again in breached passwords
+COMMON_WORDS = (
+    "password", "passwort", "passe", "secret", "letmein", "welcome", "admin", "administrator", "login",
+    "master", "access", "default", "changeme", "trustno", "iloveyou", "love", "lover", "whatever",
+    "freedom", "sunshine", "shadow", "princess", "dragon", "monkey", "football", "baseball", "soccer",
+    "hockey", "basketball", "superman", "batman", "starwars", "pokemon", "matrix", "ninja", "hello",
+    "summer", "winter", "spring", "autumn", "january", "february", "march", "april", "june", "july",
+    "august", "september", "october", "november", "december", "monday", "tuesday", "wednesday",
+    "thursday", "friday", "saturday", "sunday", "computer", "internet", "google", "apple", "samsung",
+    "microsoft", "facebook", "twitter", "cheese", "chocolate", "cookie", "flower", "purple", "orange",
+    "yellow", "silver", "golden", "diamond", "angel", "heaven", "jesus", "christ", "family", "friend",
+    "forever", "money", "tiger", "hunter", "killer", "ranger", "buster", "tigger", "pepper", "ginger",
+    "maggie", "charlie", "michael", "jessica", "ashley", "daniel", "thomas", "jordan", "andrew",
+    "joshua", "matthew", "robert", "william", "david", "james", "jennifer", "michelle", "nicole",
+    "amanda", "sarah", "anthony", "justin", "taylor", "harley", "hannah", "jasmine", "butterfly",
+    "liverpool", "chelsea", "arsenal", "barcelona", "qazwsx", "zaq1", "abcd", "test", "guest",
+    "user", "root", "pass", "mypass", "secure", "private", "office", "school", "company",
+)
+
+
+def fold(text: str) -> str:
+    """The form passwords and dictionary words are compared in (normalize.fold + LEET)."""
+    return normalize.fold(text).translate(LEET)
+
+
+class WordAutomaton:
+    """
+    Aho-Corasick automaton over folded text, in CSR arrays. Build one with build_automaton or read_automaton.
+
+    The edges of node n are chars[starts[n]:starts[n + 1]] (sorted) leading to
+    targets[starts[n]:starts[n + 1]], fail[n] is its failure link and accepting[n] is 1 when a
+    word ends at n (or at a suffix of it). ranks[n] is the rank (1 = most common) of the word
+    spelled by the path to n, 0 if none. Node 0 is the root.
+    """
+
+    def __init__(self, chars: str, starts: array, targets: array, fail: array, accepting: bytes, ranks: array):
+        self.chars = chars
+        self.starts = starts
+        self.targets = targets
+        self.fail = fail
+        self.accepting = accepting
+        self.ranks = ranks
+        self.memo = [None] * len(fail)  # node -> {character: next node}, filled as transitions are taken
+        self._fingerprint = None
+
+    def __len__(self):
+        return len(self.fail)
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the word list as compiled, the same for the same words wherever it was built."""
+        if self._fingerprint is None:
+            import hashlib
+            digest = hashlib.sha256(self.chars.encode("utf-8", "surrogatepass"))
+            for table in (self.starts, self.targets, self.ranks):
+                digest.update(table.tobytes())
+            self._fingerprint = digest.hexdigest()[:16]
+        return self._fingerprint
+
+    def step(self, state: int, ch: str) -> int:
+        """
+        The node after reading one character of normalize.fold(text) in node state. LEET is applied
+        here, and memoized with the transition, so callers skip a translate pass over the text.
+        """
+        table = self.memo[state]
+        if table is None:
+            table = self.memo[state] = {}
+        nxt = table.get(ch)
+        if nxt is None:
+            nxt = _step(self.chars, self.starts, self.targets, self.fail, state, _LEET_CHARS.get(ch, ch))
+            if len(table) < MEMO_LIMIT:
+                table[ch] = nxt
+        return nxt
+
+
+def build_automaton(words, min_length: int = MIN_LENGTH) -> WordAutomaton:
+    """
+    Compile words into a WordAutomaton.
+
+    Args:
+        words: Iterable of words (any case, leetspeak allowed, they are folded).
+        min_length (int): Skip words shorter than this once folded.
+    """
+    goto = [{}]
+    ends = [0]  # node -> rank of the word ending there
+    rank = 0
+    for word in words:
+        word = fold(word.strip())
+        if len(word) < min_length:
+            continue
+        node = 0
+        for ch in word:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = goto[node][ch] = len(goto)
+                goto.append({})
+                ends.append(0)
+            node = nxt
+        if not ends[node]:  # a repeat (eg. the same word folded) keeps its first, better rank
+            rank += 1
+            ends[node] = rank
+
+    # number the nodes breadth first, so every node's edges are one contiguous slice
+    order = [0]
+    number = {0: 0}
+    for node in order:
+        for ch in sorted(goto[node]):
+            number[goto[node][ch]] = len(order)
+            order.append(goto[node][ch])
+
+    chars = []
+    starts = array("I", [0])
+    targets = array("I")
+    for node in order:
+        for ch in sorted(goto[node]):
+            chars.append(ch)
+            targets.append(number[goto[node][ch]])
+        starts.append(len(targets))
+    chars = "".join(chars)
+
+    fail = array("I", bytes(4 * len(order)))
+    ranks = array("I", (ends[node] for node in order))
+    accepting = bytearray(1 if rank else 0 for rank in ranks)
+    queue = deque(targets[starts[0]:starts[1]])  # the root's children fail to the root
+    while queue:  # breadth first, a node's failure link is always complete before its children need it
+        node = queue.popleft()
+        accepting[node] |= accepting[fail[node]]
+        for i in range(starts[node], starts[node + 1]):
+            child = targets[i]
+            fail[child] = _step(chars, starts, targets, fail, fail[node], chars[i])
+            queue.append(child)
+    return WordAutomaton(chars, starts, targets, fail, bytes(accepting), ranks)
+
+
+def _step(chars, starts, targets, fail, state: int, ch: str) -> int:
+    while True:
+        i = chars.find(ch, starts[state], starts[state + 1])
+        if i >= 0:
+            return targets[i]
+        if not state:
+            return 0
+        state = fail[state]
+
+
+def write_automaton(automaton: WordAutomaton, path: str):
+    """
+    Save an automaton from build_automaton.
+
+    Layout (little-endian uint32 arrays):
+        magic "PSCDICT2" | nodes | edges | starts[nodes + 1] | targets[edges] | fail[nodes]
+        | ranks[nodes] | accepting[nodes] (bytes) | chars[edges] (UTF-32-LE)
+    """
+    header = array("I", [len(automaton), len(automaton.targets)])
+    parts = [header, automaton.starts, automaton.targets, automaton.fail, automaton.ranks]
+    if sys.byteorder != "little":
+        parts = [array("I", part) for part in parts]
+        for part in parts:
+            part.byteswap()
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC)
+        for part in parts:
+            f.write(part.tobytes())
+        f.write(automaton.accepting)
+        f.write(automaton.chars.encode("utf-32-le"))
+    os.replace(tmp_path, path)
+
+
+def read_automaton(path: str) -> WordAutomaton:
+    """Load a file written by write_automaton. Raises ValueError when it is not one."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"{path} is not a dictionary automaton (files from older versions need a rebuild)")
+    pos = len(MAGIC)
+
+    def take(count: int) -> array:
+        nonlocal pos
+        part = array("I")
+        part.frombytes(data[pos:pos + 4 * count])
+        if sys.byteorder != "little":
+            part.byteswap()
+        pos += 4 * count
+        return part
+
+    nodes, edges = take(2)
+    starts, targets, fail, ranks = take(nodes + 1), take(edges), take(nodes), take(nodes)
+    accepting = data[pos:pos + nodes]
+    chars = data[pos + nodes:].decode("utf-32-le")
+    if len(chars) != edges or len(accepting) != nodes:
+        raise ValueError(f"{path} is truncated")
+    return WordAutomaton(chars, starts, targets, fail, accepting, ranks)
+
+
+_automaton = None
+_lock = threading.Lock()
+
+
+def load_dictionary(path: str = None) -> WordAutomaton:
+    """
+    Load the automaton now: the prebuilt file if there is one, else the built-in COMMON_WORDS.
+
+    Nothing is loaded at import time, the first lookup does it. Incremental evaluators hold
+    automaton states, start new ones after loading a different dictionary. Thread-safe.
+    """
+    with _lock:
+        return _load(path)
+
+
+def _load(path: str = None) -> WordAutomaton:
+    # caller holds _lock
+    global _automaton
+    path = path or dictionary_file
+    _automaton = read_automaton(path) if os.path.exists(path) else build_automaton(COMMON_WORDS)
+    return _automaton
+
+
+def get_automaton() -> WordAutomaton:
+    """The loaded automaton, loading it on first use."""
+    return _automaton or _loaded_automaton()
+
+
+def _loaded_automaton():
+    # checked again under the lock, so threads racing on the first lookup load the dictionary only once
+    with _lock:
+        return _automaton if _automaton is not None else _load()
+
+
+def has_dictionary_word(password: str, automaton: WordAutomaton = None) -> bool:
+    """Whether a dictionary word appears anywhere in the password, after folding (see fold)."""
+    automaton = automaton or _automaton or _loaded_automaton()
+    memo, accepting, step = automaton.memo, automaton.accepting, automaton.step
+    state = 0
+    for ch in normalize.fold(password):  # the transitions apply LEET (see WordAutomaton.step)
+        table = memo[state]  # WordAutomaton.step inlined for the memoized case
+        nxt = table.get(ch) if table is not None else None
+        state = step(state, ch) if nxt is None else nxt
+        if accepting[state]:
+            return True
+    return False
+
+
+def find_words(password: str, automaton: WordAutomaton = None) -> list:
+    """
+    Every dictionary word in the password, as (start, end, rank) with password[start:end] the match.
+
+    Walks the trie from each position, so the cost is the password length times the longest
+    word walked, not the number of words.
+    """
+    automaton = automaton or _automaton or _loaded_automaton()
+    chars, starts, targets, ranks = automaton.chars, automaton.starts, automaton.targets, automaton.ranks
+    folded = fold(password)
+    found = []
+    for i in range(len(folded)):
+        node = 0
+        for j in range(i, len(folded)):
+            k = chars.find(folded[j], starts[node], starts[node + 1])
+            if k < 0:
+                break
+            node = targets[k]
+            if ranks[node]:
+                found.append((i, j + 1, ranks[node]))
+    if found and not password.isascii():
+        # folding can make characters longer (eg. ß -> ss) or drop them (accents), map back;
+        # only done for passwords with a match, most non-ASCII ones have none
+        owner = [i for i, ch in enumerate(password) for _ in normalize.fold_char(ch)]
+        found = [(owner[start], owner[end - 1] + 1, rank) for start, end, rank in found]
+    return found
+
+
+# Automaton state before the first character; FOUND once a word has matched (it stays found)
+WORD_START = 0
+WORD_FOUND = -1
+
+
+def advance_word(state: int, ch: str, automaton: WordAutomaton = None) -> int:
+    """
+    Feed one more character to the word scan, for callers that see the password a character at a time.
+
+    Starting from WORD_START, the state after the last character is WORD_FOUND exactly when
+    has_dictionary_word is True for the whole text.
+    """
+    if state == WORD_FOUND:
+        return state
+    automaton = automaton or _automaton or _loaded_automaton()
+    for folded in normalize.fold_char(ch):  # none for a combining mark, several for eg. ß -> ss
+        state = automaton.step(state, folded)
+        if automaton.accepting[state]:
+            return WORD_FOUND
+    return state
+
+
+def _read_words(paths):
+    yield from COMMON_WORDS
+    for path in paths:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            yield from f
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the dictionary automaton used by the dictionary word check.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="compile word lists (plus the built-in words) into a file")
+    build_parser.add_argument("inputs", nargs="*", help="word lists, one entry per line")
+    build_parser.add_argument("-o", "--output", default=dictionary_file, help="default resources/dictionary.trie")
+    build_parser.add_argument("--min-length", type=int, default=MIN_LENGTH, help="skip shorter entries")
+    args = parser.parse_args(argv)
+
+    automaton = build_automaton(_read_words(args.inputs), args.min_length)
+    write_automaton(automaton, args.output)
+    print(f"wrote {len(automaton)} nodes ({sum(automaton.accepting)} accepting) to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
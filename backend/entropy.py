@@ -15,9 +15,25 @@ def shannon_entropy(password: str) -> float:
         return 0.0
     
     # Count frequency of each character
-    char_counts = Counter(password)
-    length = len(password)
-    
+    return entropy_from_counts(Counter(password), len(password))
+
+
+def entropy_from_counts(char_counts, length: int) -> float:
+    """
+    Shannon entropy in bits from already counted characters.
+
+    Lets callers that already built a Counter for the password (eg. evaluate_many) skip a second pass.
+
+    Args:
+        char_counts: Mapping of character -> number of occurrences.
+        length (int): Length of the password the counts come from.
+
+    Returns:
+        float: Shannon entropy value in bits, same as shannon_entropy(password).
+    """
+    if not length:
+        return 0.0
+
     # Shannon entropy formula: H = -Σ p(x) * log2(p(x))
     entropy = 0.0
     for count in char_counts.values():
@@ -1,88 +1,379 @@
-from patterns import check_patterns 
-from entropy import shannon_entropy 
-from blacklist import is_common_password 
+from array import array
+from collections import Counter
+from collections.abc import Mapping
+from time import perf_counter
 
-def evaluate_password(password:str) -> dict:
-    results = {}
+import instrumentation
+from patterns import pattern_mask, pattern_labels
+from entropy import entropy_from_counts
+from blacklist import is_common_password
+from guesses import guesses_log10, common_guesses
+from charclass import class_mask, HAS_SPACE, HAS_NON_ASCII, HAS_EMOJI
+from normalize import fold, skeleton
+# flags and labels live with the scoring policy, they are re-exported here for existing callers
+from policy import current_policy, HAS_UPPER, HAS_LOWER, HAS_DIGIT, HAS_SYMBOL, IS_COMMON, TRUNCATED, STRENGTH_LABELS
 
-    #Standard paramaters
+
+def composition_flags(password: str) -> int:
+    """
+    Character classes of a password: a table lookup per distinct character (see charclass.py).
+
+    Args:
+        password (str): The password string to evaluate.
+
+    Returns:
+        int: HAS_UPPER | HAS_LOWER | HAS_DIGIT | HAS_SYMBOL | HAS_SPACE | HAS_NON_ASCII | HAS_EMOJI bits for the classes present.
+    """
+    return class_mask(set(password))
+
+
+def _analyze(password: str, max_length: int = None, remote: bool = True):
+    """
+    Shared core of evaluate_password and evaluate_many: (length, flags, pattern bitmask, entropy, log10 guesses).
+    remote=False keeps the blacklist check to the local lists (see blacklist.is_common_password).
+
+    Only the first max_length characters are analysed (all when None), so a pasted multi-megabyte
+    string costs no more than max_length characters. length is still the full length, and the
+    TRUNCATED flag is set. A truncated password is never blacklisted: the lists hold whole
+    passwords, and a prefix match would flag "password" followed by a novel.
+    """
     length = len(password)
-    results["password"] = password
-    results["length"] = length
-
-    #More standard parameters
-    has_upper = any(c.isupper() for c in password)  #any keyword returns true if even a single paramater is true,  eg any[true,false,false, ... ] returns true 
-    has_lower = any(c.islower() for c in password)
-    has_digit = any(c.isdigit() for c in password)
-    has_symbol = any(not c.isalnum() for c in password)
-
-    results["has_upper"] = has_upper
-    results["has_lower"] = has_lower
-    results["has_digit"] = has_digit
-    results["has_symbol"] = has_symbol
-
-    # Blacklist check
-    is_common = is_common_password(password)
-    results["is_common"] = is_common
-
-    # Pattern detection check
-    patterns_detected = check_patterns(password)
-    results["patterns"] = patterns_detected
-
-    # Entropy calculation
-    entropy_value = shannon_entropy(password)
-    results["entropy"] = entropy_value
-
-    # Scoring the password on above characterestics
-    score = 0
-
-    # Length score
-    if length >= 11:
-        score += 30
-    elif length >= 7:
-        score += 20
-    else:
-        score += 5
-
-    # Character variety score
-    if has_upper:
-        score += 15
-    if has_lower:
-        score += 15
-    if has_digit:
-        score += 15
-    if has_symbol:
-        score += 15
-
-    # Entropy score
-    if entropy_value > 60:
-        score += 20
-    elif entropy_value > 40:
-        score += 10
+    if max_length is not None and length > max_length:
+        password = password[:max_length]
+        counts = Counter(password)
+        flags = class_mask(counts) | TRUNCATED
     else:
-        score += 5
-
-    # Penalties
-    if is_common:
-        score -= 40
-    if len(patterns_detected) > 0:
-        score -= 20
-
-    # Keep score in range
-    score = max(0, min(score, 100))
-    results["score"] = score
-
-    # Strength label
-    if score >= 80:
-        results["strength"] = "Strong"
-    elif score >= 50:
-        results["strength"] = "Medium"
-        results["strength"] = "Medium"
+        counts = Counter(password)  # one pass, shared by the composition and entropy checks
+        flags = class_mask(counts)
+        if is_common_password(password, remote):
+            flags |= IS_COMMON
+    patterns = pattern_mask(password)
+    guesses = guesses_log10(password, patterns, common_guesses() if flags & IS_COMMON else None)
+    return length, flags, patterns, entropy_from_counts(counts, len(password)), guesses
+
+
+def _analyze_timed(password: str, max_length: int = None, remote: bool = True):
+    """_analyze, recording the time of each stage in instrumentation.collector."""
+    t0 = perf_counter()
+    length = len(password)
+    truncated = max_length is not None and length > max_length
+    if truncated:
+        password = password[:max_length]
+    counts = Counter(password)
+    flags = class_mask(counts)
+    t1 = perf_counter()
+    # the checks below normalize the password themselves; done here first, they find it cached
+    skeleton(password)
+    fold(password)
+    t2 = perf_counter()
+    if truncated:
+        flags |= TRUNCATED
+    elif is_common_password(password, remote):
+        flags |= IS_COMMON
+    t3 = perf_counter()
+    patterns = pattern_mask(password)
+    t4 = perf_counter()
+    entropy_value = entropy_from_counts(counts, len(password))
+    t5 = perf_counter()
+    guesses = guesses_log10(password, patterns, common_guesses() if flags & IS_COMMON else None)
+    t6 = perf_counter()
+    instrumentation.collector.record_analysis((t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t6 - t5),
+                                              flags & IS_COMMON, patterns)
+    return length, flags, patterns, entropy_value, guesses
+
+
+def score_password(length: int, flags: int, entropy_value: float, patterns: int, policy=None) -> int:
+    """Score a password (0-100) from its length, composition/blacklist flags, entropy and pattern bitmask."""
+    return (policy or current_policy()).score(length, flags, entropy_value, patterns)
+
+
+def strength_code(score: int, policy=None) -> int:
+    """Index into STRENGTH_LABELS for a score."""
+    return (policy or current_policy()).strength_code(score)
+
+
+def classify_password(password: str, policy=None) -> int:
+    """
+    Strength code (index into STRENGTH_LABELS) of a password, skipping the stages that can't change it.
+
+    The length, composition and blacklist checks run first. Entropy and the pattern scan only
+    run when the policy's remaining points could still move the password to another label,
+    eg. a 4 digit PIN is Weak whatever its entropy and patterns. Passwords longer than the
+    policy's max_length are classified on their prefix, like evaluate_password does.
+    """
+    policy = policy or current_policy()
+    length = len(password)
+    max_length = policy.max_length
+    if max_length is not None and length > max_length:
+        password = password[:max_length]
+        counts = Counter(password)
+        flags = class_mask(counts) | TRUNCATED
     else:
-        results["strength"] = "Weak"
+        counts = Counter(password)
+        flags = class_mask(counts)
+        if is_common_password(password):
+            flags |= IS_COMMON
+    partial = policy.partial_score(length, flags)
+    code = policy.pinned_code(partial, flags, entropy_known=False)
+    if code is not None:
+        return code
+    entropy_value = entropy_from_counts(counts, len(password))
+    code = policy.pinned_code(partial + policy.entropy_points(entropy_value), flags, entropy_known=True)
+    if code is not None:
+        return code
+    return policy.strength_code(policy.score(length, flags, entropy_value, pattern_mask(password)))
+
+
+def evaluate_password(password:str, policy=None) -> "PasswordResult":
+    """
+    Evaluate one password: composition, blacklist, patterns, entropy, guess estimate and score.
+
+    Args:
+        password (str): The password string to evaluate.
+        policy (Policy): Scoring policy, the current default when None.
+
+    Returns:
+        PasswordResult: Read-only record with the keys of RESULT_KEYS (length, has_upper, ...,
+        patterns, entropy, guesses_log10, score, strength). The password itself is not kept.
+    """
+    policy = policy or current_policy()
+    if instrumentation.enabled:
+        return _evaluate_timed(password, policy)
+    return make_result(*_analyze(password, policy.max_length), policy)
+
+
+def _evaluate_timed(password: str, policy) -> "PasswordResult":
+    parts = _analyze_timed(password, policy.max_length)
+    start = perf_counter()
+    result = make_result(*parts, policy)
+    instrumentation.collector.record_scoring(perf_counter() - start)
+    return result
+
+
+def _timed_scoring(score_of):
+    """Wrap a scoring function so its time is recorded as the scoring stage (used by evaluate_many)."""
+    def score(length, flags, entropy_value, patterns):
+        start = perf_counter()
+        result = score_of(length, flags, entropy_value, patterns)
+        instrumentation.collector.record_scoring(perf_counter() - start)
+        return result
+    return score
+
+
+def make_result(length: int, flags: int, patterns: int, entropy_value: float, guesses: float,
+                policy=None) -> "PasswordResult":
+    """Score the analysed parts and build the result (shared with the batch and incremental evaluators)."""
+    policy = policy or current_policy()
+    score = policy.score(length, flags, entropy_value, patterns)
+    return PasswordResult(length, flags, patterns, entropy_value, guesses, score, policy.strength_code(score))
+
+
+class PasswordResult(Mapping):
+    """
+    Result of evaluate_password: a small read-only record that reads like the result dict.
+
+    result["score"], result.get("patterns"), dict(result) and json.dumps(result.as_dict()) all see
+    the usual keys (RESULT_KEYS). The record itself only holds seven numbers; the booleans, the
+    pattern labels and the strength label are derived from the bit fields when asked for, which
+    makes it several times smaller than the dict it replaces (see benchmarks/bench_memory.py). The
+    password itself is never stored. Caches hand the same record to every caller, don't assign to it.
+
+    Attributes:
+        length (int): Length of the password (the full length, also when truncated).
+        flags (int): HAS_* / IS_COMMON / TRUNCATED bits.
+        pattern_mask (int): Bitmask of the detected patterns, see patterns.py.
+        entropy (float): Shannon entropy in bits.
+        guesses_log10 (float): log10 of the estimated guesses, see guesses.py.
+        score (int): 0-100.
+        strength_code (int): Index into STRENGTH_LABELS.
+    """
+
+    __slots__ = ("length", "flags", "pattern_mask", "entropy", "guesses_log10", "score", "strength_code")
+
+    def __init__(self, length: int, flags: int, pattern_mask: int, entropy: float, guesses_log10: float,
+                 score: int, strength_code: int):
+        self.length = length
+        self.flags = flags
+        self.pattern_mask = pattern_mask
+        self.entropy = entropy
+        self.guesses_log10 = guesses_log10
+        self.score = score
+        self.strength_code = strength_code
+
+    def __reduce__(self):
+        return PasswordResult, tuple(getattr(self, field) for field in self.__slots__)
+
+    @property
+    def truncated(self) -> bool:
+        """Only the policy's max_length first characters were analysed."""
+        return bool(self.flags & TRUNCATED)
+
+    @property
+    def has_upper(self) -> bool:
+        return bool(self.flags & HAS_UPPER)
+
+    @property
+    def has_lower(self) -> bool:
+        return bool(self.flags & HAS_LOWER)
+
+    @property
+    def has_digit(self) -> bool:
+        return bool(self.flags & HAS_DIGIT)
+
+    @property
+    def has_symbol(self) -> bool:
+        return bool(self.flags & HAS_SYMBOL)
+
+    @property
+    def has_space(self) -> bool:
+        return bool(self.flags & HAS_SPACE)
+
+    @property
+    def has_non_ascii(self) -> bool:
+        return bool(self.flags & HAS_NON_ASCII)
+
+    @property
+    def has_emoji(self) -> bool:
+        return bool(self.flags & HAS_EMOJI)
+
+    @property
+    def is_common(self) -> bool:
+        return bool(self.flags & IS_COMMON)
+
+    @property
+    def patterns(self) -> list:
+        """Labels of the detected patterns (a new list on every access)."""
+        return pattern_labels(self.pattern_mask)
+
+    @property
+    def strength(self) -> str:
+        return STRENGTH_LABELS[self.strength_code]
+
+    def __getitem__(self, key: str):
+        if key not in _RESULT_KEY_SET:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self):
+        return iter(RESULT_KEYS)
+
+    def __len__(self):
+        return len(RESULT_KEYS)
+
+    def as_dict(self) -> dict:
+        """The result as a plain dict, eg. for json.dumps."""
+        return {key: getattr(self, key) for key in RESULT_KEYS}
+
+    def __repr__(self):
+        return f"PasswordResult({self.as_dict()!r})"
+
+
+# The keys of a result, in the order the result dicts always had (the finer character classes came later)
+RESULT_KEYS = ("length", "truncated", "has_upper", "has_lower", "has_digit", "has_symbol", "has_space",
+               "has_non_ascii", "has_emoji", "is_common", "patterns", "entropy", "guesses_log10", "score", "strength")
+_RESULT_KEY_SET = frozenset(RESULT_KEYS)
+
+
+class ResultTable:
+    """
+    Columnar results of evaluate_many, one entry per password in input order.
+
+    Every column is a compact array instead of an object per password:
+    length, score, strength (codes into STRENGTH_LABELS), entropy,
+    guesses (log10 guess estimates), flags (HAS_* / IS_COMMON / TRUNCATED bits) and patterns (bitmask from patterns.py).
+    policy is the Policy the scores were computed with. table[i] (or table.row(i)) is row i as a
+    PasswordResult, and iterating yields every row.
+    """
+
+    def __init__(self, policy=None):
+        self.policy = policy or current_policy()
+        self.length = array("L")
+        self.score = array("B")
+        self.strength = array("B")
+        self.entropy = array("d")
+        self.guesses = array("d")
+        self.flags = array("H")
+        self.patterns = array("B")
+
+    def __len__(self):
+        return len(self.score)
+
+    def _columns(self):
+        return self.length, self.score, self.strength, self.entropy, self.guesses, self.flags, self.patterns
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers."""
+        return sum(len(column) * column.itemsize for column in self._columns())
+
+    def append(self, result: PasswordResult):
+        """Add one row, eg. a result from evaluate_password."""
+        self.length.append(result.length)
+        self.score.append(result.score)
+        self.strength.append(result.strength_code)
+        self.entropy.append(result.entropy)
+        self.guesses.append(result.guesses_log10)
+        self.flags.append(result.flags)
+        self.patterns.append(result.pattern_mask)
+
+    def extend(self, other: "ResultTable"):
+        """Append all rows of another ResultTable (eg. a chunk scored elsewhere)."""
+        for column, more in zip(self._columns(), other._columns()):
+            column.extend(more)
+
+    def row(self, i: int) -> PasswordResult:
+        """Row i, the same as evaluate_password returns for that password."""
+        return PasswordResult(self.length[i], self.flags[i], self.patterns[i], self.entropy[i], self.guesses[i],
+                              self.score[i], self.strength[i])
+
+    __getitem__ = row
+
+    def __iter__(self):
+        for row in zip(self.length, self.flags, self.patterns, self.entropy, self.guesses, self.score, self.strength):
+            yield PasswordResult(*row)
+
+
+# The name evaluate_many's result had before rows became records
+BatchResult = ResultTable
+
+
+def evaluate_many(passwords, policy=None, remote: bool = True) -> ResultTable:
+    """
+    Evaluate an iterable (or list) of passwords in one call.
+
+    Scores are identical to calling evaluate_password on each password, but no object is
+    built per password and the results come back as one ResultTable of columns.
+
+    Args:
+        passwords: Any iterable of password strings, eg. a list or an open file's lines (already stripped).
+        policy (Policy): Scoring policy, the current default when None.
+        remote (bool): False checks the blacklist's local lists only, never the range server set with
+            blacklist.set_remote, eg. for generated candidates nobody typed (one round trip each otherwise).
+
+    Returns:
+        ResultTable: Columnar results in input order.
+    """
+    out = ResultTable(policy)
 
-    return results
+    # local names, this loop runs millions of times
+    length_col, score_col, strength_col = out.length.append, out.score.append, out.strength.append
+    entropy_col, flags_col, patterns_col = out.entropy.append, out.flags.append, out.patterns.append
+    guesses_col = out.guesses.append
+    analyze, score_of, code_of = _analyze, out.policy.score, out.policy.strength_code
+    max_length = out.policy.max_length
+    if instrumentation.enabled:
+        analyze, score_of = _analyze_timed, _timed_scoring(score_of)
 
+    for password in passwords:
+        length, flags, patterns, entropy_value, guesses = analyze(password, max_length, remote)
+        score = score_of(length, flags, entropy_value, patterns)
 
+        length_col(length)
+        score_col(score)
+        strength_col(code_of(score))
+        entropy_col(entropy_value)
+        guesses_col(guesses)
+        flags_col(flags)
+        patterns_col(patterns)
 
-    
+    return out
@@ -0,0 +1,400 @@
+"""
+Password and passphrase generator, and stronger variants of a password the user typed.
+
+Candidates come from secrets (the operating system's CSPRNG) and are only handed out when the
+checker agrees they are strong: at least the policy's Strong score (or min_score), not
+blacklisted, no repetition, sequence or keyboard pattern, and for random passwords no embedded
+dictionary word either. Passwords are drawn uniformly over the whole alphabet and dropped when
+a required character class is missing, which keeps every valid password equally likely (placing
+one character of each class first would not).
+
+Rejection is made cheap: random bytes are drawn for a whole batch at once and turned into
+characters with one bytes.translate (the bytes that would bias the choice are deleted in the
+same call), candidates missing a class are dropped before any evaluation (a set and a table
+lookup), and the rest are scored together with evaluate_many, whose pattern and blacklist
+columns give the other verdicts without running those checks twice. See benchmarks/bench_generator.py.
+Candidates are checked against the local blacklist only: with a range server set (the GUI's
+PASSWORD_RANGE_URL) every candidate would cost a round trip and send a hash prefix of a string
+nobody typed.
+
+suggest_edits goes the other way: starting from the user's password it tries random single
+edits (a character of a missing class added, a character inside a detected pattern replaced),
+keeps the best few and edits those again, until some variants reach the target score. The
+variants with the fewest edits are returned. Variants are checked against the local blacklist
+only too, the password the user typed is the only one looked up remotely.
+
+    from generator import generate_password, generate_passphrase, suggest_edits
+    generate_password()            # 16 characters, all four classes
+    generate_passphrase()          # eg. "Maple-otter-crisp-ledger7-banjo-quilt"
+    suggest_edits("summer2024")    # [{"password": "summ#er2024", "edits": [...], ...}, ...]
+
+Command line, from the backend folder:
+    python generator.py [-n COUNT] [--length N] [--passphrase [--words N]]
+"""
+import math
+import secrets
+import string
+import sys
+from collections import Counter
+from functools import lru_cache
+
+from charclass import class_mask, HAS_UPPER, HAS_LOWER, HAS_DIGIT, HAS_SYMBOL
+from evaluator import evaluate_many
+from guesses import estimate, BRUTEFORCE
+from patterns import DICTIONARY_WORD
+from policy import current_policy, IS_COMMON
+
+DEFAULT_LENGTH = 16
+# Symbols that are on most keyboard layouts and need no escaping in URLs or CSV
+SYMBOLS = "!#$%*+-=?@^_~"
+CLASS_ALPHABETS = {
+    "upper": string.ascii_uppercase,
+    "lower": string.ascii_lowercase,
+    "digit": string.digits,
+    "symbol": SYMBOLS,
+}
+_CLASS_BITS = {"upper": HAS_UPPER, "lower": HAS_LOWER, "digit": HAS_DIGIT, "symbol": HAS_SYMBOL}
+DEFAULT_CLASSES = ("upper", "lower", "digit", "symbol")
+
+PASSPHRASE_BITS = 60  # the default number of words is the fewest with at least this much entropy
+MAX_ATTEMPTS = 1000   # candidates drawn per requested result before giving up
+BEAM_WIDTH = 8        # variants suggest_edits keeps editing after each round
+
+# Short, common, unambiguous words (no homophones or offensive words), about 10 bits each
+PASSPHRASE_WORDS = tuple("""
+    able acid acorn acre actor adobe after agent agile aging ahead aisle alarm album alert alley almond aloe
+    alpha amber ample angle ankle anvil apple apron aqua arbor arch arena argue armor army aroma arrow art ash
+    aspen atlas atom attic audio aunt autumn avenue award awake axle bacon badge bagel baker balmy bamboo banjo
+    bank barge barn barrel basil basin basket batch bath beach beam bean beard beast bed beech beef beetle bell
+    belt bench berry bike bingo birch bird bison black blade blank blaze blend blimp blink bloom blouse blue
+    bluff blunt blush board boat body boil bolt bond bone bonus book boost booth boots bottle bound bowl box
+    brain brake branch brass brave bread brick bride brief brisk broad broom brown brush bubble bucket buddy
+    budget buffalo bugle bulb bunch bundle bunny burger bus bush butter button buzz cabin cable cactus cafe cage
+    cake calm camel camera camp canal candle candy canoe canvas canyon cape card cargo carol carpet carrot cart
+    case cash castle cat cave cedar cell cello chain chair chalk charm chart chase cheek chef cherry chess chest
+    chick chief child chili chime chip chord cider cinema circle city civic clam clamp clasp class claw clay
+    clean clerk click cliff climb cloak clock cloth cloud clover clown club coach coal coast coat cobalt cocoa
+    code coffee coin cold comet comic coral cord corn cotton couch cougar cover cow coyote crab craft crane
+    crate crater crayon cream creek crest crew crib cricket crisp crop cross crowd crown crumb crust cube cubic
+    cup curly curve cycle daisy dance dawn deck deer delta denim depot desert desk dial diary diet dime diner
+    dish dock dodge dog doll dolphin dome domino donkey donut door dot dough dove dozen draft drama drawer dream
+    dress drift drill drink drum duck dune dust eagle earth easel east echo edge eel egg elbow elder elk elm
+    ember emblem empty engine entry envoy epic equal era errand essay ever exit extra fabric face fact fair
+    fairy falcon fame fancy fang farm fawn feast feather fence fern ferry fever fiber fiddle field fig film
+    finch fire firm fish flag flame flash flask fleet flint float flock flood floor flour flute foam focus fog
+    folk font food forest fork form fort fossil fox frame frog frost fruit fudge fuel fun fur gadget gala galaxy
+    game gap garage garlic gate gauge gear gecko gem genre giant gift ginger giraffe glad glass glide globe
+    glove glow glue goat gold golf goose gorge gown grain grape graph grass gravel gravy great green grid grill
+    grin grove guard guava guide guitar gull gum gust habit hair hall halo ham hammer hand harbor hare harp hat
+    hawk hazel head heart heat hedge heel helmet hen herb hero heron hill hinge hippo hive hobby hog hole honey
+    hood hook hope horn hose hotel hound house hub hug hull hymn ice icicle icon idea igloo image inch index ink
+    inlet input iris iron island item ivory ivy jacket jade jaguar jam jar jazz jeans jelly jet jewel job jog
+    joke jolly journal judge juice jumbo jump jungle jury kale kayak kelp kettle key kid kilt kind king kiosk
+    kit kite kiwi knee knife knight knob knot koala label lace ladder lady lake lamb lamp lane lantern lap
+    laptop larch lark laser latch lava lawn layer leaf ledge lemon lens lentil level lever lid light lilac lily
+    lime linen lion lip list lizard llama loaf lobby lobster lock locust lodge loft log lotus loud lunar lunch
+    lynx lyric macaw magic magnet maid mail maize mango manor map maple marble march mask mast mat maze meadow
+    meal melon menu mercy merit mesa metal meter mild milk mill mimic mind mint mirror mist mitten mixer moat
+    model mole monk moon moose mop moss moth motor mound mouse mouth movie mud mug mule mural muse music nail
+    name napkin navy neck nectar needle nest net nickel night noble noise noodle north nose note novel nugget
+    number nurse nut nylon oak oar oasis oat ocean octave odor offer olive omelet onion onyx opal open opera
+    orbit orchid organ otter ounce outer oval oven owl owner oyster paddle page paint pair palace palm panda
+    panel panic pantry paper parade park parrot party pasta patch path patio pause peach peak peanut pear pearl
+    pebble pecan pedal pen pencil penny pepper perch piano pickle picnic pie pier pig pigeon pilot pine pink
+    pipe pirate pit pizza plain plane planet plank plant plate plaza plot plow plum plume pocket poem poet polar
+    pole polka pond pony pool poppy porch port pot potato pouch powder press prism prize prune puddle pulse pump
+    pumpkin pupil puppy purse puzzle quail quart queen quest quick quiet quill quilt quiz rabbit raccoon race
+    radar radio raft rail rain raisin rake ramp ranch raven razor reef relay relic remedy rhino rhyme ribbon
+    rice ridge rifle ring ripple river road robin rock rocket rod rodeo roof rook room root rope rose rover
+    royal ruby rug ruler rumor rust saddle safari saga sage sail salad salmon salt sand sandal satin sauce
+    sausage scale scarf scene school scoop scout scrap screen scroll seal season seat seed shade shadow shark
+    shed sheep shelf shell shield shirt shoe shore shrub sienna silk sink siren sketch ski skirt sky slate sled
+    sleeve slice slope sloth smile smoke snack snail snake snow soap sock sofa soil solar sonar song soup south
+    space spade spark spear spice spider spike spoon spray spruce squid stable stack staff stage stair stamp
+    star steam steel stem step stew stick stone stool storm story stove straw stream street string stripe stump
+    sugar suit summit sun swamp swan sweet swing syrup table taco tail talon tango tank tape target tart taxi
+    tea teacup tempo tender tennis tent terrace thorn thread throne thumb ticket tide tile timber toad toast
+    token tomato tonic tool tooth topaz torch tornado tortoise towel tower toy track trail train tray treaty
+    tree trend tribe trout truck trunk tulip tuna tunnel turkey turnip turtle tusk tuxedo twig twin umbra
+    unicorn union unit upper urban urn usage usher valley valve van vase vault velvet vendor venue verb verse
+    vessel vest vine violin visor vista vivid vocal voice volcano vote voyage wafer wagon waist walnut walrus
+    wand wasp watch water wave wax weasel web wedge whale wheat wheel whisk widget willow window wing wire
+    wizard wolf wombat wood wool word world worm wreath wren wrist yacht yak yard yarn year yeast yodel yogurt
+    yolk zebra zenith zero zinc zipper zone zoo
+""".split())
+
+
+class GenerationError(RuntimeError):
+    """No candidate reached the target within MAX_ATTEMPTS per result."""
+
+
+@lru_cache(maxsize=32)
+def _translation(alphabet: str):
+    """bytes.translate arguments mapping random bytes uniformly onto alphabet: (table, bytes to delete)."""
+    size = len(alphabet)
+    if not alphabet.isascii() or not 1 < size <= 256 or len(set(alphabet)) != size:
+        raise ValueError("the alphabet must be 2 to 256 distinct ASCII characters")
+    limit = 256 - 256 % size  # bytes from limit up would favour the first characters
+    table = bytes(ord(alphabet[b % size]) if b < limit else 0 for b in range(256))
+    return table, bytes(range(limit, 256))
+
+
+def random_string(alphabet: str, length: int) -> str:
+    """
+    length characters, each drawn uniformly from alphabet with secrets.
+
+    Args:
+        alphabet (str): 2 to 256 distinct ASCII characters.
+        length (int): Characters wanted.
+
+    Returns:
+        str: The random string.
+    """
+    table, delete = _translation(alphabet)
+    out = b""
+    while len(out) < length:
+        missing = length - len(out)
+        out += secrets.token_bytes(missing + missing // 4 + 16).translate(table, delete)
+    return out[:length].decode("ascii")
+
+
+def passphrase_words(wordlist=PASSPHRASE_WORDS, bits: int = PASSPHRASE_BITS) -> int:
+    """The fewest words drawn from wordlist that give at least bits of entropy."""
+    return math.ceil(bits / math.log2(len(wordlist)))
+
+
+class PasswordGenerator:
+    """
+    Generates passwords and passphrases that the checker scores at least min_score.
+
+    Args:
+        policy (Policy): Scoring policy, the current default when None.
+        min_score (int): Lowest acceptable score, the policy's Strong threshold when None.
+
+    Attributes:
+        stats (Counter): "candidates" drawn, "accepted", and rejected by each check:
+            "classes", "patterns", "common", "score".
+    """
+
+    def __init__(self, policy=None, min_score: int = None):
+        self.policy = policy or current_policy()
+        self.min_score = self.policy.strong_score if min_score is None else min_score
+        self.stats = Counter()
+
+    def passwords(self, count: int, length: int = DEFAULT_LENGTH, classes=DEFAULT_CLASSES) -> list:
+        """
+        count random passwords, every character uniform over the alphabet of classes.
+
+        Args:
+            count (int): Passwords wanted.
+            length (int): Characters per password.
+            classes: Names from CLASS_ALPHABETS; every password has at least one character of each.
+
+        Returns:
+            list: count password strings.
+
+        Raises:
+            ValueError: An unknown class, or a length at which no password can reach min_score.
+            GenerationError: Too many candidates were rejected.
+        """
+        unknown = set(classes) - CLASS_ALPHABETS.keys()
+        if unknown:
+            raise ValueError(f"unknown character classes: {', '.join(sorted(unknown))}")
+        alphabet = "".join(CLASS_ALPHABETS[name] for name in classes)
+        required = 0
+        for name in classes:
+            required |= _CLASS_BITS[name]
+        if length < len(classes) or self.policy.best_score(length, required) < self.min_score:
+            raise ValueError(f"{length} characters of {', '.join(classes)} can't score {self.min_score} "
+                             f"under the {self.policy.name!r} policy")
+
+        def draw(n):
+            chars = random_string(alphabet, n * length)
+            return [chars[i:i + length] for i in range(0, n * length, length)]
+
+        return self._generate(count, draw, required, allow_words=False)
+
+    def password(self, length: int = DEFAULT_LENGTH, classes=DEFAULT_CLASSES) -> str:
+        """One random password, see passwords."""
+        return self.passwords(1, length, classes)[0]
+
+    def passphrases(self, count: int, words: int = None, separator: str = "-", capitalize: bool = True,
+                    digit: bool = True, wordlist=PASSPHRASE_WORDS) -> list:
+        """
+        count passphrases of random words, eg. "Maple-otter-crisp-ledger7-banjo-quilt".
+
+        Args:
+            count (int): Passphrases wanted.
+            words (int): Words per passphrase, passphrase_words(wordlist) when None.
+            separator (str): Put between the words.
+            capitalize (bool): Capitalize one random word.
+            digit (bool): Append a random digit to one random word.
+            wordlist: Sequence of distinct words to draw from, PASSPHRASE_WORDS by default.
+
+        Returns:
+            list: count passphrase strings.
+
+        Raises:
+            GenerationError: Too many candidates were rejected (too few words for min_score).
+        """
+        words = words or passphrase_words(wordlist)
+
+        def one():
+            chosen = [secrets.choice(wordlist) for _ in range(words)]
+            if capitalize:
+                i = secrets.randbelow(words)
+                chosen[i] = chosen[i].capitalize()
+            if digit:
+                i = secrets.randbelow(words)
+                chosen[i] += str(secrets.randbelow(10))
+            return separator.join(chosen)
+
+        return self._generate(count, lambda n: [one() for _ in range(n)], 0, allow_words=True)
+
+    def passphrase(self, words: int = None, separator: str = "-", capitalize: bool = True, digit: bool = True,
+                   wordlist=PASSPHRASE_WORDS) -> str:
+        """One passphrase, see passphrases."""
+        return self.passphrases(1, words, separator, capitalize, digit, wordlist)[0]
+
+    def _generate(self, count: int, draw, required: int, allow_words: bool) -> list:
+        accepted = []
+        budget = count * MAX_ATTEMPTS
+        while len(accepted) < count:
+            missing = count - len(accepted)
+            batch = draw(min(missing + missing // 4 + 2, budget))
+            if not batch:
+                raise GenerationError(f"no candidate reached score {self.min_score} in {count * MAX_ATTEMPTS} tries")
+            budget -= len(batch)
+            accepted += self._accept(batch, required, allow_words)
+        return accepted[:count]
+
+    def _accept(self, candidates: list, required: int, allow_words: bool) -> list:
+        """The candidates that pass: class coverage first, then one evaluate_many for the rest."""
+        stats = self.stats
+        stats["candidates"] += len(candidates)
+        survivors = [c for c in candidates if class_mask(set(c)) & required == required]
+        stats["classes"] += len(candidates) - len(survivors)
+        table = evaluate_many(survivors, self.policy, remote=False)
+        forbidden = ~DICTIONARY_WORD if allow_words else -1
+        accepted = []
+        for candidate, score, flags, patterns in zip(survivors, table.score, table.flags, table.patterns):
+            if patterns & forbidden:
+                stats["patterns"] += 1
+            elif flags & IS_COMMON:
+                stats["common"] += 1
+            elif score < self.min_score:
+                stats["score"] += 1
+            else:
+                accepted.append(candidate)
+        stats["accepted"] += len(accepted)
+        return accepted
+
+
+def generate_password(length: int = DEFAULT_LENGTH, classes=DEFAULT_CLASSES, policy=None,
+                      min_score: int = None) -> str:
+    """A random password that scores Strong (or min_score), see PasswordGenerator.passwords."""
+    return PasswordGenerator(policy, min_score).password(length, classes)
+
+
+def generate_passphrase(words: int = None, separator: str = "-", policy=None, min_score: int = None) -> str:
+    """A random passphrase that scores Strong (or min_score), see PasswordGenerator.passphrases."""
+    return PasswordGenerator(policy, min_score).passphrase(words, separator)
+
+
+def _weak_spans(password: str) -> list:
+    """(start, end) of the pieces guesses.py found as patterns, words or repeats rather than random characters."""
+    return [(start, end) for start, end, _, kind in estimate(password)[1] if kind != BRUTEFORCE]
+
+
+def _random_edit(password: str, flags: int, spans: list):
+    """One random edit: (new password, description)."""
+    missing = [name for name in DEFAULT_CLASSES if not flags & _CLASS_BITS[name]]
+    ch = secrets.choice(CLASS_ALPHABETS[secrets.choice(missing or DEFAULT_CLASSES)])
+    edit = secrets.randbelow(3) if password else 2
+    if edit == 0 and spans:
+        start, end = secrets.choice(spans)
+        i = start + secrets.randbelow(end - start)
+        return password[:i] + ch + password[i + 1:], f"replace {password[i]!r} at position {i + 1} with {ch!r}"
+    if edit < 2:
+        i = secrets.randbelow(len(password) + 1)
+        return password[:i] + ch + password[i:], f"insert {ch!r} at position {i + 1}"
+    return password + ch, f"add {ch!r} at the end"
+
+
+def suggest_edits(password: str, target_score: int = None, policy=None, limit: int = 3, max_edits: int = 4,
+                  tries: int = 48) -> list:
+    """
+    Variants of password that reach target_score with as few edits as possible.
+
+    Each round makes tries random edits (see the module docstring) of the variants kept so far,
+    scores them all with evaluate_many and keeps the BEAM_WIDTH best; the first round with any
+    variant at the target ends the search.
+
+    Args:
+        password (str): The password as typed.
+        target_score (int): Score to reach, the policy's Strong threshold when None.
+        policy (Policy): Scoring policy, the current default when None.
+        limit (int): Suggestions wanted.
+        max_edits (int): Rounds (edits per suggestion) tried at most.
+        tries (int): Variants scored per round.
+
+    Returns:
+        list: Up to limit dicts {"password", "edits" (descriptions, in order), "score", "strength"},
+        highest score first. Empty when password already reaches the target or no variant did.
+    """
+    policy = policy or current_policy()
+    target = policy.strong_score if target_score is None else target_score
+    current = evaluate_many([password], policy).row(0)
+    if current.score >= target:
+        return []
+
+    beam = [(password, [], current.flags)]
+    seen = {password}
+    for _ in range(max_edits):
+        variants = []
+        per_variant = max(1, tries // len(beam))
+        for text, edits, flags in beam:
+            spans = _weak_spans(text)
+            for _ in range(per_variant):
+                new_text, description = _random_edit(text, flags, spans)
+                if new_text not in seen:
+                    seen.add(new_text)
+                    variants.append((new_text, edits + [description]))
+        ranked = sorted(zip(evaluate_many([text for text, _ in variants], policy, remote=False), variants),
+                        key=lambda item: -item[0].score)
+        found = [{"password": text, "edits": edits, "score": result.score, "strength": result.strength}
+                 for result, (text, edits) in ranked if result.score >= target]
+        if found:
+            return found[:limit]
+        beam = [(text, edits, result.flags) for result, (text, edits) in ranked[:BEAM_WIDTH]]
+        if not beam:
+            break
+    return []
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate passwords or passphrases that score Strong.")
+    parser.add_argument("-n", "--count", type=int, default=1, help="how many (default 1)")
+    parser.add_argument("--length", type=int, default=DEFAULT_LENGTH, help=f"password length (default {DEFAULT_LENGTH})")
+    parser.add_argument("--passphrase", action="store_true", help="words instead of random characters")
+    parser.add_argument("--words", type=int, help=f"words per passphrase (default {passphrase_words()})")
+    parser.add_argument("--min-score", type=int, help="lowest acceptable score (default: the policy's Strong threshold)")
+    args = parser.parse_args(argv)
+
+    generator = PasswordGenerator(min_score=args.min_score)
+    try:
+        if args.passphrase:
+            results = generator.passphrases(args.count, args.words)
+        else:
+            results = generator.passwords(args.count, args.length)
+    except (ValueError, GenerationError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    for result in results:
+        print(result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+"""
+Guess-number estimate: about how many guesses an attacker who knows the usual password habits
+needs, in the spirit of zxcvbn (Wheeler, "zxcvbn: Low-Budget Password Strength Estimation").
+
+Shannon entropy times length rates "aaaaaaaaBBBBBBBB1111" like a random 20 character string.
+Here the password is split into the matches the detectors find (dictionary words, repeats,
+sequences, keyboard walks, years, the whole password when it is blacklisted), with bruteforce
+for whatever is left, and the split that is cheapest to guess wins:
+
+    guesses = l! * product(guesses of the l pieces) + 10000 ** (l - 1)
+
+The l! and the additive term charge for not knowing how the pieces were put together. The best
+split is a dynamic program over positions: O(n * m) for n characters and m matches, because
+bruteforce pieces only ever start at the password start or right after a match. Past max_work
+steps the rest of the password is counted as bruteforce, so very long inputs cost a bounded time
+and the answer is still the same on every run (results are cached and compared across paths).
+
+The numbers get huge, everything is kept as log10.
+"""
+import math
+import re
+import time
+from functools import lru_cache
+
+from dictionary import LEET, find_words
+from normalize import skeleton
+from patterns import KEYBOARD_PATTERNS, REPETITION, SEQUENCE, KEYBOARD_PATTERN, DICTIONARY_WORD, pattern_mask
+
+BRUTEFORCE_CARDINALITY = 10           # guesses per bruteforced character, as in zxcvbn
+MIN_GUESSES_BEFORE_GROWING_SEQUENCE = 10000
+MIN_SUBMATCH_GUESSES_SINGLE_CHAR = 10
+MIN_SUBMATCH_GUESSES_MULTI_CHAR = 50
+MIN_YEAR_SPACE = 20
+REFERENCE_YEAR = time.localtime().tm_year  # read once, part of results_store's scoring context
+KEYBOARD_STARTING_POSITIONS = 94      # printable keys on a US layout
+KEYBOARD_AVERAGE_DEGREE = 4           # neighbours per key along a row walk
+UNKNOWN_LIST_GUESSES = 10 ** 5        # a blacklisted password when the list size is unknown (range server)
+DEFAULT_MAX_WORK = 4000               # dynamic program steps before the rest counts as bruteforce
+
+_LOG_BRUTEFORCE = math.log10(BRUTEFORCE_CARDINALITY)
+_LOG_GROWING = math.log10(MIN_GUESSES_BEFORE_GROWING_SEQUENCE)
+_LOG_MIN_SINGLE = math.log10(MIN_SUBMATCH_GUESSES_SINGLE_CHAR)
+_LOG_MIN_MULTI = math.log10(MIN_SUBMATCH_GUESSES_MULTI_CHAR)
+_YEAR = re.compile(r"19\d\d|20\d\d")
+_LEET_CHARS = {chr(c): t for c, t in LEET.items() if not chr(c).isalpha()}  # substitutes, not folded letters
+_OBVIOUS_STARTS = frozenset("aAzZ019")
+
+# Match kinds, as reported by estimate()
+BRUTEFORCE = "bruteforce"
+DICTIONARY = "dictionary"
+REPEAT = "repeat"
+SEQUENCE_MATCH = "sequence"
+KEYBOARD = "keyboard"
+YEAR = "year"
+BLACKLIST = "blacklist"
+
+
+_LOG_FACTORIALS = [0.0, 0.0]
+
+
+def _log_factorials(n: int) -> list:
+    """log10(l!) for l = 0..n at least, grown once and shared by every call."""
+    table = _LOG_FACTORIALS
+    while len(table) <= n:
+        table.append(table[-1] + math.log10(len(table)))
+    return table
+
+
+def _log_add(a: float, b: float) -> float:
+    """log10(10**a + 10**b) without leaving log space."""
+    if a < b:
+        a, b = b, a
+    return a + math.log10(1 + 10 ** (b - a))
+
+
+def _binomial(n: int, k: int) -> int:
+    result = 1
+    for i in range(1, k + 1):
+        result = result * (n - k + i) // i
+    return result
+
+
+def _case_variations(token: str) -> int:
+    """Ways of capitalizing the token's letters an attacker has to try (zxcvbn's uppercase variations)."""
+    upper = sum(1 for c in token if c.isupper())
+    if not upper:
+        return 1
+    lower = sum(1 for c in token if c.islower())
+    if not lower or (upper == 1 and (token[0].isupper() or token[-1].isupper())):
+        return 2  # all caps, or only the first or last letter
+    return sum(_binomial(upper + lower, i) for i in range(1, min(upper, lower) + 1))
+
+
+def _leet_variations(token: str) -> int:
+    variations = 1
+    lowered = token.casefold()
+    for sub in set(lowered) & _LEET_CHARS.keys():
+        subbed, unsubbed = lowered.count(sub), lowered.count(_LEET_CHARS[sub])
+        if not unsubbed:
+            variations *= 2  # every occurrence substituted
+        else:
+            variations *= sum(_binomial(subbed + unsubbed, i) for i in range(1, min(subbed, unsubbed) + 1))
+    return variations
+
+
+# Guesses of one match (log10), memoized: the same words and runs turn up in password after password
+
+@lru_cache(maxsize=4096)
+def _dictionary_guesses(token: str, rank: int) -> float:
+    return math.log10(rank * _case_variations(token) * _leet_variations(token))
+
+
+@lru_cache(maxsize=4096)
+def _keyboard_guesses(token: str) -> float:
+    # straight row walks: (length - 1) steps from any starting key in one of the average directions
+    walks = (len(token) - 1) * KEYBOARD_STARTING_POSITIONS * KEYBOARD_AVERAGE_DEGREE
+    return math.log10(walks * _case_variations(token))
+
+
+def _char_cardinality(ch: str) -> int:
+    if ch.isdigit():
+        return 10
+    if ch.isalpha():
+        return 26
+    return 33
+
+
+def _sequence_guesses(first: str, length: int, descending: bool) -> float:
+    if first in _OBVIOUS_STARTS:
+        base = 4
+    elif first.isdigit():
+        base = 10
+    else:
+        base = 26
+    return math.log10(base * length * (2 if descending else 1))
+
+
+def _year_guesses(year: int) -> float:
+    return math.log10(max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE))
+
+
+def find_matches(password: str, patterns: int = None, common_guesses: int = None) -> list:
+    """
+    Candidate matches as (start, end, log10 guesses, kind), password[start:end] being the match.
+
+    Args:
+        password (str): The password.
+        patterns (int): Its pattern_mask, detectors that found nothing there are skipped (computed when None).
+        common_guesses (int): Guesses for the whole password when it is blacklisted, None when it isn't.
+    """
+    if patterns is None:
+        patterns = pattern_mask(password)
+    n = len(password)
+    matches = []
+    if common_guesses:
+        matches.append((0, n, math.log10(common_guesses * _case_variations(password)), BLACKLIST))
+
+    if patterns & DICTIONARY_WORD:
+        for start, end, rank in find_words(password):
+            matches.append((start, end, _dictionary_guesses(password[start:end], rank), DICTIONARY))
+
+    # the pattern scanner looks at the skeleton (normalize.py), so do the run and keyboard detectors
+    # below, where positions line up with the password
+    shape = skeleton(password)
+    if len(shape) != n:
+        shape = password
+
+    if patterns & (REPETITION | SEQUENCE):
+        # maximal runs of one character, and of code points going up or down by one
+        run_start = up_start = down_start = 0
+        for k in range(1, n + 1):
+            step = ord(shape[k]) - ord(shape[k - 1]) if k < n else None
+            if step != 0:
+                if k - run_start >= 3:
+                    matches.append((run_start, k, math.log10(_char_cardinality(shape[run_start]) * (k - run_start)), REPEAT))
+                run_start = k
+            if step != 1:
+                if k - up_start >= 3:
+                    matches.append((up_start, k, _sequence_guesses(shape[up_start], k - up_start, False), SEQUENCE_MATCH))
+                up_start = k - 1 if k < n else k
+            if step != -1:
+                if k - down_start >= 3:
+                    matches.append((down_start, k, _sequence_guesses(shape[down_start], k - down_start, True), SEQUENCE_MATCH))
+                down_start = k - 1 if k < n else k
+
+    if patterns & KEYBOARD_PATTERN:
+        lowered = shape.lower()
+        if len(lowered) == n:  # positions only line up when lower() kept the length
+            for walk in KEYBOARD_PATTERNS:
+                start = lowered.find(walk)
+                while start >= 0:
+                    end = start + len(walk)
+                    matches.append((start, end, _keyboard_guesses(password[start:end]), KEYBOARD))
+                    start = lowered.find(walk, start + 1)
+
+    for year in _YEAR.finditer(password):
+        matches.append((year.start(), year.end(), _year_guesses(int(year.group())), YEAR))
+
+    # a piece of a longer password is at least a few guesses, whatever its kind
+    return [(start, end, max(guesses, _LOG_MIN_SINGLE if end - start == 1 else _LOG_MIN_MULTI), kind)
+            if end - start < n else (start, end, guesses, kind)
+            for start, end, guesses, kind in matches]
+
+
+def _bruteforce(length: int, whole: bool) -> float:
+    guesses = length * _LOG_BRUTEFORCE
+    if whole:
+        return guesses
+    return max(guesses, _LOG_MIN_SINGLE if length == 1 else _LOG_MIN_MULTI)
+
+
+def most_guessable(password: str, matches: list, max_work: int = DEFAULT_MAX_WORK):
+    """
+    The split of the password into matches and bruteforce pieces that is cheapest to guess.
+
+    Args:
+        password (str): The password.
+        matches (list): From find_matches.
+        max_work (int): Steps of the dynamic program before the rest is counted as bruteforce.
+
+    Returns:
+        tuple: (log10 guesses, [(start, end, log10 guesses, kind), ...] covering the password in order).
+    """
+    n = len(password)
+    if not n:
+        return 0.0, []
+    if not matches:
+        return _log_add(_bruteforce(n, True), 0.0), [(0, n, _bruteforce(n, True), BRUTEFORCE)]
+
+    by_end = [[] for _ in range(n)]
+    for match in matches:
+        by_end[match[1] - 1].append(match)
+    log_factorial = _log_factorials(n + 1)
+    # per end position k: {pieces l: (log10 g, log10 product of the pieces' guesses, last piece)}
+    best = [{} for _ in range(n)]
+    # where a bruteforce piece may start (the password start, or right after a match) with the
+    # (pieces, product) of the splits ending in a match there: bruteforce never follows bruteforce
+    anchors = [(0, [(0, 0.0)])]
+    work = 0
+
+    def update(k: int, piece: tuple, length: int, pi: float):
+        g = _log_add(log_factorial[length] + pi, _LOG_GROWING * (length - 1))
+        entries = best[k]
+        for other_length, other in entries.items():
+            if other_length <= length and other[0] <= g:
+                return  # as good or better with no more pieces
+        entries[length] = (g, pi, piece)
+
+    cut = n
+    for k in range(n):
+        for match in by_end[k]:
+            start, guesses = match[0], match[2]
+            if not start:
+                update(k, match, 1, guesses)
+            else:
+                for length, entry in list(best[start - 1].items()):
+                    update(k, match, length + 1, entry[1] + guesses)
+                    work += 1
+        after_match = [(length, entry[1]) for length, entry in best[k].items() if entry[2][3] != BRUTEFORCE]
+        if after_match and k < n - 1:
+            anchors.append((k + 1, after_match))
+
+        for start, splits in anchors:
+            if start > k:
+                continue
+            piece = (start, k + 1, _bruteforce(k + 1 - start, start == 0 and k == n - 1), BRUTEFORCE)
+            for length, pi in splits:
+                update(k, piece, length + 1, pi + piece[2])
+                work += 1
+        if work > max_work and k < n - 1:
+            cut = k + 1
+            break
+
+    if cut < n:
+        # out of budget: everything after the cut is one more bruteforce piece
+        rest = (cut, n, _bruteforce(n - cut, False), BRUTEFORCE)
+        g, length = min((_log_add(log_factorial[l + 1] + e[1] + rest[2], _LOG_GROWING * l), l)
+                        for l, e in best[cut - 1].items())
+        return g, _unwind(best, cut - 1, length)[::-1] + [rest]
+
+    length = min(best[n - 1], key=lambda l: best[n - 1][l][0])
+    return best[n - 1][length][0], _unwind(best, n - 1, length)[::-1]
+
+
+def _unwind(best, k: int, length: int) -> list:
+    """The pieces of the best split ending at k with that many pieces, last first."""
+    sequence = []
+    while k >= 0 and length > 0:
+        piece = best[k][length][2]
+        sequence.append(piece)
+        k, length = piece[0] - 1, length - 1
+    return sequence
+
+
+def estimate(password: str, patterns: int = None, common_guesses: int = None, max_work: int = DEFAULT_MAX_WORK):
+    """
+    Guess estimate with the pieces it is made of, for reports and debugging.
+
+    Returns:
+        tuple: (log10 guesses, [(start, end, log10 guesses, kind), ...]), see most_guessable.
+    """
+    return most_guessable(password, find_matches(password, patterns, common_guesses), max_work)
+
+
+def guesses_log10(password: str, patterns: int = None, common_guesses: int = None,
+                  max_work: int = DEFAULT_MAX_WORK) -> float:
+    """
+    log10 of the estimated number of guesses to find the password, rounded to 2 decimals.
+
+    Args:
+        password (str): The password.
+        patterns (int): Its pattern_mask when already known, saves running the detectors twice.
+        common_guesses (int): When the password is blacklisted, guesses to reach it in the list
+            (see common_guesses()). None when it isn't.
+        max_work (int): Cap on the dynamic program, see the module docstring.
+    """
+    return round(estimate(password, patterns, common_guesses, max_work)[0], 2)
+
+
+def common_guesses() -> int:
+    """Guesses for a blacklisted password: trying the loaded lists in order takes half of them on average."""
+    import blacklist
+    entries = blacklist.info()["entries"]
+    return max(entries // 2, 1) if entries else UNKNOWN_LIST_GUESSES
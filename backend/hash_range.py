@@ -0,0 +1,367 @@
+"""
+k-anonymity blacklist lookups by hash prefix, in the style of the Have I Been Pwned range API.
+
+The client hashes the password and sends only the first PREFIX_LENGTH hex characters of the
+digest. The server answers with the suffix of every listed digest in that bucket (hundreds of
+them on a large list), and the match happens on the client. The server never sees the password
+or its full hash, and clients don't need a copy of the list.
+
+Server side, RangeDataset serves the buckets straight from sorted hash index files
+(blacklist_index.py layout), see app.py --range:
+    python ingest.py export-hashes ../resources/blacklist.sha256 --algorithm sha256
+    python ../app.py --range ../resources/blacklist.sha256
+
+Client side, RangeClient keeps its HTTP connections alive in a small pool and caches every bucket
+it fetched, in memory and optionally on disk, so a session asks for each prefix only once:
+    blacklist.set_remote(RangeClient("http://127.0.0.1:8080"))
+
+GET /range/info tells the client how to hash: {"algorithm", "normalize", "prefix_length"}.
+Servers without it (eg. the real api.pwnedpasswords.com) get HIBP's SHA-1 of the password as typed.
+"""
+import hashlib
+import http.client
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from blacklist_index import HashIndex
+from normalize import fold
+
+PREFIX_LENGTH = 5                   # hex characters sent to the server (2**20 buckets)
+DEFAULT_CACHE_SIZE = 4096           # buckets kept in memory by RangeClient / RangeDataset
+DEFAULT_TTL = 24 * 3600             # seconds a cached bucket is trusted before it is fetched again
+# password as typed (HIBP), lowercased, or folded like is_common_password (see normalize.py)
+NORMALIZATIONS = ("none", "lower", "fold")
+
+# How servers that don't answer /range/info hash (Have I Been Pwned)
+HIBP_INFO = {"algorithm": "sha1", "normalize": "none", "prefix_length": PREFIX_LENGTH}
+
+
+class RangeLookupError(OSError):
+    """The range server could not be reached or gave an unusable answer."""
+
+
+def password_digest(password: str, algorithm: str = "sha1", normalize: str = "none") -> str:
+    """Uppercase hex digest of a password, as a range server lists it."""
+    if normalize == "lower":
+        password = password.lower()
+    elif normalize == "fold":
+        password = fold(password)
+    return hashlib.new(algorithm, password.encode("utf-8", "surrogatepass")).hexdigest().upper()
+
+
+def read_dataset_info(path: str) -> dict:
+    """
+    How the digests in a hash index file were made: {"algorithm", "normalize"}.
+
+    Read from the JSON file next to it (path + ".json", written by ingest.py export-hashes). Without
+    one the file is taken to hold unnormalized passwords, like the sha1 shards of HIBP dumps.
+    """
+    import json
+    index = HashIndex(path)
+    try:
+        info = {"algorithm": index.algorithm, "normalize": "none"}
+    finally:
+        index.close()
+    try:
+        with open(path + ".json", "r", encoding="utf-8") as f:
+            info["normalize"] = json.load(f).get("normalize", "none")
+    except FileNotFoundError:
+        pass
+    if info["normalize"] not in NORMALIZATIONS:
+        raise ValueError(f"{path}: unknown normalization {info['normalize']!r}")
+    return info
+
+
+class RangeDataset:
+    """
+    Prefix buckets of one or more hash index files, for the range server.
+
+    A bucket is the digests between two binary searches on the mapped files, so nothing is
+    loaded up front. Formatted buckets are kept in an LRU, popular prefixes are answered without
+    touching the files.
+
+    Args:
+        paths: Hash index files, all with the same algorithm and normalization.
+        cache_size (int): Formatted buckets kept in memory.
+
+    Raises:
+        ValueError: A file is not a hash index, or the files don't agree on how they were hashed.
+    """
+
+    def __init__(self, paths, cache_size: int = DEFAULT_CACHE_SIZE):
+        infos = [read_dataset_info(path) for path in paths]
+        if not infos:
+            raise ValueError("no hash index files given")
+        if any(info != infos[0] for info in infos):
+            raise ValueError("all range files must use the same algorithm and normalization")
+        self.info = dict(infos[0], prefix_length=PREFIX_LENGTH)
+        self.indexes = [HashIndex(path) for path in paths]
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # prefix -> response body
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(len(index) for index in self.indexes)
+
+    def bucket(self, prefix: str) -> str:
+        """
+        Suffixes (uppercase hex, one per line, sorted) of every digest starting with prefix.
+
+        Raises:
+            ValueError: prefix is not PREFIX_LENGTH hex characters.
+        """
+        prefix = prefix.upper()
+        if len(prefix) != PREFIX_LENGTH or prefix.strip("0123456789ABCDEF"):
+            raise ValueError(f"the prefix must be {PREFIX_LENGTH} hex characters")
+        with self._lock:
+            body = self._cache.get(prefix)
+            if body is not None:
+                self._cache.move_to_end(prefix)
+                return body
+
+        body = "\r\n".join(self._suffixes(int(prefix, 16)))
+        with self._lock:
+            self._cache[prefix] = body
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return body
+
+    def _suffixes(self, prefix: int):
+        size = self.indexes[0].digest_size
+        shift = size * 8 - PREFIX_LENGTH * 4
+        low = (prefix << shift).to_bytes(size, "big")
+        # the last bucket runs to the end of the files
+        high = None if prefix + 1 == 16 ** PREFIX_LENGTH else ((prefix + 1) << shift).to_bytes(size, "big")
+        digests = [digest for index in self.indexes for digest in index.between(low, high)]
+        if len(self.indexes) > 1:
+            digests = sorted(set(digests))
+        return [digest.hex().upper()[PREFIX_LENGTH:] for digest in digests]
+
+    def close(self):
+        for index in self.indexes:
+            index.close()
+
+
+class RangeClient:
+    """
+    Checks passwords against a range server without sending them. `password in client` is the check.
+
+    Thread-safe. Fetched buckets are kept in an in-memory LRU and, with cache_dir, in one small
+    file per prefix, so the check is offline for every prefix seen in the last `ttl` seconds.
+
+    Args:
+        url (str): Server base URL, eg. "http://127.0.0.1:8080" or "https://api.pwnedpasswords.com".
+        cache_dir (str): Folder for the on-disk bucket cache, None to keep buckets in memory only.
+            It reveals which prefixes were looked up, keep it private to the user.
+        cache_size (int): Buckets kept in memory.
+        ttl (float): Seconds a cached bucket is used before it is fetched again.
+        timeout (float): Seconds to wait for the server.
+        pool_size (int): Idle connections kept open for reuse.
+        fail_open (bool): When the server can't be reached, report passwords as not listed
+            (counted in stats()["errors"]) instead of raising RangeLookupError.
+    """
+
+    def __init__(self, url: str, cache_dir: str = None, cache_size: int = DEFAULT_CACHE_SIZE,
+                 ttl: float = DEFAULT_TTL, timeout: float = 5.0, pool_size: int = 4, fail_open: bool = True):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"not an http(s) URL: {url!r}")
+        self.url = url
+        self._connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self._netloc = parts.netloc
+        self._base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.fail_open = fail_open
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.cache_dir = None
+        if cache_dir:
+            # one folder per server, buckets of different lists must not mix
+            self.cache_dir = os.path.join(os.path.expanduser(cache_dir), hashlib.sha1(url.encode("utf-8")).hexdigest()[:16])
+            os.makedirs(self.cache_dir, exist_ok=True)
+        self._info = None
+        self._idle = []  # open connections ready for reuse
+        self._buckets = OrderedDict()  # prefix -> (expiry time, frozenset of suffixes)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.fetches = 0
+        self.errors = 0
+
+    def __repr__(self):
+        return f"<RangeClient {self.url}>"
+
+    def __contains__(self, password: str) -> bool:
+        return self.is_listed(password)
+
+    def is_listed(self, password: str) -> bool:
+        """Whether the server lists this password. Only the hash prefix leaves the process."""
+        try:
+            info = self.info()
+            digest = password_digest(password, info["algorithm"], info["normalize"])
+            length = info["prefix_length"]
+            return digest[length:] in self.bucket(digest[:length])
+        except RangeLookupError:
+            if not self.fail_open:
+                raise
+            with self._lock:
+                self.errors += 1
+            return False
+
+    def info(self) -> dict:
+        """
+        How the server hashes ({"algorithm", "normalize", "prefix_length"}), fetched once.
+
+        A server answering 400 or 404 is taken for a plain HIBP-style one (sha1, no normalization).
+
+        Raises:
+            RangeLookupError: The server could not be reached, answered another error or an answer
+                that isn't a usable info object (eg. a proxy's HTML page, a missing or oversized
+                prefix_length); nothing is remembered, the next call asks again.
+        """
+        if self._info is None:
+            status, body = self._get("/range/info")
+            if status == 200:
+                info = _parse_info(body, self.url)
+            elif status in (400, 404):
+                info = HIBP_INFO  # a plain HIBP-style server, /range/info is just a bad prefix there
+            else:
+                # eg. 429 or 503: guessing HIBP here would hash every later lookup wrongly, ask again next time
+                raise RangeLookupError(f"{self.url} answered {status} for /range/info")
+            self._info = dict(info)
+        return self._info
+
+    def bucket(self, prefix: str) -> frozenset:
+        """
+        Suffixes listed under a hash prefix, from the cache when possible.
+
+        Raises:
+            RangeLookupError: The bucket had to be fetched and the server could not be reached.
+        """
+        prefix = prefix.upper()
+        now = time.time()
+        with self._lock:
+            entry = self._buckets.get(prefix)
+            if entry is not None and entry[0] > now:
+                self._buckets.move_to_end(prefix)
+                self.hits += 1
+                return entry[1]
+
+        suffixes = self._read_disk(prefix, now)
+        if suffixes is None:
+            status, body = self._get("/range/" + prefix)
+            if status != 200:
+                raise RangeLookupError(f"{self.url} answered {status} for prefix {prefix}")
+            try:
+                suffixes = _parse_bucket(body)
+            except ValueError as e:  # not ASCII, eg. an error page
+                raise RangeLookupError(f"{self.url} sent an unreadable bucket for prefix {prefix}") from e
+            self._write_disk(prefix, body)
+            with self._lock:
+                self.fetches += 1
+        else:
+            with self._lock:
+                self.disk_hits += 1
+
+        with self._lock:
+            self._buckets[prefix] = (now + self.ttl, suffixes)
+            self._buckets.move_to_end(prefix)
+            while len(self._buckets) > self.cache_size:
+                self._buckets.popitem(last=False)
+        return suffixes
+
+    def _read_disk(self, prefix: str, now: float):
+        if self.cache_dir is None:
+            return None
+        path = os.path.join(self.cache_dir, prefix)
+        try:
+            if os.stat(path).st_mtime + self.ttl <= now:
+                return None
+            with open(path, "rb") as f:
+                return _parse_bucket(f.read())
+        except (OSError, ValueError):  # missing, unreadable or damaged, fetched again
+            return None
+
+    def _write_disk(self, prefix: str, body: bytes):
+        if self.cache_dir is None:
+            return
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, os.path.join(self.cache_dir, prefix))
+        except OSError:
+            pass  # the cache is only an optimization, eg. a full or read-only disk
+
+    def _get(self, path: str):
+        """(status, body) of a GET on a pooled connection. Raises RangeLookupError."""
+        with self._lock:
+            connection = self._idle.pop() if self._idle else None
+        # a kept-alive connection may have been closed by the server meanwhile, retry those once on a new one
+        for reused in ((True, False) if connection is not None else (False,)):
+            if not reused:
+                connection = self._connection_class(self._netloc, timeout=self.timeout)
+            try:
+                connection.request("GET", self._base_path + path, headers={"User-Agent": "password-strength-checker"})
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                if reused:
+                    continue
+                raise RangeLookupError(f"{self.url}: {e}") from e
+            if response.will_close:
+                connection.close()
+            else:
+                with self._lock:
+                    if len(self._idle) < self.pool_size:
+                        self._idle.append(connection)
+                        connection = None
+                if connection is not None:
+                    connection.close()
+            return response.status, body
+
+    def stats(self) -> dict:
+        """Cache and network counters."""
+        with self._lock:
+            return {
+                "cached_buckets": len(self._buckets),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "fetches": self.fetches,
+                "errors": self.errors,
+            }
+
+    def close(self):
+        """Close the pooled connections (the caches are kept)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+def _parse_info(body: bytes, url: str) -> dict:
+    """The info object of a 200 answer to /range/info, checked. Raises RangeLookupError."""
+    import json
+    try:
+        info = json.loads(body)
+        info = {"algorithm": info["algorithm"], "normalize": info["normalize"], "prefix_length": info["prefix_length"]}
+        hex_length = 2 * hashlib.new(info["algorithm"]).digest_size  # 0 for variable-length hashes (shake_*)
+        usable = (info["normalize"] in NORMALIZATIONS and type(info["prefix_length"]) is int
+                  and 1 <= info["prefix_length"] <= min(PREFIX_LENGTH, hex_length - 1))
+    except (ValueError, KeyError, TypeError) as e:  # not JSON, not an object, a field missing, an unknown hash
+        raise RangeLookupError(f"{url} sent an unusable /range/info: {e!r}") from e
+    if not usable:
+        # never more than PREFIX_LENGTH characters: a longer prefix would tell the server too much
+        raise RangeLookupError(f"{url} serves an unsupported hash: {info}")
+    return info
+
+
+def _parse_bucket(body: bytes) -> frozenset:
+    # "SUFFIX" lines, or HIBP's "SUFFIX:count"
+    return frozenset(line.partition(b":")[0].strip().decode("ascii").upper() for line in body.splitlines() if line.strip())
@@ -0,0 +1,192 @@
+"""
+Incremental evaluator for text that is typed (or deleted) a character at a time.
+
+Re-running evaluate_password on every keystroke costs O(length) each time, O(n^2) for a whole
+passphrase. IncrementalEvaluator keeps running state instead:
+
+- character counts for the entropy,
+- per-class character counts for the composition flags,
+- the pattern scanner state (run lengths and keyboard automaton state) after every prefix,
+- the dictionary word automaton state after every prefix.
+
+Appending or deleting a character at the end updates that state in O(1). result() then only
+loops over the distinct characters for the entropy. Two stages are not incremental: the
+blacklist lookup hashes the whole text, and the guess estimate (guesses.py) is recomputed on the
+whole text, its best split can change anywhere when a character is added. Both are remembered
+for the last STAGE_MEMO texts (under the blacklist files and range server they were checked
+against), so going back to an earlier text, eg. a deleted and retyped character, costs nothing;
+a text not seen before pays O(length) for them once. Results are identical to evaluate_password
+on the same text.
+
+With a range server set (blacklist.set_remote) the blacklist lookup is also a network round trip.
+Pass final=False to result() while the text is still changing to check the local lists only, and
+call result() once it has settled. The GUI only evaluates text that has been quiet for its
+debounce delay, so it makes one lookup per pause in typing, not one per keystroke.
+
+State is only kept for the first max_length characters (see policy.py). Beyond that, text is
+stored but not scanned, and result() analyses the prefix like evaluate_password does, so pasting
+a huge blob into the GUI costs the same as pasting max_length characters.
+"""
+from collections import OrderedDict
+
+import blacklist
+from entropy import entropy_from_counts
+from evaluator import make_result, _analyze, PasswordResult, IS_COMMON
+from charclass import char_class, HAS_UPPER, HAS_LOWER, HAS_DIGIT, HAS_SYMBOL, HAS_SPACE, HAS_NON_ASCII, HAS_EMOJI
+from patterns import advance_scan, SCAN_START, DICTIONARY_WORD
+from dictionary import advance_word, WORD_START, WORD_FOUND
+from guesses import guesses_log10, common_guesses
+from policy import current_policy
+
+_CLASS_BITS = (HAS_UPPER, HAS_LOWER, HAS_DIGIT, HAS_SYMBOL, HAS_SPACE, HAS_NON_ASCII, HAS_EMOJI)
+
+STAGE_MEMO = 64  # texts whose blacklist lookup and guess estimate are remembered
+
+
+class IncrementalEvaluator:
+    """
+    Keeps an evaluation up to date while the text changes at its end.
+
+    Args:
+        text (str): Initial text.
+        policy (Policy): Scoring policy, the current default when None.
+    """
+
+    def __init__(self, text: str = "", policy=None):
+        self.policy = policy
+        self._text = ""
+        self._counts = {}                   # character -> occurrences, same order as Counter(text)
+        self._class_counts = [0] * len(_CLASS_BITS)   # characters in each of _CLASS_BITS
+        self._scans = [SCAN_START]          # pattern scanner state after each tracked prefix length
+        self._words = [WORD_START]          # dictionary automaton state after each tracked prefix length
+        self._result = None                 # (policy, final, result) of the last result() call
+        self._stages = OrderedDict()        # (text, patterns, final, blacklist files, remote) -> (common, guesses)
+        self.append(text)
+
+    @property
+    def text(self) -> str:
+        return self._text
+
+    def __len__(self):
+        return len(self._text)
+
+    def append(self, text: str):
+        """Add characters at the end."""
+        if not text:
+            return
+        self._text += text
+        self._track((self.policy or current_policy()).max_length)
+        self._result = None
+
+    def _track(self, limit: int):
+        """Bring the running state up to date for the first limit characters (all when None)."""
+        tracked = len(self._scans) - 1
+        end = len(self._text) if limit is None else min(limit, len(self._text))
+        if tracked >= end:
+            return
+        counts, class_counts, scans, words = self._counts, self._class_counts, self._scans, self._words
+        for ch in self._text[tracked:end]:
+            counts[ch] = counts.get(ch, 0) + 1
+            flags = char_class(ch)
+            if flags:
+                for i, bit in enumerate(_CLASS_BITS):
+                    if flags & bit:
+                        class_counts[i] += 1
+            scans.append(advance_scan(scans[-1], ch))
+            words.append(advance_word(words[-1], ch))
+
+    def delete(self, count: int = 1):
+        """Remove characters from the end."""
+        count = min(count, len(self._text))
+        if count <= 0:
+            return
+        counts, class_counts, scans = self._counts, self._class_counts, self._scans
+        tracked = len(scans) - 1
+        removed, self._text = self._text[-count:tracked], self._text[:-count]
+        for ch in reversed(removed):
+            # removing only from the end keeps the key order of counts equal to Counter(text),
+            # which keeps the entropy sum (and its rounding) identical to shannon_entropy
+            if counts[ch] == 1:
+                del counts[ch]
+            else:
+                counts[ch] -= 1
+            flags = char_class(ch)
+            if flags:
+                for i, bit in enumerate(_CLASS_BITS):
+                    if flags & bit:
+                        class_counts[i] -= 1
+            scans.pop()
+            self._words.pop()
+        self._result = None
+
+    def set_text(self, text: str):
+        """
+        Move to a new text, eg. the whole value of a text box after an edit.
+
+        Only the part after the common prefix of the old and new text is re-scanned, so typing
+        or deleting at the end is O(1) and an edit in the middle costs the length of the tail.
+        """
+        old = self._text
+        if text == old:
+            return
+        if text.startswith(old):
+            self.append(text[len(old):])
+            return
+        if old.startswith(text):
+            self.delete(len(old) - len(text))
+            return
+
+        # binary search for the common prefix, the slice comparisons run in C
+        lo, hi = 0, min(len(old), len(text))
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if old[:mid] == text[:mid]:
+                lo = mid
+            else:
+                hi = mid - 1
+        self.delete(len(old) - lo)
+        self.append(text[lo:])
+
+    def result(self, final: bool = True) -> PasswordResult:
+        """
+        Evaluation of the current text, same as evaluate_password(self.text, self.policy).
+
+        Args:
+            final (bool): False while the text is still changing: the blacklist check then skips the
+                range server, if one is set, and only looks at the local lists.
+        """
+        policy = self.policy or current_policy()
+        if self._result is None or self._result[0] is not policy or self._result[1] != final:
+            length = len(self._text)
+            if policy.max_length is not None and length > policy.max_length:
+                self._result = policy, final, make_result(*_analyze(self._text, policy.max_length), policy)
+                return self._result[2]
+            self._track(None)  # a policy with a higher limit than when the text was added
+            flags = 0
+            for i, bit in enumerate(_CLASS_BITS):
+                if self._class_counts[i]:
+                    flags |= bit
+            patterns = self._scans[-1][-1]
+            if self._words[-1] == WORD_FOUND:
+                patterns |= DICTIONARY_WORD
+            common, guesses = self._whole_text_stages(patterns, final)
+            if common:
+                flags |= IS_COMMON
+            self._result = policy, final, make_result(length, flags, patterns, entropy_from_counts(self._counts, length),
+                                                      guesses, policy)
+        return self._result[2]
+
+    def _whole_text_stages(self, patterns: int, final: bool) -> tuple:
+        """(blacklisted, log10 guesses) of the current text, remembered for the last STAGE_MEMO texts."""
+        lists = blacklist.info()
+        key = self._text, patterns, final, lists["fingerprint"], lists["remote"]
+        stages = self._stages.get(key)
+        if stages is None:
+            common = blacklist.is_common_password(self._text, remote=final)
+            stages = common, guesses_log10(self._text, patterns, common_guesses() if common else None)
+            self._stages[key] = stages
+            if len(self._stages) > STAGE_MEMO:
+                self._stages.popitem(last=False)
+        else:
+            self._stages.move_to_end(key)
+        return stages
@@ -0,0 +1,424 @@
+"""
+Breach-corpus ingestion for the blacklist.
+
+Streams password dumps into versioned, sorted shards in resources/blacklist.d:
+
+- plain text, one password per line, normalized like is_common_password (strip + normalize.fold);
+- Have I Been Pwned style "SHA1:count" lines, kept as binary digests (--min-count drops rare ones).
+
+Either can be gzip-compressed. Memory stays bounded whatever the input size: entries are sorted
+in runs of --run-size in memory, spilled to temporary files and merged (external sort). Entries
+already in an existing shard are dropped, so each ingest only appends what is new. The manifest
+is replaced atomically, and running checkers pick new shards up with blacklist.reload_if_changed()
+(or blacklist.start_auto_reload()), without a restart.
+
+Run from the backend folder:
+    python ingest.py add rockyou.txt.gz new_dump.txt
+    python ingest.py add pwned-passwords-sha1.txt --min-count 100
+    python ingest.py list
+    python ingest.py compact          # merge the shards of each kind into one
+    python ingest.py export-hashes ../resources/blacklist.sha256 --algorithm sha256
+
+export-hashes writes the plaintext lists (blacklist.idx or .txt and the text shards) as a sorted
+hash file for a range server (app.py --range), so clients can check passwords without a copy of
+the list, see hash_range.py.
+"""
+import argparse
+import gzip
+import heapq
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from contextlib import ExitStack
+
+import blacklist
+from blacklist_index import SortedIndex, HashIndex, HASH_FORMATS, normalize, write_index, write_hash_index
+from bloom import build_filter
+
+DEFAULT_RUN_SIZE = 1_000_000   # entries sorted in memory before spilling a run to disk
+MAX_FAN_IN = 64                # run files merged at once
+DEFAULT_FP_RATE = 0.01         # bloom filter written next to every text shard
+
+_HIBP_LINE = re.compile(r"^[0-9A-Fa-f]{40}:\d+\s*$")
+_HIBP_ENTRY = re.compile(r"([0-9A-Fa-f]{40})(?::(\d+))?")  # a stripped line, the count may be left out
+_SUFFIX = {"text": ".idx", "sha1": ".sha1"}
+
+
+def open_text(path: str):
+    """Open a dump for reading as text, gzip or not ('-' is stdin)."""
+    if path == "-":
+        return sys.stdin
+    with open(path, "rb") as f:
+        compressed = f.read(2) == b"\x1f\x8b"
+    if compressed:
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def detect_format(path: str) -> str:
+    """'sha1' for Have I Been Pwned style hash:count files, 'text' otherwise (judged on the first line)."""
+    if path == "-":
+        return "text"
+    with open_text(path) as f:
+        for line in f:
+            if line.strip():
+                return "sha1" if _HIBP_LINE.match(line) else "text"
+    return "text"
+
+
+def read_entries(path: str, kind: str, min_count: int = 1, stats: dict = None):
+    """
+    Yield the normalized entries of one dump as bytes.
+
+    Text passwords come out as utf-8, hashes as 40 uppercase hex characters (same sort order as the digests).
+    Lines of a hash dump that aren't "hash" or "hash:count" (a truncated download, a stray header)
+    are skipped, and counted in stats["skipped"] when a stats dict is given.
+    """
+    f = open_text(path)
+    try:
+        if kind == "sha1":
+            skipped = 0
+            match = _HIBP_ENTRY.fullmatch
+            for line in f:
+                line = line.strip()
+                entry = match(line)
+                if entry is None:
+                    skipped += bool(line)
+                elif min_count <= 1 or int(entry.group(2) or 0) >= min_count:
+                    yield entry.group(1).upper().encode("ascii")
+            if skipped:
+                print(f"{path}: skipped {skipped} malformed lines", file=sys.stderr)
+                if stats is not None:
+                    stats["skipped"] = stats.get("skipped", 0) + skipped
+        else:
+            for line in f:
+                password = normalize(line)
+                if password:
+                    yield password.encode("utf-8")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _write_run(sorted_entries, folder: str) -> str:
+    fd, path = tempfile.mkstemp(dir=folder, suffix=".run")
+    with os.fdopen(fd, "wb", buffering=1 << 20) as f:
+        for entry in sorted_entries:
+            f.write(entry)
+            f.write(b"\n")
+    return path
+
+
+def _read_run(path: str):
+    with open(path, "rb", buffering=1 << 20) as f:
+        for line in f:
+            yield line[:-1]
+
+
+def _unique(sorted_entries):
+    previous = None
+    for entry in sorted_entries:
+        if entry != previous:
+            yield entry
+            previous = entry
+
+
+def external_sort(entries, folder: str, run_size: int = DEFAULT_RUN_SIZE):
+    """
+    Yield entries sorted and without duplicates, holding at most run_size of them in memory.
+
+    Full runs are written to temporary files in folder and merged, MAX_FAN_IN files at a time.
+    The temporary files are removed as soon as they are merged.
+    """
+    runs = []
+    buffer = set()
+    for entry in entries:
+        buffer.add(entry)
+        if len(buffer) >= run_size:
+            runs.append(_write_run(sorted(buffer), folder))
+            buffer = set()
+
+    if not runs:
+        yield from sorted(buffer)
+        return
+    if buffer:
+        runs.append(_write_run(sorted(buffer), folder))
+    del buffer
+
+    try:
+        while len(runs) > MAX_FAN_IN:
+            group, runs = runs[:MAX_FAN_IN], runs[MAX_FAN_IN:]
+            runs.append(_write_run(_unique(heapq.merge(*map(_read_run, group))), folder))
+            for path in group:
+                os.unlink(path)
+        yield from _unique(heapq.merge(*map(_read_run, runs)))
+    finally:
+        for path in runs:
+            if os.path.exists(path):
+                os.unlink(path)
+
+
+def _without(entries, existing):
+    """Sorted entries that are not in the sorted iterable existing."""
+    existing = iter(existing)
+    current = next(existing, None)
+    for entry in entries:
+        while current is not None and current < entry:
+            current = next(existing, None)
+        if entry != current:
+            yield entry
+
+
+def _shard_entries(folder: str, shard: dict, opened: ExitStack):
+    """Entries of a shard in run format (utf-8 passwords or uppercase hex). The index is closed with opened."""
+    path = os.path.join(folder, shard["file"])
+    if shard["kind"] == "sha1":
+        index = opened.enter_context(HashIndex(path))
+        return (digest.hex().upper().encode("ascii") for digest in index)
+    return iter(opened.enter_context(SortedIndex(path)))
+
+
+def read_manifest(folder: str) -> dict:
+    try:
+        with open(os.path.join(folder, blacklist.MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"version": 0, "shards": []}
+
+
+def write_manifest(folder: str, manifest: dict):
+    """Replace the manifest atomically, readers see the old or the new one, never a partial file."""
+    fd, tmp_path = tempfile.mkstemp(dir=folder, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+            f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(folder, blacklist.MANIFEST))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class IngestLock:
+    """Lock file that keeps two ingests from writing the same folder at once."""
+
+    def __init__(self, folder: str):
+        self.path = os.path.join(folder, "ingest.lock")
+
+    def __enter__(self):
+        try:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            raise RuntimeError(f"another ingest is running (remove {self.path} if it crashed)")
+        os.write(fd, str(os.getpid()).encode("ascii"))
+        os.close(fd)
+        return self
+
+    def __exit__(self, *exc):
+        os.unlink(self.path)
+
+
+def _write_shard(folder: str, kind: str, name: str, entries, fp_rate: float) -> dict:
+    path = os.path.join(folder, name + _SUFFIX[kind])
+    if kind == "sha1":
+        count = write_hash_index((bytes.fromhex(e.decode("ascii")) for e in entries), path)
+    else:
+        count = write_index(entries, path)
+    shard = {"file": os.path.basename(path), "kind": kind, "entries": count, "bloom": None,
+             "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    if count == 0:
+        os.unlink(path)
+        return shard
+    if kind == "text" and fp_rate:
+        bloom_path = os.path.join(folder, name + ".bloom")
+        build_filter(path, bloom_path, fp_rate)
+        shard["bloom"] = os.path.basename(bloom_path)
+    return shard
+
+
+def add(paths, folder: str = None, kind: str = "auto", min_count: int = 1,
+        run_size: int = DEFAULT_RUN_SIZE, fp_rate: float = DEFAULT_FP_RATE) -> dict:
+    """
+    Ingest dumps into one new shard per kind (text / sha1), holding only entries no shard has yet.
+
+    Args:
+        paths: Dump files ('-' for stdin), plain or gzip.
+        folder (str): Shard folder (default blacklist.shard_dir).
+        kind (str): 'text', 'sha1' or 'auto' (detected per file).
+        min_count (int): Skip hashes seen fewer times than this (sha1 dumps only).
+        run_size (int): Entries sorted in memory at a time.
+        fp_rate (float): False positive rate of the bloom filter for text shards, 0 for none.
+
+    Returns:
+        dict: The new manifest.
+    """
+    folder = folder or blacklist.shard_dir
+    os.makedirs(folder, exist_ok=True)
+    kinds = {}
+    for path in paths:
+        kinds.setdefault(detect_format(path) if kind == "auto" else kind, []).append(path)
+
+    with IngestLock(folder), tempfile.TemporaryDirectory(dir=folder) as tmp:
+        manifest = read_manifest(folder)
+        version = manifest["version"] + 1
+        added = []
+        for shard_kind, sources in sorted(kinds.items()):
+            stats = {}
+            entries = (e for path in sources for e in read_entries(path, shard_kind, min_count, stats))
+            with ExitStack() as opened:
+                existing = heapq.merge(*(_shard_entries(folder, s, opened)
+                                         for s in manifest["shards"] if s["kind"] == shard_kind))
+                new = _without(external_sort(entries, tmp, run_size), existing)
+                shard = _write_shard(folder, shard_kind, f"shard-{version:06d}-{shard_kind}", new, fp_rate)
+            if shard["entries"]:
+                shard["sources"] = [os.path.basename(p) for p in sources]
+                if stats:
+                    shard["skipped_lines"] = stats["skipped"]
+                added.append(shard)
+
+        if added:
+            manifest = {"version": version, "shards": manifest["shards"] + added}
+            write_manifest(folder, manifest)
+    return manifest
+
+
+def compact(folder: str = None, fp_rate: float = DEFAULT_FP_RATE) -> dict:
+    """
+    Merge the shards of each kind into a single shard, so lookups probe fewer files.
+
+    Files of the replaced shards are deleted after the new manifest is in place. Checkers that
+    still map them keep working until they reload (on Windows the files stay until then).
+
+    Returns:
+        dict: The new manifest.
+    """
+    folder = folder or blacklist.shard_dir
+    with IngestLock(folder):
+        manifest = read_manifest(folder)
+        version = manifest["version"] + 1
+        shards, replaced = [], []
+        for shard_kind in ("text", "sha1"):
+            group = [s for s in manifest["shards"] if s["kind"] == shard_kind]
+            if len(group) < 2:
+                shards += group
+                continue
+            with ExitStack() as opened:
+                merged = _unique(heapq.merge(*(_shard_entries(folder, s, opened) for s in group)))
+                shard = _write_shard(folder, shard_kind, f"shard-{version:06d}-{shard_kind}", merged, fp_rate)
+            shard["sources"] = sorted({source for s in group for source in s.get("sources", [])})
+            shards.append(shard)
+            replaced += group
+
+        if not replaced:
+            return manifest
+        manifest = {"version": version, "shards": shards}
+        write_manifest(folder, manifest)
+
+    for shard in replaced:
+        for name in (shard["file"], shard.get("bloom")):
+            if name:
+                try:
+                    os.unlink(os.path.join(folder, name))
+                except OSError:
+                    pass  # still mapped on Windows, removed by the next compact
+    return manifest
+
+
+def _plaintext_entries(folder: str):
+    """Normalized utf-8 entries of every plaintext list is_common_password checks (may repeat)."""
+    with ExitStack() as opened:
+        if os.path.exists(blacklist.index_file):
+            yield from opened.enter_context(SortedIndex(blacklist.index_file))
+        elif os.path.exists(blacklist.g):
+            yield from read_entries(blacklist.g, "text")
+        for shard in read_manifest(folder)["shards"]:
+            if shard["kind"] == "text":
+                yield from _shard_entries(folder, shard, opened)
+
+
+def export_hashes(path: str, algorithm: str = "sha256", folder: str = None, run_size: int = DEFAULT_RUN_SIZE) -> int:
+    """
+    Write the plaintext blacklist as a sorted hash index, for a range server (app.py --range).
+
+    The entries are hashed folded (normalize.fold), like is_common_password compares them, and a path + ".json"
+    file records that for hash_range.read_dataset_info. Memory stays bounded (external sort).
+
+    Args:
+        path (str): Destination hash index file.
+        algorithm (str): 'sha1' or 'sha256'.
+        folder (str): Shard folder (default blacklist.shard_dir).
+        run_size (int): Entries sorted in memory at a time.
+
+    Returns:
+        int: Number of digests written.
+    """
+    import hashlib
+    if algorithm not in HASH_FORMATS:
+        raise ValueError(f"unsupported algorithm {algorithm!r}")
+    folder = folder or blacklist.shard_dir
+    out_folder = os.path.dirname(os.path.abspath(path))
+    # uppercase hex sorts like the digests, so the run files stay text
+    hexes = (hashlib.new(algorithm, entry).hexdigest().upper().encode("ascii") for entry in _plaintext_entries(folder))
+    with tempfile.TemporaryDirectory(dir=out_folder) as tmp:
+        count = write_hash_index((bytes.fromhex(h.decode("ascii")) for h in external_sort(hexes, tmp, run_size)),
+                                 path, algorithm)
+    with open(path + ".json", "w", encoding="utf-8") as f:
+        json.dump({"algorithm": algorithm, "normalize": "fold", "entries": count,
+                   "created": time.strftime("%Y-%m-%dT%H:%M:%S")}, f, indent=2)
+        f.write("\n")
+    return count
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Ingest password dumps into blacklist shards.")
+    parser.add_argument("--dir", default=blacklist.shard_dir, help="shard folder (default resources/blacklist.d)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = commands.add_parser("add", help="ingest dumps into a new shard")
+    add_parser.add_argument("inputs", nargs="+", help="dump files, plain or .gz ('-' for stdin)")
+    add_parser.add_argument("--format", choices=("auto", "text", "sha1"), default="auto",
+                            help="text (one password per line) or sha1 (HIBP hash:count), detected by default")
+    add_parser.add_argument("--min-count", type=int, default=1, help="skip hashes seen fewer times (sha1 only)")
+    add_parser.add_argument("--run-size", type=int, default=DEFAULT_RUN_SIZE, help="entries sorted in memory at a time")
+    add_parser.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE, help="bloom filter false positive rate, 0 for none")
+
+    compact_parser = commands.add_parser("compact", help="merge the shards of each kind into one")
+    compact_parser.add_argument("--fp-rate", type=float, default=DEFAULT_FP_RATE, help="bloom filter false positive rate, 0 for none")
+
+    commands.add_parser("list", help="show the manifest")
+
+    export_parser = commands.add_parser("export-hashes", help="write the plaintext lists as a hash file for app.py --range")
+    export_parser.add_argument("output", help="hash index file to write")
+    export_parser.add_argument("--algorithm", choices=sorted(HASH_FORMATS), default="sha256")
+    export_parser.add_argument("--run-size", type=int, default=DEFAULT_RUN_SIZE, help="entries sorted in memory at a time")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.command == "export-hashes":
+        count = export_hashes(args.output, args.algorithm, args.dir, args.run_size)
+        print(f"wrote {count} {args.algorithm} digests to {args.output} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+        return 0
+    if args.command == "add":
+        before = read_manifest(args.dir)["version"]
+        manifest = add(args.inputs, args.dir, args.format, args.min_count, args.run_size, args.fp_rate)
+        if manifest["version"] == before:
+            print("nothing new, manifest unchanged", file=sys.stderr)
+    elif args.command == "compact":
+        manifest = compact(args.dir, args.fp_rate)
+    else:
+        manifest = read_manifest(args.dir)
+
+    json.dump(manifest, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    if args.command != "list":
+        print(f"done in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""
+Opt-in per-stage timers and counters for evaluate_password and evaluate_many.
+
+Disabled by default. The evaluator only checks the module-level `enabled` flag, so the cost
+when disabled is one attribute lookup per evaluate_password call (per batch for evaluate_many).
+When enabled, every evaluation records the time spent in each stage:
+
+    composition   character counts and class flags
+    normalize     Unicode folding shared by the next checks (normalize.py)
+    blacklist     is_common_password
+    patterns      repetition / sequence / keyboard scan
+    entropy       Shannon entropy from the counts
+    guesses       guess estimate (guesses.py)
+    scoring       score, strength label and result building
+
+plus counters for calls, blacklist hits and pattern hits by type.
+
+    import instrumentation
+    instrumentation.enable()
+    ...
+    instrumentation.snapshot()          # dict
+    instrumentation.prometheus_text()   # Prometheus text exposition format
+
+Counters are per process. Worker processes can hand theirs to the parent with drain() and merge().
+"""
+import threading
+
+from patterns import PATTERN_LABELS
+
+STAGES = ("composition", "normalize", "blacklist", "patterns", "entropy", "guesses", "scoring")
+METRIC_PREFIX = "password_checker"
+
+enabled = False
+
+
+def enable():
+    """Start recording. Counters keep what was recorded before, see reset()."""
+    global enabled
+    enabled = True
+
+
+def disable():
+    """Stop recording. The counters are kept until reset()."""
+    global enabled
+    enabled = False
+
+
+class StageStats:
+    """Thread-safe accumulator of stage timings and counters."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        self.calls = 0
+        self.blacklist_hits = 0
+        self.pattern_hits = [0] * len(PATTERN_LABELS)
+        self.seconds = [0.0] * len(STAGES)      # total time per stage
+        self.max_seconds = [0.0] * len(STAGES)  # slowest single call per stage
+        self.scored = 0                         # calls that went through the scoring stage
+
+    def record_analysis(self, timings, is_common: bool, patterns: int):
+        """One evaluation's composition, normalize, blacklist, patterns, entropy and guesses times (seconds), in that order."""
+        with self._lock:
+            self.calls += 1
+            if is_common:
+                self.blacklist_hits += 1
+            if patterns:
+                for i, (bit, _) in enumerate(PATTERN_LABELS):
+                    if patterns & bit:
+                        self.pattern_hits[i] += 1
+            seconds, max_seconds = self.seconds, self.max_seconds
+            for i, elapsed in enumerate(timings):
+                seconds[i] += elapsed
+                if elapsed > max_seconds[i]:
+                    max_seconds[i] = elapsed
+
+    def record_scoring(self, elapsed: float):
+        with self._lock:
+            self.scored += 1
+            self.seconds[-1] += elapsed
+            if elapsed > self.max_seconds[-1]:
+                self.max_seconds[-1] = elapsed
+
+    def snapshot(self) -> dict:
+        """Consistent copy of every counter."""
+        with self._lock:
+            return self._snapshot()
+
+    def drain(self) -> dict:
+        """snapshot() and reset() in one step, so nothing recorded in between is lost."""
+        with self._lock:
+            snap = self._snapshot()
+            self._reset()
+        return snap
+
+    def _snapshot(self) -> dict:
+        stages = {}
+        for i, stage in enumerate(STAGES):
+            count = self.scored if stage == "scoring" else self.calls
+            stages[stage] = {
+                "count": count,
+                "seconds": self.seconds[i],
+                "mean_us": round(self.seconds[i] / count * 1e6, 3) if count else 0.0,
+                "max_us": round(self.max_seconds[i] * 1e6, 3),
+            }
+        return {
+            "enabled": enabled,
+            "calls": self.calls,
+            "blacklist_hits": self.blacklist_hits,
+            "pattern_hits": {label: self.pattern_hits[i] for i, (_, label) in enumerate(PATTERN_LABELS)},
+            "stages": stages,
+        }
+
+    def merge(self, snap: dict):
+        """Add a snapshot taken elsewhere (eg. drained in a worker process) to these counters."""
+        with self._lock:
+            self.calls += snap["calls"]
+            self.blacklist_hits += snap["blacklist_hits"]
+            for i, (_, label) in enumerate(PATTERN_LABELS):
+                self.pattern_hits[i] += snap["pattern_hits"].get(label, 0)
+            for i, stage in enumerate(STAGES):
+                stage_snap = snap["stages"][stage]
+                self.seconds[i] += stage_snap["seconds"]
+                self.max_seconds[i] = max(self.max_seconds[i], stage_snap["max_us"] / 1e6)
+            self.scored += snap["stages"]["scoring"]["count"]
+
+
+# The counters the evaluator records into
+collector = StageStats()
+
+snapshot = collector.snapshot
+reset = collector.reset
+drain = collector.drain
+merge = collector.merge
+
+
+def prometheus_text(snap: dict = None) -> str:
+    """
+    Counters in the Prometheus text exposition format (version 0.0.4).
+
+    Args:
+        snap (dict): A snapshot to export, the current counters by default.
+
+    Returns:
+        str: Metric families, newline terminated.
+    """
+    snap = snap or snapshot()
+    p = METRIC_PREFIX
+    lines = [
+        f"# HELP {p}_evaluations_total Passwords evaluated.",
+        f"# TYPE {p}_evaluations_total counter",
+        f"{p}_evaluations_total {snap['calls']}",
+        f"# HELP {p}_blacklist_hits_total Evaluated passwords found in the blacklist.",
+        f"# TYPE {p}_blacklist_hits_total counter",
+        f"{p}_blacklist_hits_total {snap['blacklist_hits']}",
+        f"# HELP {p}_pattern_hits_total Evaluated passwords with a weak pattern, by pattern.",
+        f"# TYPE {p}_pattern_hits_total counter",
+    ]
+    for label, count in snap["pattern_hits"].items():
+        lines.append(f'{p}_pattern_hits_total{{pattern="{label}"}} {count}')
+
+    lines += [
+        f"# HELP {p}_stage_seconds Time spent in each evaluation stage.",
+        f"# TYPE {p}_stage_seconds summary",
+    ]
+    for stage, stage_snap in snap["stages"].items():
+        lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {stage_snap["seconds"]:.9f}')
+        lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {stage_snap["count"]}')
+
+    lines += [
+        f"# HELP {p}_stage_max_seconds Slowest single call of each evaluation stage since the last reset.",
+        f"# TYPE {p}_stage_max_seconds gauge",
+    ]
+    for stage, stage_snap in snap["stages"].items():
+        lines.append(f'{p}_stage_max_seconds{{stage="{stage}"}} {stage_snap["max_us"] / 1e6:.9f}')
+    return "\n".join(lines) + "\n"
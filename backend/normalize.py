@@ -0,0 +1,164 @@
+"""
+Unicode normalization ahead of the blacklist, pattern and dictionary checks.
+
+Without it, "ｐａｓｓｗｏｒｄ" (fullwidth), "pásswörd" (accents) and "pаssword" (Cyrillic а) are
+new passwords to every check, and "ａｂｃ" is no sequence. Two forms are derived here:
+
+    skeleton(text)  compatibility decomposition (NFKD), combining marks dropped, lookalike
+                    letters mapped to ASCII (CONFUSABLES), recomposed (NFKC). Case is kept:
+                    the pattern scanner sees this form, it handles case itself.
+    fold(text)      skeleton(text).casefold(), what the blacklist and dictionary compare.
+
+Both work one character at a time: every code point has its own replacement (possibly longer,
+eg. "ﬁ" -> "fi", or empty for a combining mark) and text maps to the replacements joined, so
+fold(a + b) == fold(a) + fold(b). That lets the incremental evaluator feed characters one by
+one, and lets find_words map positions in the folded text back to the password. The price is
+that nothing is composed across characters: "e" + COMBINING ACUTE folds to "e" like "é" does.
+
+Replacements are kept in tables by code point, one per form (skeleton translates with its
+table, fold_char looks its own up): the Latin-1 range and the confusables are filled at
+import, other characters on first sight (at most CACHE_LIMIT of them). A filled entry is a plain dict hit, the Python fallback only runs for a
+character's first sight. str.casefold is per character too, so fold is the casefold of the
+skeleton. ASCII text, most passwords, is returned as is (lowercased for fold) without a lookup.
+
+The checks of one evaluation each ask for the form they read, one after the other, so the last
+password's forms are kept (_last_call_cache): one slot, which costs a comparison on a miss where
+an LRU would pay a hash, an insert and an eviction on every new password of a large batch.
+
+CONFUSABLES is a short list (Cyrillic, Greek and a few other letters that look like Latin ones),
+not the full Unicode confusables data; it covers the swaps seen in lists of leaked passwords.
+"""
+import unicodedata
+from functools import wraps
+
+CACHE_LIMIT = 65536   # characters outside the prefilled tables remembered
+
+# Letters that look like ASCII ones, by the character they pass for (applied after NFKD, so
+# accented forms of these are covered too)
+CONFUSABLES = {
+    "a": "аɑα",
+    "c": "сϲ",
+    "d": "ԁ",
+    "e": "еҽ",
+    "g": "ɡ",
+    "h": "һհ",
+    "i": "іιıӏ",
+    "j": "јϳ",
+    "k": "κ",
+    "l": "ǀ",
+    "n": "ո",
+    "o": "оοօ",
+    "p": "рρ",
+    "q": "ԛ",
+    "s": "ѕ",
+    "u": "υս",
+    "v": "ν",
+    "w": "ԝ",
+    "x": "хχ",
+    "y": "уγ",
+    "A": "АΑ",
+    "B": "ВΒ",
+    "C": "СϹ",
+    "E": "ЕΕ",
+    "H": "НΗҺ",
+    "I": "ІΙӀ",
+    "J": "Ј",
+    "K": "КΚ",
+    "M": "МΜ",
+    "N": "Ν",
+    "O": "ОΟ",
+    "P": "РΡ",
+    "Q": "Ԛ",
+    "S": "Ѕ",
+    "T": "ТΤ",
+    "W": "Ԝ",
+    "X": "ХΧ",
+    "Y": "УΥ",
+    "Z": "Ζ",
+}
+_CONFUSABLES = str.maketrans({ch: ascii_ch for ascii_ch, chars in CONFUSABLES.items() for ch in chars})
+
+
+def _skeleton_form(ch: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", ch)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return unicodedata.normalize("NFKC", stripped.translate(_CONFUSABLES))
+
+
+def _fold_form(ch: str) -> str:
+    return _skeleton_form(ch).casefold()
+
+
+class _Table(dict):
+    """Code point -> replacement for str.translate, filled in as characters are seen."""
+
+    def __init__(self, form, prefill: dict):
+        super().__init__(prefill)
+        self.form = form
+
+    def __missing__(self, code: int) -> str:
+        replacement = self.form(chr(code))
+        if len(self) < CACHE_LIMIT:
+            self[code] = replacement
+        return replacement
+
+
+_PREFILL = {code: _skeleton_form(chr(code)) for code in range(256)}
+_PREFILL.update((ord(ch), _skeleton_form(ch)) for chars in CONFUSABLES.values() for ch in chars)
+_SKELETON = _Table(_skeleton_form, _PREFILL)
+_FOLD = _Table(_fold_form, {code: replacement.casefold() for code, replacement in _PREFILL.items()})
+
+
+def _last_call_cache(form):
+    """
+    Remember the result of the last call of a one-argument function (text -> form of it).
+
+    The slot is one tuple, replaced in a single assignment, so threads can share it: a thread
+    that reads another's password just misses.
+    """
+    last = (None, None)
+
+    @wraps(form)
+    def cached(text):
+        nonlocal last
+        key, value = last
+        if key == text:
+            return value
+        value = form(text)
+        last = (text, value)
+        return value
+    return cached
+
+
+@_last_call_cache
+def _skeleton(text: str) -> str:
+    return text.translate(_SKELETON)
+
+
+@_last_call_cache
+def _fold(text: str) -> str:
+    return _skeleton(text).casefold()
+
+
+def skeleton(text: str) -> str:
+    """text with compatibility forms, accents and lookalike letters replaced, case kept (see the module docstring)."""
+    if text.isascii():
+        return text
+    return _skeleton(text)
+
+
+def fold(text: str) -> str:
+    """skeleton(text), casefolded: the form the blacklist and dictionary compare."""
+    if text.isascii():
+        return text.lower()
+    return _fold(text)
+
+
+def skeleton_char(ch: str) -> str:
+    """skeleton of one character, a table lookup (for callers that see text a character at a time)."""
+    return _SKELETON[ord(ch)]
+
+
+def fold_char(ch: str) -> str:
+    """fold of one character, a table lookup."""
+    return _FOLD[ord(ch)]
@@ -0,0 +1,91 @@
+"""
+Parallel audit engine: scores a password corpus on several CPU cores at once.
+
+The corpus is cut into chunks, every chunk is scored with evaluate_many in a worker
+process, and the chunk results come back in input order. Only a few chunks per worker
+are in flight at a time, so the input can be a lazy iterable (eg. a huge file).
+"""
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import blacklist
+from evaluator import evaluate_many, ResultTable
+from policy import current_policy
+
+DEFAULT_CHUNK_SIZE = 5000   # big enough that pickling a chunk is cheap next to scoring it
+CHUNKS_PER_WORKER = 2       # chunks queued per worker, keeps every core busy without reading ahead too far
+
+
+def _init_worker():
+    """Runs once per worker process, so the blacklist is loaded per worker and not per task."""
+    if not blacklist.is_loaded():
+        blacklist.load_blacklist()
+
+
+def _chunks(passwords, chunk_size: int):
+    it = iter(passwords)
+    while True:
+        chunk = list(islice(it, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_audit_parallel(passwords, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, policy=None):
+    """
+    Score passwords on a process pool and yield one ResultTable per chunk, in input order.
+
+    Args:
+        passwords: Any iterable of password strings. It is read lazily, chunk by chunk.
+        workers (int): Number of worker processes (default: all CPU cores). 1 scores in this process.
+        chunk_size (int): Passwords per task sent to a worker.
+        policy (Policy): Scoring policy, the current default when None.
+
+    Yields:
+        ResultTable: Results for each chunk, in the same order as the input.
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers < 1 or chunk_size < 1:
+        raise ValueError("workers and chunk_size must be at least 1")
+
+    chunks = _chunks(passwords, chunk_size)
+    policy = policy or current_policy()  # resolved here, workers don't see this process's default
+
+    if workers == 1:
+        for chunk in chunks:
+            yield evaluate_many(chunk, policy)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = deque()
+        for chunk in islice(chunks, workers * CHUNKS_PER_WORKER):
+            pending.append(pool.submit(evaluate_many, chunk, policy))
+
+        # waiting on the oldest future first is what keeps the output in input order
+        while pending:
+            result = pending.popleft().result()
+            for chunk in islice(chunks, 1):
+                pending.append(pool.submit(evaluate_many, chunk, policy))
+            yield result
+
+
+def audit_parallel(passwords, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE, policy=None) -> ResultTable:
+    """
+    Score a whole corpus on a process pool.
+
+    Args:
+        passwords: Any iterable of password strings.
+        workers (int): Number of worker processes (default: all CPU cores).
+        chunk_size (int): Passwords per task sent to a worker.
+        policy (Policy): Scoring policy, the current default when None.
+
+    Returns:
+        ResultTable: Columnar results for every password, in input order.
+    """
+    policy = policy or current_policy()
+    out = ResultTable(policy)
+    for result in iter_audit_parallel(passwords, workers, chunk_size, policy):
+        out.extend(result)
+    return out
@@ -1,4 +1,13 @@
+from collections import deque
+
+from dictionary import has_dictionary_word
+from normalize import skeleton, skeleton_char
+
+# Every check here looks at normalize.skeleton(password): fullwidth, accented and lookalike letters
+# count as the ASCII letters they stand for, so "ａｂｃ" is a sequence and "ԛwerty" a keyboard walk.
+
 def has_repetition(password:str) -> bool:  # in order to check repetitive characters in the password, eg. 111 , xxx etc.
+    password = skeleton(password)
     if len(password)<3:
         return False
     count=1
@@ -13,6 +22,7 @@ def has_repetition(password:str) -> bool:  # in order to check repetitive charac
     return False
 
 def has_sequence(password:str) -> bool:  #checking if there are character or number sequences like abc, 123 etc. using ASCII vlaues
+    password = skeleton(password)
     if len(password)<3:
         return False
     for i in range(0, len(password)-2):
@@ -25,28 +35,181 @@ def has_sequence(password:str) -> bool:  #checking if there are character or num
             return True
     return False
 
+# common keyboard walks, matched case-insensitively anywhere in the password
+KEYBOARD_PATTERNS = ("qwerty", "asdfg", "asdf", "qwer", "qwert", "hjkl", "zxcv")
+
 def has_keyboard_pattern(password: str) -> bool: #checking for common patterns like keyboard sequences qwerty , asdfgh, hjkl etc etc. 
-    weak_patterns = ["qwerty", "asdfg", "asdf", "qwer", "qwert", "hjkl", "zxcv"]
-    pw_lower = password.lower()
+    pw_lower = skeleton(password).lower()
 
-    for i in weak_patterns:
+    for i in KEYBOARD_PATTERNS:
         if i in pw_lower:
             return True
     return False
 
-def check_patterns(password: str) -> list:  #returning the list of all the characterestics of password based on above defined functions 
-                                            # eg. if a password is 'abc123qwerty', it satisfies all 3 of above functions hence the list would contain al 3 keywords.
-                                            # similarly, if password is something like 'abctesting' it would only return True for the has_sequence function.
-    patterns_found = []
+# Bit values for each pattern, used where a compact int is handier than a list (eg. evaluate_many)
+REPETITION = 1
+SEQUENCE = 2
+KEYBOARD_PATTERN = 4
+DICTIONARY_WORD = 8  # a word from dictionary.py inside the password, scored with its own penalty
+
+PATTERN_LABELS = (
+    (REPETITION, "repetition"),
+    (SEQUENCE, "sequence"),
+    (KEYBOARD_PATTERN, "keyboard_pattern"),
+    (DICTIONARY_WORD, "dictionary_word"),
+)
+
+def build_keyboard_automaton(patterns) -> tuple:
+    """
+    Compile keyboard patterns into an Aho-Corasick automaton, expanded to a full transition table.
+
+    Scanning is then one dict lookup per character however many patterns there are, so
+    hundreds of keyboard walks or leetspeak variants cost the same as seven.
+
+    Args:
+        patterns: Iterable of pattern strings, matched case-insensitively.
+
+    Returns:
+        tuple: (transitions, accepting) where transitions[state] maps a character to the next state
+        (missing characters go back to state 0) and accepting[state] is True once a pattern has matched.
+    """
+    goto = [{}]
+    accepting = [False]
+    for pattern in patterns:
+        state = 0
+        for ch in pattern.lower():
+            if ch not in goto[state]:
+                goto.append({})
+                accepting.append(False)
+                goto[state][ch] = len(goto) - 1
+            state = goto[state][ch]
+        accepting[state] = True
+
+    alphabet = {ch for state in goto for ch in state}
+    transitions = [{} for _ in goto]
+    fail = [0] * len(goto)
+    queue = deque()
+    for ch in alphabet:
+        nxt = goto[0].get(ch, 0)
+        transitions[0][ch] = nxt
+        if nxt:
+            queue.append(nxt)
+
+    # breadth first, so the fail state of every state is complete before it is used
+    while queue:
+        state = queue.popleft()
+        accepting[state] = accepting[state] or accepting[fail[state]]
+        for ch in alphabet:
+            nxt = goto[state].get(ch)
+            if nxt is None:
+                transitions[state][ch] = transitions[fail[state]][ch]
+            else:
+                fail[nxt] = transitions[fail[state]][ch]
+                transitions[state][ch] = nxt
+                queue.append(nxt)
+
+    # upper case ASCII letters go where their lower case twins go, so the scan doesn't have to lower() them
+    for table in transitions:
+        for ch in list(table):
+            if ch.isascii() and ch.upper() != ch:
+                table[ch.upper()] = table[ch]
+
+    return transitions, accepting
+
 
-    if has_repetition(password):
-        patterns_found.append("repetition")
+KEYBOARD_AUTOMATON = build_keyboard_automaton(KEYBOARD_PATTERNS)
 
-    if has_sequence(password):
-        patterns_found.append("sequence")
+# Scanner state before the first character: (previous code point, run, ascending, descending, automaton state, mask)
+SCAN_START = (-10, 0, 0, 0, 0, 0)
 
-    if has_keyboard_pattern(password):
-        patterns_found.append("keyboard_pattern")
+def scan_patterns(password: str, automaton: tuple = None) -> int:
+    """
+    Detect repetition, sequences and keyboard patterns in a single pass over the password.
 
-    return patterns_found
+    Gives exactly the same answers as has_repetition, has_sequence and has_keyboard_pattern,
+    but keeps the current run lengths and the keyboard automaton state as it goes instead of
+    walking the password three times. Like them it scans normalize.skeleton(password). It runs
+    the same loop as advance_scan, over the whole password, so the two can't disagree.
 
+    Args:
+        password (str): The password string to evaluate.
+        automaton (tuple): Keyboard automaton from build_keyboard_automaton (default KEYBOARD_AUTOMATON).
+
+    Returns:
+        int: Bitmask of REPETITION, SEQUENCE and KEYBOARD_PATTERN.
+    """
+    return _scan(SCAN_START, skeleton(password), automaton or KEYBOARD_AUTOMATON)[5]
+
+def advance_scan(scan_state: tuple, ch: str, automaton: tuple = None) -> tuple:
+    """
+    Feed one more character to the pattern scanner, for callers that see the password a character at a time.
+
+    Does exactly what scan_patterns does for the character, on an explicit state tuple that starts
+    as SCAN_START: normalize.skeleton works a character at a time, so feeding the characters one by
+    one scans the same text. The last item of the returned state is the pattern bitmask so far.
+    """
+    # a non-ASCII character may normalize to nothing (a combining mark) or to several (eg. a ligature)
+    return _scan(scan_state, ch if ch.isascii() else skeleton_char(ch), automaton or KEYBOARD_AUTOMATON)
+
+def _scan(scan_state: tuple, text: str, automaton: tuple) -> tuple:
+    """The scanner itself, shared by scan_patterns (the whole password) and advance_scan (one character)."""
+    transitions, accepting = automaton
+    prev, run, ascending, descending, state, mask = scan_state
+
+    for ch in text:
+        cp = ord(ch)
+        step = cp - prev
+        prev = cp
+
+        # one comparison chain keeps the repetition (aaa) and sequence (abc, 321) run lengths
+        if step == 0:
+            run += 1
+            ascending = descending = 1
+            if run >= 3:
+                mask |= REPETITION
+        elif step == 1:
+            ascending += 1
+            run = descending = 1
+            if ascending >= 3:
+                mask |= SEQUENCE
+        elif step == -1:
+            descending += 1
+            run = ascending = 1
+            if descending >= 3:
+                mask |= SEQUENCE
+        else:
+            run = ascending = descending = 1
+
+        # keyboard patterns, until one is found
+        if not mask & KEYBOARD_PATTERN:
+            nxt = transitions[state].get(ch)
+            if nxt is None:
+                nxt = 0
+                if cp >= 128:
+                    nxt = state
+                    for lower in ch.lower():  # eg. the Kelvin sign lower cases to 'k'
+                        nxt = transitions[nxt].get(lower, 0)
+                        if accepting[nxt]:
+                            break
+            state = nxt
+            if accepting[state]:
+                mask |= KEYBOARD_PATTERN
+
+        if mask == 7:  # everything found already, and the mask only grows
+            break
+
+    return prev, run, ascending, descending, state, mask
+
+def pattern_mask(password: str) -> int:  #same checks as check_patterns but returned as a bitmask of the values above
+    mask = scan_patterns(password)
+    if has_dictionary_word(password):
+        mask |= DICTIONARY_WORD
+    return mask
+
+def pattern_labels(mask: int) -> list:  #turns a bitmask from pattern_mask back into the list of keywords
+    return [label for bit, label in PATTERN_LABELS if mask & bit]
+
+def check_patterns(password: str) -> list:  #returning the list of all the characterestics of password based on above defined functions 
+                                            # eg. if a password is 'abc123qwerty', it satisfies all 3 of above functions hence the list would contain al 3 keywords.
+                                            # similarly, if password is something like 'abctesting' it would only return True for the has_sequence function.
+    return pattern_labels(pattern_mask(password))
@@ -0,0 +1,332 @@
+"""
+Scoring policies: the thresholds, weights and penalties behind a password's score.
+
+A policy is a plain dict (or a JSON file) like DEFAULT_POLICY below. compile_policy turns it
+into a Policy once, with lookup tables in place of if-chains, so scoring a password is a few
+indexing operations. Policies are immutable after compiling; several can be registered (eg.
+one per tenant) and the default can be swapped at runtime with set_default_policy, without
+reloading any module.
+
+Print the default policy as a starting point for your own file:
+    python policy.py > my_policy.json
+Check a policy file (files only need the keys they change):
+    python policy.py my_policy.json
+"""
+import copy
+import math
+import threading
+
+from charclass import HAS_UPPER, HAS_LOWER, HAS_DIGIT, HAS_SYMBOL, HAS_SPACE, HAS_NON_ASCII, HAS_EMOJI
+from patterns import REPETITION, SEQUENCE, KEYBOARD_PATTERN, DICTIONARY_WORD
+
+# Bit flags for the blacklist check and the input size limit, next to the character class bits
+# of charclass.py (all re-exported by evaluator)
+IS_COMMON = 16
+TRUNCATED = 32  # longer than the policy's max_length, only the prefix was analysed
+
+# Strength labels, indexed by the codes stored in ResultTable.strength
+STRENGTH_LABELS = ("Weak", "Medium", "Strong")
+
+MAX_SCORE = 100
+
+DEFAULT_POLICY = {
+    "name": "default",
+    "version": 4,
+    # characters analysed; longer passwords are scored on this prefix and flagged truncated (null: no limit)
+    "max_length": 256,
+    # points for the first rule the password meets, top to bottom; a rule without a condition always matches
+    "length": [
+        {"min": 11, "points": 30},
+        {"min": 7, "points": 20},
+        {"points": 5},
+    ],
+    # points per character class present; spaces and emoji count as symbols too, non_ascii are letters like é or ж
+    "classes": {"upper": 15, "lower": 15, "digit": 15, "symbol": 15, "space": 0, "non_ascii": 0, "emoji": 0},
+    "entropy": [
+        {"above": 60, "points": 20},
+        {"above": 40, "points": 10},
+        {"points": 5},
+    ],
+    # "patterns": repetition, sequences or keyboard walks; "dictionary": an embedded dictionary word
+    "penalties": {"common": 40, "patterns": 20, "dictionary": 20},
+    # a blacklisted password scores at most this much (null: only the penalty applies)
+    "common_max_score": None,
+    # lowest score for each label above Weak
+    "strength": {"Strong": 80, "Medium": 50},
+    # thresholds only used for the GUI's recommendations
+    "advice": {"min_entropy": 29},
+}
+
+_CLASS_NAMES = (("upper", HAS_UPPER), ("lower", HAS_LOWER), ("digit", HAS_DIGIT), ("symbol", HAS_SYMBOL),
+                ("space", HAS_SPACE), ("non_ascii", HAS_NON_ASCII), ("emoji", HAS_EMOJI))
+# index into the class points table: the four base class bits as they are, the 64/128/256 ones
+# shifted down next to them (IS_COMMON and TRUNCATED fall out of the mask)
+_CLASS_INDEX = "(flags & 15 | flags >> 2 & 112)"
+_STRUCTURAL_PATTERNS = REPETITION | SEQUENCE | KEYBOARD_PATTERN  # what the "patterns" penalty covers
+
+
+def merge_policy(spec: dict, base: dict = None) -> dict:
+    """
+    A full policy spec from a partial one: keys missing from spec come from base (default DEFAULT_POLICY).
+
+    Dict values (eg. "penalties") are merged key by key, everything else is replaced.
+    """
+    merged = copy.deepcopy(base or DEFAULT_POLICY)
+    for key, value in spec.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key].update(value)
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+class Policy:
+    """
+    A compiled scoring policy. Build one with compile_policy or load_policy.
+
+    score(length, flags, entropy_value, patterns) returns the score (0-100), strength_code(score)
+    the index into STRENGTH_LABELS for it.
+
+    Attributes:
+        name (str): Policy name, used by register_policy / get_policy.
+        version: The spec's "version", changes whenever scores may change.
+        fingerprint (str): Hash of the whole spec, changes with any edit.
+        spec (dict): The full spec the policy was compiled from (don't modify).
+        max_length (int): Characters analysed per password, None for no limit.
+        min_length, good_length, min_entropy: Thresholds for recommendations.
+        strong_score (int): Lowest score labelled Strong (the generator's default target).
+    """
+
+    def __init__(self, spec: dict):
+        self.spec = spec
+        self.name = str(spec["name"])
+        self.version = spec["version"]
+        self._fingerprint = None
+
+        max_length = spec.get("max_length")
+        self.max_length = None if max_length is None else int(max_length)
+        if self.max_length is not None and self.max_length < 1:
+            raise ValueError("max_length must be at least 1 (or null for no limit)")
+
+        # length -> points for every length up to the highest threshold, longer passwords use the last entry
+        length_rules = [(None if rule.get("min") is None else int(rule["min"]), int(rule["points"])) for rule in spec["length"]]
+        top = max([m for m, _ in length_rules if m is not None] + [0])
+        self._length_points = tuple(_first_match(length_rules, lambda m: m is None or n >= m) for n in range(top + 1))
+
+        # class index (see _CLASS_INDEX) -> points for the classes present
+        classes = spec["classes"]
+        unknown = set(classes) - {name for name, _ in _CLASS_NAMES}
+        if unknown:
+            raise ValueError(f"unknown character classes in policy: {sorted(unknown)}")
+        self._class_points = tuple(
+            sum(int(classes.get(name, 0)) for name, bit in _CLASS_NAMES if _class_index(bit) & index)
+            for index in range(128)
+        )
+
+        # (threshold or None, points), checked in order
+        self._entropy_rules = tuple((None if rule.get("above") is None else float(rule["above"]), int(rule["points"]))
+                                    for rule in spec["entropy"])
+        if any(above is not None and not math.isfinite(above) for above, _ in self._entropy_rules):
+            raise ValueError("entropy thresholds must be finite numbers")
+        entropy_points = [points for _, points in self._entropy_rules]
+        if all(above is not None for above, _ in self._entropy_rules):
+            entropy_points.append(0)  # no catch-all rule, low entropy earns nothing
+        self._entropy_range = (min(entropy_points), max(entropy_points))
+
+        penalties = spec["penalties"]
+        self._common_penalty = int(penalties.get("common", 0))
+        self._pattern_penalty = int(penalties.get("patterns", 0))
+        self._dictionary_penalty = int(penalties.get("dictionary", 0))
+        cap = spec.get("common_max_score")
+        self._common_cap = MAX_SCORE if cap is None else max(0, min(int(cap), MAX_SCORE))
+
+        # score -> strength code
+        strong, medium = int(spec["strength"]["Strong"]), int(spec["strength"]["Medium"])
+        if medium > strong:
+            raise ValueError("the Medium threshold must not be above the Strong one")
+        self._codes = tuple(2 if s >= strong else 1 if s >= medium else 0 for s in range(MAX_SCORE + 1))
+        self.strong_score = strong
+
+        # recommendations: the lowest and highest length thresholds
+        minimums = sorted(m for m, _ in length_rules if m)
+        self.min_length = minimums[0] if minimums else 0
+        self.good_length = minimums[-1] if minimums else 0
+        self.min_entropy = spec.get("advice", {}).get("min_entropy", 0)
+
+        self.score = self._compile_score()
+        self.strength_code = self._codes.__getitem__
+
+    def __repr__(self):
+        return f"<Policy {self.name!r} version {self.version!r}>"
+
+    @property
+    def fingerprint(self) -> str:
+        if self._fingerprint is None:
+            # imported here, hashing the spec is rare and evaluator imports this module
+            import hashlib
+            import json
+            canonical = json.dumps(self.spec, sort_keys=True, separators=(",", ":"))
+            self._fingerprint = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+        return self._fingerprint
+
+    def __reduce__(self):
+        # the compiled closures can't be pickled, worker processes compile the spec again
+        return Policy, (self.spec,)
+
+    def _compile_score(self):
+        """
+        Generate the score function: the entropy rules become an if/elif chain and the length and
+        class points table lookups, with every constant inlined. Only numbers taken through int()
+        or float() end up in the generated source.
+        """
+        lines = [
+            "def score(length, flags, entropy_value, patterns):",
+            f"    points = LENGTH_POINTS[length if length < {len(self._length_points) - 1} else {len(self._length_points) - 1}]"
+            f" + CLASS_POINTS[{_CLASS_INDEX}]",
+        ]
+        keyword = "if"
+        for above, points in self._entropy_rules:
+            if above is None:
+                lines.append("    else:" if keyword == "elif" else "    if True:")
+            else:
+                lines.append(f"    {keyword} entropy_value > {float(above)!r}:")
+            lines.append(f"        points += {points}")
+            if above is None:
+                break
+            keyword = "elif"
+        if self._pattern_penalty:
+            lines += [f"    if patterns & {_STRUCTURAL_PATTERNS}:", f"        points -= {self._pattern_penalty}"]
+        if self._dictionary_penalty:
+            lines += [f"    if patterns & {DICTIONARY_WORD}:", f"        points -= {self._dictionary_penalty}"]
+        lines += [
+            f"    if flags & {IS_COMMON}:",
+            f"        points -= {self._common_penalty}",
+            f"        if points > {self._common_cap}:",
+            f"            return {self._common_cap}",
+            f"    if points > {MAX_SCORE}:",
+            f"        return {MAX_SCORE}",
+            "    return points if points > 0 else 0",
+        ]
+        namespace = {"LENGTH_POINTS": self._length_points, "CLASS_POINTS": self._class_points}
+        exec(compile("\n".join(lines), f"<policy {self.name}>", "exec"), namespace)
+        return namespace["score"]
+
+    def partial_score(self, length: int, flags: int) -> int:
+        """Points from the length, character classes and blacklist alone (no clamping)."""
+        table = self._length_points
+        score = table[length] if length < len(table) else table[-1]
+        score += self._class_points[_class_index(flags)]
+        if flags & IS_COMMON:
+            score -= self._common_penalty
+        return score
+
+    def best_score(self, length: int, flags: int) -> int:
+        """The highest score a password of this length and these flags can get: no patterns, no repeated character."""
+        most_entropy = length * math.log2(length) if length > 1 else 0.0
+        cap = self._common_cap if flags & IS_COMMON else MAX_SCORE
+        return max(0, min(self.partial_score(length, flags) + self.entropy_points(most_entropy), cap))
+
+    def entropy_points(self, entropy_value: float) -> int:
+        for above, points in self._entropy_rules:
+            if above is None or entropy_value > above:
+                return points
+        return 0
+
+    def pinned_code(self, partial: int, flags: int, entropy_known: bool) -> int:
+        """
+        The strength code if the remaining stages can't change it, else None.
+
+        Args:
+            partial (int): partial_score, plus entropy_points when entropy_known.
+            flags (int): HAS_* / IS_COMMON flags.
+            entropy_known (bool): Whether the entropy points are already in partial.
+        """
+        low = partial - self._pattern_penalty - self._dictionary_penalty
+        high = partial
+        if not entropy_known:
+            low += self._entropy_range[0]
+            high += self._entropy_range[1]
+        cap = self._common_cap if flags & IS_COMMON else MAX_SCORE
+        code = self._codes[max(0, min(low, cap))]
+        return code if code == self._codes[max(0, min(high, cap))] else None
+
+
+def _class_index(flags: int) -> int:
+    """_CLASS_INDEX, for the code that isn't generated."""
+    return flags & 15 | flags >> 2 & 112
+
+
+def _first_match(rules, condition) -> int:
+    for threshold, points in rules:
+        if condition(threshold):
+            return points
+    return 0
+
+
+def compile_policy(spec: dict) -> Policy:
+    """
+    Compile a policy spec (merged over DEFAULT_POLICY, so partial specs are fine).
+
+    Raises:
+        ValueError: The spec is malformed.
+    """
+    try:
+        return Policy(merge_policy(spec))
+    except (KeyError, TypeError, AttributeError) as e:
+        raise ValueError(f"invalid policy: {e!r}") from e
+
+
+def load_policy(path: str) -> Policy:
+    """Compile a policy from a JSON file."""
+    import json
+    with open(path, "r", encoding="utf-8") as f:
+        return compile_policy(json.load(f))
+
+
+# Registered policies by name, and the one used when callers don't pass a policy
+_lock = threading.Lock()
+_default = compile_policy({})
+_policies = {_default.name: _default}
+
+
+def current_policy() -> Policy:
+    """The policy used when no policy is passed to evaluate_password and friends."""
+    return _default
+
+
+def register_policy(policy: Policy) -> Policy:
+    """Make a policy available by name to get_policy (replaces a policy of the same name)."""
+    with _lock:
+        _policies[policy.name] = policy
+    return policy
+
+
+def get_policy(name: str = None) -> Policy:
+    """
+    A registered policy by name, or the current default.
+
+    Raises:
+        KeyError: No policy of that name is registered.
+    """
+    if name is None:
+        return _default
+    return _policies[name]
+
+
+def set_default_policy(policy) -> Policy:
+    """Swap the default policy (a Policy, or the name of a registered one). Takes effect for the next evaluation."""
+    global _default
+    with _lock:
+        if not isinstance(policy, Policy):
+            policy = _policies[policy]
+        _policies[policy.name] = policy
+        _default = policy
+    return policy
+
+
+if __name__ == "__main__":
+    import json
+    import sys
+    spec = load_policy(sys.argv[1]).spec if len(sys.argv) > 1 else DEFAULT_POLICY
+    json.dump(spec, sys.stdout, indent=2)
+    sys.stdout.write("\n")
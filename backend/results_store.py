@@ -0,0 +1,276 @@
+"""
+Persistent results store: evaluation results on disk (SQLite), so re-runs skip what was already scored.
+
+Results are keyed on a salted hash of the password, never the password: a 16 byte HMAC-SHA256
+under the store's key. The key is random and kept in the database unless one is passed in. Pass
+your own (eg. from a file next to, not inside, the store) when the store may leave the machine.
+Without the key, telling which passwords are in the store takes a guess per candidate, like any
+salted hash, but HMAC is fast: the store is no place for secrets that aren't worth that much.
+
+Every result is stored under a scoring context: the policy (name, version and fingerprint of
+its spec), the blacklist files and range server, the dictionary, the year the guess estimate
+counts from (guesses.REFERENCE_YEAR) and ANALYSIS_VERSION. Lookups only see results of the
+current context. Swapping the policy, ingesting a new breach dump, rebuilding the dictionary or
+a new year makes the old results misses, and they are scored again. prune()
+drops results of other contexts.
+
+    store = ResultStore("results.db")
+    table = store.evaluate_many(passwords)   # ResultTable, only the misses are scored
+    store.close()
+
+Checkpoints (named JSON states, saved in the same file) let a long job such as audit.py
+--store resume where it stopped.
+
+Command line, from the backend folder:
+    python results_store.py info results.db
+    python results_store.py prune results.db     # keep only results of the current context
+"""
+import hashlib
+import hmac
+import json
+import secrets
+import sqlite3
+import sys
+import time
+
+import blacklist
+import guesses
+from dictionary import get_automaton
+from evaluator import evaluate_many, PasswordResult, ResultTable
+from policy import current_policy
+
+# Bump when the analysis changes what it reports for the same password and policy (new detector, new field).
+ANALYSIS_VERSION = 4
+DIGEST_SIZE = 16
+LOOKUP_BATCH = 500   # digests per SELECT, under SQLite's bound parameter limit
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value BLOB NOT NULL);
+CREATE TABLE IF NOT EXISTS contexts (id INTEGER PRIMARY KEY, description TEXT NOT NULL UNIQUE, created REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS results (
+    context INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    length INTEGER NOT NULL,
+    flags INTEGER NOT NULL,
+    patterns INTEGER NOT NULL,
+    entropy REAL NOT NULL,
+    guesses REAL NOT NULL,
+    score INTEGER NOT NULL,
+    strength INTEGER NOT NULL,
+    PRIMARY KEY (context, digest)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS checkpoints (name TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL NOT NULL);
+"""
+# a check value stored in place of the key when the key is passed in, so a wrong key is caught
+_KEY_CHECK = b"password-strength-checker results store"
+
+
+def scoring_context(policy=None) -> str:
+    """Description of everything besides the password that a result depends on (JSON, stable for equal contexts)."""
+    policy = policy or current_policy()
+    lists = blacklist.info()
+    return json.dumps({
+        "analysis": ANALYSIS_VERSION,
+        "policy": [policy.name, policy.version, policy.fingerprint],
+        "blacklist": [lists["version"], lists["fingerprint"], lists["remote"]],
+        "dictionary": get_automaton().fingerprint,
+        "reference_year": guesses.REFERENCE_YEAR,
+    }, sort_keys=True, separators=(",", ":"))
+
+
+class ResultStore:
+    """
+    Results on disk, keyed on a salted hash of the password and the scoring context. Not thread-safe:
+    use one store per thread (several processes can share the file, SQLite locks it).
+
+    Args:
+        path (str): Database file, created if missing.
+        key (bytes): HMAC key. None uses the store's own random key (created with the file).
+
+    Raises:
+        ValueError: key doesn't match the key the store was created with.
+    """
+
+    def __init__(self, path: str, key: bytes = None):
+        self.path = path
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._key = self._init_key(key)
+        self._contexts = {}  # description -> id
+        self.hits = 0
+        self.misses = 0
+
+    def _init_key(self, key: bytes) -> bytes:
+        row = self._db.execute("SELECT value FROM meta WHERE name = 'key'").fetchone()
+        check = None if key is None else hmac.new(key, _KEY_CHECK, hashlib.sha256).digest()
+        if row is None:
+            with self._db:
+                if key is None:
+                    key = secrets.token_bytes(32)
+                    self._db.execute("INSERT INTO meta VALUES ('key', ?)", (key,))
+                else:
+                    self._db.execute("INSERT INTO meta VALUES ('key_check', ?)", (check,))
+                    self._db.execute("INSERT INTO meta VALUES ('key', x'')", ())
+            return key
+        if row[0]:  # the store keeps its own key
+            if key is not None and key != row[0]:
+                raise ValueError(f"{self.path} was created with another key")
+            return row[0]
+        stored = self._db.execute("SELECT value FROM meta WHERE name = 'key_check'").fetchone()
+        if key is None or not hmac.compare_digest(stored[0], check):
+            raise ValueError(f"{self.path} needs the key it was created with")
+        return key
+
+    def digest(self, password: str) -> bytes:
+        return hmac.new(self._key, password.encode("utf-8", "surrogatepass"), hashlib.sha256).digest()[:DIGEST_SIZE]
+
+    def context_id(self, policy=None) -> int:
+        """Id of the current scoring context (see scoring_context), added on first use."""
+        description = scoring_context(policy)
+        context = self._contexts.get(description)
+        if context is None:
+            with self._db:
+                self._db.execute("INSERT OR IGNORE INTO contexts (description, created) VALUES (?, ?)",
+                                 (description, time.time()))
+            context = self._db.execute("SELECT id FROM contexts WHERE description = ?", (description,)).fetchone()[0]
+            self._contexts[description] = context
+        return context
+
+    def lookup_many(self, passwords, policy=None) -> list:
+        """Stored results for the passwords, in order, None where there is none for the current context."""
+        passwords = list(passwords)
+        digests = [self.digest(p) for p in passwords]
+        found = self._fetch(self.context_id(policy), digests)
+        results = [found.get(d) for d in digests]
+        hits = sum(1 for r in results if r is not None)
+        self.hits += hits
+        self.misses += len(results) - hits
+        return results
+
+    def _fetch(self, context: int, digests: list) -> dict:
+        found = {}
+        unique = list(dict.fromkeys(digests))
+        for i in range(0, len(unique), LOOKUP_BATCH):
+            chunk = unique[i:i + LOOKUP_BATCH]
+            rows = self._db.execute(
+                "SELECT digest, length, flags, patterns, entropy, guesses, score, strength FROM results"
+                f" WHERE context = ? AND digest IN ({','.join('?' * len(chunk))})", [context] + chunk)
+            for digest, *fields in rows:
+                found[digest] = PasswordResult(*fields)
+        return found
+
+    def store_many(self, passwords, results, policy=None):
+        """Save results (PasswordResults, eg. rows of a ResultTable) for the passwords, in one transaction."""
+        self._insert(self.context_id(policy), [self.digest(p) for p in passwords], results)
+
+    def _insert(self, context: int, digests, results):
+        rows = [(context, digest, r.length, r.flags, r.pattern_mask, r.entropy, r.guesses_log10, r.score,
+                 r.strength_code) for digest, r in zip(digests, results)]
+        with self._db:
+            self._db.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def evaluate_many(self, passwords, policy=None) -> ResultTable:
+        """
+        Same as evaluator.evaluate_many, but stored results are reused and new ones are stored.
+
+        Args:
+            passwords: Password strings. A list is best, the whole batch is held in memory.
+            policy (Policy): Scoring policy, the current default when None.
+
+        Returns:
+            ResultTable: Results in input order.
+        """
+        policy = policy or current_policy()
+        passwords = list(passwords)
+        context = self.context_id(policy)
+        digests = [self.digest(p) for p in passwords]
+        found = self._fetch(context, digests)
+
+        missing = {}  # digest -> password, repeats in the batch are scored once
+        for digest, password in zip(digests, passwords):
+            if digest not in found:
+                missing.setdefault(digest, password)
+        if missing:
+            scored = evaluate_many(missing.values(), policy)
+            self._insert(context, missing, scored)
+            found.update(zip(missing, scored))
+
+        out = ResultTable(policy)
+        for digest in digests:
+            out.append(found[digest])
+        self.misses += len(missing)
+        self.hits += len(passwords) - len(missing)
+        return out
+
+    def save_checkpoint(self, name: str, state: dict):
+        """Save a job's state (JSON-serializable) under a name, replacing the previous one."""
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)", (name, json.dumps(state), time.time()))
+
+    def checkpoint(self, name: str):
+        """The last state saved under name, None if there is none."""
+        row = self._db.execute("SELECT state FROM checkpoints WHERE name = ?", (name,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def clear_checkpoint(self, name: str):
+        with self._db:
+            self._db.execute("DELETE FROM checkpoints WHERE name = ?", (name,))
+
+    def prune(self, policy=None) -> int:
+        """Delete results of every context but the current one. Returns how many were deleted."""
+        context = self.context_id(policy)
+        with self._db:
+            deleted = self._db.execute("DELETE FROM results WHERE context != ?", (context,)).rowcount
+            self._db.execute("DELETE FROM contexts WHERE id != ?", (context,))
+        self._contexts = {d: c for d, c in self._contexts.items() if c == context}
+        return deleted
+
+    def stats(self) -> dict:
+        """Stored results per context and this session's hit/miss counters."""
+        contexts = self._db.execute(
+            "SELECT c.id, c.description, COUNT(r.digest) FROM contexts c LEFT JOIN results r ON r.context = c.id"
+            " GROUP BY c.id ORDER BY c.id").fetchall()
+        return {
+            "results": sum(count for _, _, count in contexts),
+            "contexts": [{"id": c, "context": json.loads(d), "results": count} for c, d, count in contexts],
+            "checkpoints": [name for name, in self._db.execute("SELECT name FROM checkpoints ORDER BY name")],
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or prune a results store.")
+    parser.add_argument("command", choices=("info", "prune"))
+    parser.add_argument("path", help="store file")
+    parser.add_argument("--policy", metavar="PATH", help="policy JSON file of the context to keep (default: the built-in policy)")
+    parser.add_argument("--key-file", metavar="PATH", help="file with the store's key, if it was created with one")
+    args = parser.parse_args(argv)
+
+    from policy import load_policy
+    policy = load_policy(args.policy) if args.policy else None
+    key = None
+    if args.key_file:
+        with open(args.key_file, "rb") as f:
+            key = f.read()
+    with ResultStore(args.path, key) as store:
+        if args.command == "prune":
+            print(f"deleted {store.prune(policy)} results of other contexts")
+        print(json.dumps(store.stats(), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +0,0 @@
-from evaluator import evaluate_password 
- 
-while True:
-    p = input("Enter password :")
-    print(evaluate_password(p))
-    print()
-
-
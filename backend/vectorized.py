@@ -0,0 +1,193 @@
+"""
+Optional NumPy engine that computes password features for a whole batch at once.
+
+The batch is packed into one padded 2-D array of code points (one row per password) and
+length, character class flags, Shannon entropy, repetition, sequences and keyboard patterns
+are computed with whole-array operations instead of per-character Python loops.
+
+The columns are equal to the scalar ones, not just close: flags to charclass.class_mask, patterns
+to patterns.pattern_mask and entropy to entropy.entropy_from_counts. For the entropy, each row's
+p * log2(p) terms come from math.log2 and are summed in the order a Counter of the password lists
+its characters (first occurrence), then rounded with round(), so no score can move across an
+entropy threshold. The dictionary bit of the patterns has no array form, it is the trie scan of
+dictionary.has_dictionary_word per password.
+
+NumPy is optional. Without it batch_features gives the same columns from the scalar functions.
+"""
+import math
+from collections import Counter
+
+from entropy import entropy_from_counts
+from normalize import skeleton_char
+from charclass import char_class, class_mask, HAS_UPPER, HAS_LOWER, HAS_DIGIT, HAS_SYMBOL, HAS_SPACE, HAS_NON_ASCII, HAS_EMOJI
+from dictionary import has_dictionary_word
+from patterns import pattern_mask, scan_patterns, KEYBOARD_PATTERNS, REPETITION, SEQUENCE, KEYBOARD_PATTERN, DICTIONARY_WORD
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency
+    np = None
+
+HAVE_NUMPY = np is not None
+
+# Passwords longer than this are scored with the scalar functions, so one huge password
+# doesn't blow up the padded array for the whole batch
+MAX_VECTOR_LENGTH = 256
+
+# Passwords packed into one array at a time
+CHUNK_SIZE = 65536
+
+_CODE_SPACE = 0x110000  # number of Unicode code points
+
+
+def _scalar_row(password: str) -> tuple:
+    counts = Counter(password)
+    return len(password), class_mask(counts), entropy_from_counts(counts, len(password)), pattern_mask(password)
+
+
+def _scalar_features(passwords) -> dict:
+    rows = [_scalar_row(p) for p in passwords]
+    return {name: [row[i] for row in rows] for i, name in enumerate(("length", "flags", "entropy", "patterns"))}
+
+
+def batch_features(passwords) -> dict:
+    """
+    Compute length, composition flags, entropy and pattern bitmask for a batch of passwords.
+
+    Args:
+        passwords: Sequence of password strings.
+
+    Returns:
+        dict: Columns "length", "flags" (HAS_* bits), "entropy" (bits) and "patterns"
+        (REPETITION | SEQUENCE | KEYBOARD_PATTERN | DICTIONARY_WORD), in input order. NumPy
+        arrays when NumPy is installed, plain lists otherwise.
+    """
+    passwords = list(passwords)
+    if not HAVE_NUMPY:
+        return _scalar_features(passwords)
+
+    n = len(passwords)
+    out = {
+        "length": np.zeros(n, dtype=np.int64),
+        "flags": np.zeros(n, dtype=np.uint16),
+        "entropy": np.zeros(n, dtype=np.float64),
+        "patterns": np.zeros(n, dtype=np.uint8),
+    }
+
+    short, long = [], []
+    for i, p in enumerate(passwords):
+        (short if len(p) <= MAX_VECTOR_LENGTH else long).append(i)
+
+    for start in range(0, len(short), CHUNK_SIZE):
+        rows = np.array(short[start:start + CHUNK_SIZE], dtype=np.int64)
+        chunk = _vector_features([passwords[i] for i in rows])
+        for name, column in chunk.items():
+            out[name][rows] = column
+
+    for i in long:
+        out["length"][i], out["flags"][i], out["entropy"][i], out["patterns"][i] = _scalar_row(passwords[i])
+
+    return out
+
+
+def _pack(passwords):
+    """Padded (rows, width) int64 array of code points, -1 after the end of each password, and the lengths."""
+    lengths = np.fromiter(map(len, passwords), dtype=np.int64, count=len(passwords))
+    width = max(int(lengths.max()) if len(passwords) else 0, 1)
+    flat = np.frombuffer("".join(passwords).encode("utf-32-le", "surrogatepass"), dtype="<u4").astype(np.int64)
+
+    rows = np.repeat(np.arange(len(passwords)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    cols = np.arange(len(flat)) - np.repeat(starts, lengths)
+
+    codes = np.full((len(passwords), width), -1, dtype=np.int64)
+    codes[rows, cols] = flat
+    return codes, lengths, flat, rows
+
+
+def _class_table(code_points):
+    """HAS_* bits for each distinct code point, from the same table the scalar check uses."""
+    return np.array([char_class(chr(cp)) for cp in code_points.tolist()], dtype=np.uint16)
+
+
+def _entropy(flat, rows, lengths):
+    """entropy_from_counts of every row, to the last bit: same terms, same order of additions, same rounding."""
+    n = len(lengths)
+    pairs, first, counts = np.unique(rows * _CODE_SPACE + flat, return_index=True, return_counts=True)
+    order = np.argsort(first, kind="stable")  # the rows' distinct characters in order of first occurrence
+    pair_rows = pairs[order] // _CODE_SPACE
+    counts = counts[order]
+    distinct = np.bincount(pair_rows, minlength=n)
+    slot = np.arange(len(pair_rows)) - (np.cumsum(distinct) - distinct)[pair_rows]
+
+    # p * log2(p) for each distinct (count, length): few of them, and math.log2 is what the scalar code calls
+    combos, which = np.unique(lengths[pair_rows] * (MAX_VECTOR_LENGTH + 1) + counts, return_inverse=True)
+    table = np.array([_term(combo % (MAX_VECTOR_LENGTH + 1), combo // (MAX_VECTOR_LENGTH + 1))
+                      for combo in combos.tolist()], dtype=np.float64)
+    terms = np.zeros((n, max(int(distinct.max()) if n else 0, 1)), dtype=np.float64)
+    terms[pair_rows, slot] = table[which]
+
+    entropy = np.zeros(n, dtype=np.float64)
+    for column in terms.T:  # one subtraction per distinct character, like the scalar loop (padding subtracts 0.0)
+        entropy -= column
+    return [round(h * length, 2) for h, length in zip(entropy.tolist(), lengths.tolist())]
+
+
+def _term(count: int, length: int) -> float:
+    p_x = count / length
+    return p_x * math.log2(p_x)
+
+
+def _vector_features(passwords) -> dict:
+    codes, lengths, flat, rows = _pack(passwords)
+    n, width = codes.shape
+    valid = np.arange(width)[None, :] < lengths[:, None]
+
+    # character classes: classify each distinct code point once, then OR the bits per row
+    distinct, inverse = np.unique(flat, return_inverse=True)
+    char_flags = _class_table(distinct)[inverse]
+    flags = np.zeros(n, dtype=np.uint16)
+    for bit in (HAS_UPPER, HAS_LOWER, HAS_DIGIT, HAS_SYMBOL, HAS_SPACE, HAS_NON_ASCII, HAS_EMOJI):
+        has = np.bincount(rows, weights=(char_flags & bit) > 0, minlength=n) > 0
+        flags |= np.where(has, bit, 0).astype(np.uint16)
+
+    entropy = _entropy(flat, rows, lengths)
+
+    # repetition and sequences over every window of three characters
+    patterns = np.zeros(n, dtype=np.uint8)
+    if width >= 3:
+        triple = valid[:, 2:]
+        steps = np.diff(codes, axis=1)
+        repeated = (steps[:, 1:] == 0) & (steps[:, :-1] == 0) & triple
+        ascending = (steps[:, 1:] == 1) & (steps[:, :-1] == 1) & triple
+        descending = (steps[:, 1:] == -1) & (steps[:, :-1] == -1) & triple
+        patterns |= np.where(repeated.any(axis=1), REPETITION, 0).astype(np.uint8)
+        patterns |= np.where((ascending | descending).any(axis=1), SEQUENCE, 0).astype(np.uint8)
+
+    # keyboard patterns: compare every window against each pattern on an ASCII-lowercased copy
+    lowered = np.where((codes >= 65) & (codes <= 90), codes + 32, codes)
+    keyboard = np.zeros(n, dtype=bool)
+    for pattern in KEYBOARD_PATTERNS:
+        size = len(pattern)
+        if size > width:
+            continue
+        match = np.ones((n, width - size + 1), dtype=bool)
+        for k, ch in enumerate(pattern):
+            match &= lowered[:, k:width - size + 1 + k] == ord(ch)
+        keyboard |= match.any(axis=1)
+
+    patterns |= np.where(keyboard, KEYBOARD_PATTERN, 0).astype(np.uint8)
+
+    # the scanner looks at normalize.skeleton, rows with characters it changes (fullwidth, accented,
+    # lookalike letters) or that lower() to ASCII or to several characters (eg. the Kelvin sign)
+    # can't be matched position by position on the code points, those few go through the scalar scanner
+    tricky = np.array([cp >= 128 and (skeleton_char(chr(cp)) != chr(cp) or len(chr(cp).lower()) != 1
+                                      or chr(cp).lower().isascii())
+                       for cp in distinct.tolist()], dtype=bool)
+    if tricky.any():
+        for i in np.unique(rows[tricky[inverse]]).tolist():
+            patterns[i] = scan_patterns(passwords[i])
+
+    patterns |= np.array([DICTIONARY_WORD if has_dictionary_word(p) else 0 for p in passwords], dtype=np.uint8)
+
+    return {"length": lengths, "flags": flags, "entropy": entropy, "patterns": patterns}
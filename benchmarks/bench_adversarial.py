@@ -0,0 +1,126 @@
+"""
+Adversarial-input benchmark: latency of every public entry point on huge and hostile strings.
+
+The inputs are multi-megabyte ASCII, astral-plane Unicode and long runs of combining characters,
+the kind of thing that gets pasted into a text box or posted to the service. Each entry point is
+timed on each input, and the run fails (exit status 1) when the 99th percentile latency is over
+the bound. The same inputs with no max_length show what the guardrail saves.
+
+Run from the repository root:
+    python benchmarks/bench_adversarial.py [--size CHARS] [--bound-ms MS] [--rounds N]
+"""
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from cache import EvaluationCache
+from evaluator import evaluate_password, evaluate_many, classify_password
+from incremental import IncrementalEvaluator
+from policy import compile_policy, current_policy
+
+DEFAULT_SIZE = 1 << 20       # characters per input
+DEFAULT_BOUND_MS = 50.0
+DEFAULT_ROUNDS = 5
+UNLIMITED_SIZE = 1 << 14     # inputs are cut to this for the run without max_length, it would take minutes otherwise
+
+
+def adversarial_inputs(size: int) -> dict:
+    rng = random.Random(size)
+    printable = string.ascii_letters + string.digits + string.punctuation
+    return {
+        "random ascii": "".join(rng.choice(printable) for _ in range(size)),
+        "one character": "a" * size,
+        "repeated word": ("password" * (size // 8 + 1))[:size],
+        "keyboard walks": ("qwerty1990" * (size // 10 + 1))[:size],
+        "cjk": "".join(chr(rng.randint(0x4E00, 0x9FFF)) for _ in range(size)),
+        "emoji": "".join(chr(rng.randint(0x1F300, 0x1F5FF)) for _ in range(size)),
+        "combining marks": "e" + "́" * (size - 1),
+        "zalgo": "".join(rng.choice(string.ascii_letters) + "".join(chr(rng.randint(0x0300, 0x036F)) for _ in range(7))
+                         for _ in range(size // 8)),
+    }
+
+
+def typing_at_the_end(text: str, policy):
+    """One keystroke on a huge text already in the incremental evaluator, the GUI's case."""
+    incremental = IncrementalEvaluator(text, policy)
+    incremental.result()
+    start = time.perf_counter()
+    incremental.append("x")
+    incremental.result()
+    return time.perf_counter() - start
+
+
+def entry_points(policy) -> dict:
+    cache = EvaluationCache(maxsize=64, policy=policy)
+    return {
+        "evaluate_password": lambda p: evaluate_password(p, policy),
+        "classify_password": lambda p: classify_password(p, policy),
+        "evaluate_many": lambda p: evaluate_many([p], policy).row(0),
+        "incremental set_text": lambda p: IncrementalEvaluator(p, policy).result(),
+        "cache.evaluate": cache.evaluate,
+    }
+
+
+def timings(inputs: dict, policy, rounds: int) -> dict:
+    """Seconds per call, as {entry point: [(input name, seconds), ...]}."""
+    results = {name: [] for name in entry_points(policy)}
+    results["incremental keystroke"] = []
+    for _ in range(rounds):
+        for name, func in entry_points(policy).items():  # a fresh cache each round, every call a miss
+            for input_name, text in inputs.items():
+                start = time.perf_counter()
+                func(text)
+                results[name].append((input_name, time.perf_counter() - start))
+        for input_name, text in inputs.items():
+            results["incremental keystroke"].append((input_name, typing_at_the_end(text, policy)))
+    return results
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def report(results: dict) -> float:
+    """Print p50 / p99 / max per entry point, return the worst p99."""
+    worst = 0.0
+    for name, samples in results.items():
+        seconds = [s for _, s in samples]
+        p99 = percentile(seconds, 0.99)
+        slowest = max(samples, key=lambda sample: sample[1])
+        worst = max(worst, p99)
+        print(f"  {name:22s} p50 {percentile(seconds, 0.5) * 1e3:9.2f} ms   p99 {p99 * 1e3:9.2f} ms"
+              f"   max {slowest[1] * 1e3:9.2f} ms ({slowest[0]})")
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="characters per input (default 1M)")
+    parser.add_argument("--bound-ms", type=float, default=DEFAULT_BOUND_MS, help="p99 latency bound (default 50 ms)")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS, help="times each input is run (default 5)")
+    args = parser.parse_args()
+
+    policy = current_policy()
+    inputs = adversarial_inputs(args.size)
+    print(f"{len(inputs)} inputs of {args.size:,} characters, max_length {policy.max_length}")
+    worst = report(timings(inputs, policy, args.rounds))
+
+    unlimited = compile_policy({"name": "unlimited", "max_length": None})
+    cut = {name: text[:UNLIMITED_SIZE] for name, text in inputs.items()}
+    print(f"\nfor comparison, no max_length, inputs cut to {UNLIMITED_SIZE:,} characters")
+    report(timings(cut, unlimited, 1))
+
+    if worst > args.bound_ms / 1e3:
+        print(f"\nFAIL: p99 {worst * 1e3:.2f} ms is over the {args.bound_ms:g} ms bound")
+        sys.exit(1)
+    print(f"\nok: p99 {worst * 1e3:.2f} ms, bound {args.bound_ms:g} ms")
+
+
+if __name__ == "__main__":
+    main()
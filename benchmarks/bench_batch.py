@@ -0,0 +1,44 @@
+"""
+Benchmark: evaluate_many vs calling evaluate_password once per password.
+
+Run from the repository root:
+    python benchmarks/bench_batch.py [number_of_passwords]
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from evaluator import evaluate_password, evaluate_many
+
+
+def make_corpus(n: int, seed: int = 42) -> list:
+    """Synthetic corpus of n passwords, 4-20 characters, mixed character classes."""
+    rng = random.Random(seed)
+    alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(4, 20))) for _ in range(n)]
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    corpus = make_corpus(n)
+
+    start = time.perf_counter()
+    for p in corpus:
+        evaluate_password(p)
+    per_call = time.perf_counter() - start
+
+    start = time.perf_counter()
+    evaluate_many(corpus)
+    batch = time.perf_counter() - start
+
+    print(f"passwords:          {n}")
+    print(f"evaluate_password:  {n / per_call:12,.0f} passwords/sec")
+    print(f"evaluate_many:      {n / batch:12,.0f} passwords/sec  ({per_call / batch:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Micro-benchmark: character class checks, the table lookup of charclass.py vs the loops it replaced.
+
+Three ways of getting the four base class flags are timed on short passwords and on long ones
+(ASCII, and mixed with accented letters, CJK and emoji):
+
+    four scans   any(c.isupper() for c in p), then islower, isdigit, not isalnum: four passes
+    str methods  one pass over the distinct characters asking the str methods (the previous
+                 evaluator.composition_flags)
+    table        charclass.class_mask over the distinct characters, a table lookup each (what
+                 the evaluator does, it has the distinct characters from the entropy's Counter)
+
+All three must agree on every input before anything is timed.
+
+Run from the repository root:
+    python benchmarks/bench_charclass.py [number_of_passwords]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from bench_batch import make_corpus
+from charclass import class_mask, HAS_UPPER, HAS_LOWER, HAS_DIGIT, HAS_SYMBOL
+
+BASE_CLASSES = HAS_UPPER | HAS_LOWER | HAS_DIGIT | HAS_SYMBOL
+LONG_LENGTH = 256
+
+
+def four_scans(password: str) -> int:
+    """The composition check as first written: one any() scan per class."""
+    flags = 0
+    if any(c.isupper() for c in password):
+        flags |= HAS_UPPER
+    if any(c.islower() for c in password):
+        flags |= HAS_LOWER
+    if any(c.isdigit() for c in password):
+        flags |= HAS_DIGIT
+    if any(not c.isalnum() for c in password):
+        flags |= HAS_SYMBOL
+    return flags
+
+
+def str_methods(password: str) -> int:
+    """One pass over the distinct characters, stopping once all four classes are found."""
+    flags = 0
+    for c in set(password):
+        if c.isupper():
+            flags |= HAS_UPPER
+        if c.islower():
+            flags |= HAS_LOWER
+        if c.isdigit():
+            flags |= HAS_DIGIT
+        if not c.isalnum():
+            flags |= HAS_SYMBOL
+        if flags == 15:
+            break
+    return flags
+
+
+def table(password: str) -> int:
+    return class_mask(set(password)) & BASE_CLASSES
+
+
+def corpora(n: int) -> dict:
+    rng = random.Random(n)
+    short = make_corpus(n)
+    ascii_long = ["".join(rng.choice(short) for _ in range(LONG_LENGTH))[:LONG_LENGTH] for _ in range(n // 50)]
+    unicode_alphabet = "aBcDé1ßЖж中文日本😀🔒 !?"
+    unicode_long = ["".join(rng.choice(unicode_alphabet) for _ in range(LONG_LENGTH)) for _ in range(n // 50)]
+    lowercase_long = ["".join(rng.choice("abcdefghij") for _ in range(LONG_LENGTH)) for _ in range(n // 50)]
+    return {
+        "short (4-20)": short,
+        f"long ascii ({LONG_LENGTH})": ascii_long,
+        f"long lowercase ({LONG_LENGTH})": lowercase_long,
+        f"long unicode ({LONG_LENGTH})": unicode_long,
+    }
+
+
+def timed(func, passwords) -> float:
+    """Best of three, seconds per password."""
+    best = float("inf")
+    for _ in range(3):
+        start = time.perf_counter()
+        for p in passwords:
+            func(p)
+        best = min(best, time.perf_counter() - start)
+    return best / len(passwords)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    functions = {"four scans": four_scans, "str methods": str_methods, "table": table}
+    for name, passwords in corpora(n).items():
+        for p in passwords:
+            assert four_scans(p) == str_methods(p) == table(p), p
+        times = {func_name: timed(func, passwords) for func_name, func in functions.items()}
+        print(f"{name} x {len(passwords):,}")
+        for func_name, seconds in times.items():
+            speedup = times["four scans"] / seconds
+            print(f"  {func_name:12s} {seconds * 1e6:8.2f} us/password   {speedup:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Micro-benchmark: how fast generator.py turns random candidates into accepted passwords.
+
+Three ways of producing the same accepted passwords (uniform over the four classes, at least
+the Strong score, nothing blacklisted or patterned) are timed:
+
+    naive        secrets.choice per character, evaluate_password on every candidate
+    buffered     one secrets.token_bytes + bytes.translate per batch, evaluate_password on every
+                 candidate
+    prechecked   what PasswordGenerator does: buffered candidates, those missing a class dropped
+                 before evaluation, the rest scored together with evaluate_many
+
+Candidates per second counts everything drawn, accepted per second what is handed out. Then
+passphrase throughput and the latency of suggest_edits on a few weak passwords.
+
+Run from the repository root:
+    python benchmarks/bench_generator.py [number_of_passwords]
+"""
+import os
+import secrets
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import generator
+from blacklist import is_common_password
+from dictionary import has_dictionary_word
+from evaluator import evaluate_password
+from policy import current_policy
+
+ALPHABET = "".join(generator.CLASS_ALPHABETS[name] for name in generator.DEFAULT_CLASSES)
+WEAK_PASSWORDS = ("summer2024", "password", "qwerty123", "Tr0ub4dor", "abc", "monkey!!")
+
+
+def accept(candidate: str, min_score: int) -> bool:
+    """The generator's acceptance rule, from one full evaluation."""
+    result = evaluate_password(candidate)
+    return (result.score >= min_score and result.has_upper and result.has_lower and result.has_digit
+            and result.has_symbol and not result.patterns and not result.is_common)
+
+
+def naive(count: int, length: int, min_score: int):
+    accepted = candidates = 0
+    while accepted < count:
+        candidate = "".join(secrets.choice(ALPHABET) for _ in range(length))
+        candidates += 1
+        accepted += accept(candidate, min_score)
+    return candidates, accepted
+
+
+def buffered(count: int, length: int, min_score: int):
+    accepted = candidates = 0
+    while accepted < count:
+        batch = count - accepted + 8
+        chars = generator.random_string(ALPHABET, batch * length)
+        for i in range(0, batch * length, length):
+            candidates += 1
+            accepted += accept(chars[i:i + length], min_score)
+    return candidates, accepted
+
+
+def prechecked(count: int, length: int, min_score: int):
+    gen = generator.PasswordGenerator(min_score=min_score)
+    gen.passwords(count, length)
+    return gen.stats["candidates"], gen.stats["accepted"]
+
+
+def timed(func, *args):
+    """Best of three: (seconds, result of the fastest run)."""
+    best = None
+    for _ in range(3):
+        start = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best[0]:
+            best = seconds, result
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    min_score = current_policy().strong_score
+    is_common_password("warm up")  # load the blacklist and dictionary outside the timings
+    has_dictionary_word("warm up")
+
+    for length in (12, generator.DEFAULT_LENGTH, 24):
+        print(f"passwords of {length} characters, {count:,} accepted")
+        base = None
+        for name, func in (("naive", naive), ("buffered", buffered), ("prechecked", prechecked)):
+            seconds, (candidates, accepted) = timed(func, count, length, min_score)
+            base = base or seconds
+            print(f"  {name:11s} {candidates / seconds:10,.0f} candidates/s {accepted / seconds:10,.0f} accepted/s"
+                  f"   {base / seconds:5.1f}x")
+
+    gen = generator.PasswordGenerator()
+    seconds, _ = timed(gen.passphrases, count // 5)
+    print(f"passphrases of {generator.passphrase_words()} words: {count // 5 / seconds:,.0f} accepted/s, "
+          f"{gen.stats['candidates'] - gen.stats['accepted']} of {gen.stats['candidates']} candidates rejected")
+
+    for password in WEAK_PASSWORDS:
+        seconds, suggestions = timed(generator.suggest_edits, password)
+        edits = len(suggestions[0]["edits"]) if suggestions else "-"
+        print(f"suggest_edits({password!r}): {seconds * 1000:6.2f} ms, {edits} edit(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Micro-benchmark: guess estimator cost on ordinary passwords and its worst case on adversarial ones.
+
+Inputs packed with overlapping matches (repeated words, years, keyboard walks, runs) are the
+expensive case for the dynamic program. The table shows the slowest call per length with the
+default work cap, and without it for the shorter lengths, where it still finishes.
+
+Run from the repository root:
+    python benchmarks/bench_guesses.py [number_of_passwords]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from bench_batch import make_corpus
+from guesses import guesses_log10, DEFAULT_MAX_WORK
+from patterns import pattern_mask
+
+LENGTHS = (16, 64, 256, 1024, 4096)
+UNCAPPED_UP_TO = 256
+
+
+def adversarial(length: int) -> dict:
+    """Inputs of about the given length that are made of as many matches as possible."""
+    rng = random.Random(length)
+    families = {
+        "words": "password",
+        "years": "19902024",
+        "keyboard": "qwertyasdf",
+        "sequences": "abcd1234",
+        "runs": "aaab",
+        "mixed": "p@ssw0rd1990qwertyabc111",
+    }
+    inputs = {name: (unit * (length // len(unit) + 1))[:length] for name, unit in families.items()}
+    inputs["random"] = "".join(rng.choice("abc123qwe!") for _ in range(length))
+    return inputs
+
+
+def slowest(password: str, max_work: int, repeat: int = 3) -> float:
+    patterns = pattern_mask(password)
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        guesses_log10(password, patterns, max_work=max_work)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    corpus = make_corpus(n)
+    masks = [pattern_mask(p) for p in corpus]
+    start = time.perf_counter()
+    for p, mask in zip(corpus, masks):
+        guesses_log10(p, mask)
+    elapsed = time.perf_counter() - start
+    print(f"ordinary passwords (4-20): {n / elapsed:11,.0f}/s   {elapsed / n * 1e6:.2f} us/call")
+
+    print(f"\nslowest adversarial call (ms), work cap {DEFAULT_MAX_WORK:,} vs none")
+    for length in LENGTHS:
+        worst, worst_name, uncapped = 0.0, "", 0.0
+        for name, password in adversarial(length).items():
+            elapsed = slowest(password, DEFAULT_MAX_WORK)
+            if elapsed > worst:
+                worst, worst_name = elapsed, name
+            if length <= UNCAPPED_UP_TO:
+                uncapped = max(uncapped, slowest(password, sys.maxsize, repeat=1))
+        uncapped_text = f"{uncapped * 1e3:9.2f}" if uncapped else "        -"
+        print(f"{length:6d} chars   capped {worst * 1e3:7.2f} ({worst_name:9s})   uncapped {uncapped_text}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Import-time budget check for the backend.
+
+Imports the given modules in fresh interpreters with `python -X importtime` and fails (exit code 1)
+if the cumulative import time of any of them is over budget, or if importing loaded the blacklist.
+The best of several runs is used, so a busy machine does not cause false failures.
+
+Run from the repository root:
+    python benchmarks/bench_import.py [--budget-ms 30] [--runs 5] [module ...]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+DEFAULT_MODULES = ["evaluator", "entropy", "patterns", "blacklist"]
+DEFAULT_BUDGET_MS = 30.0
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
+
+# Fails the child if the import had the side effect of loading the blacklist
+_CHECK = "import {module}, blacklist; assert not blacklist.is_loaded(), 'blacklist loaded at import time'"
+
+
+def import_time_us(module: str) -> int:
+    """Cumulative import time of module in microseconds, measured in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHECK.format(module=module)],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+
+    # lines look like "import time:  self [us] | cumulative | imported package"
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Fail if cold import of backend modules is over budget.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failed = False
+    for module in args.modules:
+        try:
+            best = min(import_time_us(module) for _ in range(args.runs)) / 1000
+        except RuntimeError as e:
+            print(f"{module:12s} FAIL  {e}")
+            failed = True
+            continue
+        ok = best <= args.budget_ms
+        failed = failed or not ok
+        print(f"{module:12s} {'ok  ' if ok else 'FAIL'}  {best:7.2f} ms  (budget {args.budget_ms:.0f} ms)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
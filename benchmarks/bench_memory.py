@@ -0,0 +1,59 @@
+"""
+Memory benchmark: bytes per result held as dicts, as PasswordResult records and in a ResultTable.
+
+Each representation is built from the same evaluated corpus and measured with tracemalloc, so
+the numbers are what keeping a million results for a report would cost, per result.
+
+Run from the repository root:
+    python benchmarks/bench_memory.py [number_of_passwords]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from bench_batch import make_corpus
+from evaluator import evaluate_password, evaluate_many, ResultTable
+
+
+def measured(build) -> tuple:
+    """(object built, bytes it allocated and still holds)."""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, after - before
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    corpus = make_corpus(n)
+    table = evaluate_many(corpus)
+    records = list(table)
+    assert all(evaluate_password(p) == r for p, r in zip(corpus[:1000], records))
+
+    # the records and table above are inputs here, only what each build allocates is counted
+    dicts, dict_bytes = measured(lambda: [r.as_dict() for r in records])
+    copies, record_bytes = measured(lambda: list(table))
+    rebuilt, table_bytes = measured(lambda: _copy_table(table))
+    assert dicts[0] == copies[0] == rebuilt[0]
+
+    print(f"{n:,} results")
+    print(f"  dicts           {dict_bytes / n:7.1f} bytes/result")
+    print(f"  PasswordResult  {record_bytes / n:7.1f} bytes/result   ({dict_bytes / record_bytes:.1f}x smaller)")
+    print(f"  ResultTable     {table_bytes / n:7.1f} bytes/result   ({dict_bytes / table_bytes:.1f}x smaller)")
+
+
+def _copy_table(table: ResultTable) -> ResultTable:
+    copy = ResultTable(table.policy)
+    copy.extend(table)
+    return copy
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Micro-benchmark: what the normalization stage (normalize.py) costs next to the checks it feeds.
+
+For each of the benchmark suite's corpora, times skeleton + fold of every password, cold (every
+password translated, as in a batch, which never repeats one) and warm (normalized again right
+after, what the second and third check of an evaluation pay for the kept forms), against the
+blacklist lookup, pattern scan and dictionary scan that read the normalized forms.
+
+Run from the repository root:
+    python benchmarks/bench_normalize.py [passwords_per_corpus]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import normalize
+from benchmark import make_corpora
+from blacklist import is_common_password
+from dictionary import has_dictionary_word
+from patterns import scan_patterns
+
+
+def per_call(func, corpus, repeat: int = 5) -> float:
+    """Best of repeat runs, nanoseconds per password."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for p in corpus:
+            func(p)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / len(corpus)
+
+
+def normalized(password: str):
+    normalize.skeleton(password)
+    normalize.fold(password)
+
+
+def normalized_twice(password: str):
+    normalized(password)
+    normalized(password)
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    is_common_password("warm up")  # load the blacklist outside the timings
+    print(f"{'corpus':12s} {'normalize cold':>15s} {'warm':>8s}   {'blacklist':>10s} {'patterns':>9s} {'dictionary':>11s}  (ns/password)")
+    for name, corpus in make_corpora(size).items():
+        cold = per_call(normalized, corpus)
+        warm = max(per_call(normalized_twice, corpus) - cold, 0.0)
+        checks = [per_call(check, corpus) for check in (is_common_password, scan_patterns, has_dictionary_word)]
+        print(f"{name:12s} {cold:15,.0f} {warm:8,.0f}   {checks[0]:10,.0f} {checks[1]:9,.0f} {checks[2]:11,.0f}"
+              f"   cold normalize is {cold / sum(checks):.0%} of the checks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+Benchmark: parallel audit throughput and scaling for 1, 2, 4, ... worker processes.
+
+Run from the repository root:
+    python benchmarks/bench_parallel.py [number_of_passwords] [max_workers]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from bench_batch import make_corpus
+from evaluator import evaluate_many
+from parallel import audit_parallel
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 400_000
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    corpus = make_corpus(n)
+
+    expected = list(evaluate_many(corpus[:10_000]).score)
+
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max_workers)
+
+    print(f"passwords: {n}, cpu cores: {os.cpu_count()}")
+    base = None
+    for workers in counts:
+        start = time.perf_counter()
+        result = audit_parallel(corpus, workers=workers)
+        elapsed = time.perf_counter() - start
+
+        # results must come back in input order whatever the worker count
+        assert list(result.score[:10_000]) == expected
+
+        rate = n / elapsed
+        base = base or rate
+        speedup = rate / base
+        print(f"workers={workers:3d}  {rate:12,.0f} passwords/sec  speedup {speedup:5.2f}x  efficiency {speedup / workers:6.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark: fused single-pass pattern scanner vs the three separate checks.
+
+Also shows how both approaches scale when the keyboard pattern list grows to hundreds of walks.
+
+Run from the repository root:
+    python benchmarks/bench_patterns.py [number_of_passwords]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from bench_batch import make_corpus
+from patterns import (has_repetition, has_sequence, has_keyboard_pattern, scan_patterns,
+                      build_keyboard_automaton, REPETITION, SEQUENCE, KEYBOARD_PATTERN)
+
+KEYBOARD_ROWS = ("1234567890", "qwertyuiop", "asdfghjkl", "zxcvbnm")
+LEET = str.maketrans({"a": "4", "e": "3", "i": "1", "o": "0", "s": "5", "t": "7"})
+
+
+def keyboard_walks() -> list:
+    """Every 4-6 character walk along a keyboard row, both directions, plus leetspeak variants."""
+    walks = set()
+    for row in KEYBOARD_ROWS:
+        for text in (row, row[::-1]):
+            for size in range(4, 7):
+                for i in range(len(text) - size + 1):
+                    walk = text[i:i + size]
+                    walks.add(walk)
+                    walks.add(walk.translate(LEET))
+    return sorted(walks)
+
+
+def legacy_mask(password: str) -> int:
+    mask = 0
+    if has_repetition(password):
+        mask |= REPETITION
+    if has_sequence(password):
+        mask |= SEQUENCE
+    if has_keyboard_pattern(password):
+        mask |= KEYBOARD_PATTERN
+    return mask
+
+
+def substring_scan(password: str, walks) -> bool:
+    lowered = password.lower()
+    return any(walk in lowered for walk in walks)
+
+
+def rate(func, corpus) -> float:
+    start = time.perf_counter()
+    for p in corpus:
+        func(p)
+    return len(corpus) / (time.perf_counter() - start)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    short = make_corpus(n)
+    long = [p * 8 for p in short[: n // 8]]  # 32-160 characters
+
+    for name, corpus in (("short (4-20)", short), ("long (32-160)", long)):
+        assert all(legacy_mask(p) == scan_patterns(p) for p in corpus)
+        old, new = rate(legacy_mask, corpus), rate(scan_patterns, corpus)
+        print(f"{name:14s} three checks {old:11,.0f}/s   fused {new:11,.0f}/s   ({new / old:.2f}x)")
+
+    walks = keyboard_walks()
+    automaton = build_keyboard_automaton(walks)
+    assert all(substring_scan(p, walks) == bool(scan_patterns(p, automaton) & KEYBOARD_PATTERN) for p in short)
+    old = rate(lambda p: substring_scan(p, walks), short)
+    new = rate(lambda p: scan_patterns(p, automaton), short)
+    print(f"{len(walks)} keyboard walks: substring loop {old:11,.0f}/s   automaton {new:11,.0f}/s   ({new / old:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
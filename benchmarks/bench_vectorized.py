@@ -0,0 +1,42 @@
+"""
+Benchmark: NumPy batch features vs the scalar functions, and a check that both agree exactly.
+
+Run from the repository root (needs NumPy installed):
+    python benchmarks/bench_vectorized.py [number_of_passwords]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+from bench_batch import make_corpus
+import vectorized
+
+
+def main():
+    if not vectorized.HAVE_NUMPY:
+        print("NumPy is not installed, nothing to compare")
+        return
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    corpus = make_corpus(n)
+
+    start = time.perf_counter()
+    scalar = vectorized._scalar_features(corpus)
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vector = vectorized.batch_features(corpus)
+    vector_time = time.perf_counter() - start
+
+    for name in ("length", "flags", "entropy", "patterns"):
+        assert vector[name].tolist() == scalar[name], name
+
+    print(f"passwords:  {n}")
+    print(f"scalar:     {n / scalar_time:12,.0f} passwords/sec")
+    print(f"numpy:      {n / vector_time:12,.0f} passwords/sec  ({scalar_time / vector_time:.2f}x)")
+    print("all columns equal")
+
+
+if __name__ == "__main__":
+    main()
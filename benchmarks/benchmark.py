@@ -0,0 +1,362 @@
+"""
+Benchmark suite for the backend hot paths, with a stored baseline and regression check.
+
+Every function is timed over synthetic corpora with different length distributions:
+    pin          4-6 digit PINs
+    typical      8-16 characters, mixed classes
+    passphrase   64+ characters, words and spaces
+    unicode      8-24 characters, mostly non-ASCII
+
+is_common_password and the blacklist load time are measured against a synthetic blacklist
+written to a temporary folder, so results don't depend on what is in resources/.
+
+Results are nanoseconds per call (per load for the load benchmarks); lower is better. Each
+corpus is timed in slices of SLICE_SIZE passwords, and every slice is followed by a reference
+workload that uses no backend code (a character count over part of the typical corpus). The
+baseline stores each result as a multiple of the reference time. The ratios cancel out most of
+the difference between machines, so the committed baseline is usable anywhere: a regression is a
+benchmark that got slower relative to the interpreter it runs on.
+
+Noise only ever makes a run slower, so every slice and the reference count at their best of
+--repeat runs, not at a mean or median, and timings run with the garbage collector off, like
+timeit. The runs go round-robin over the whole suite, so a slow spell of a few seconds (frequency
+scaling, a busy neighbour on a virtual machine) costs a benchmark one of its runs, not all of them,
+and the suite runs in --processes fresh interpreters, each benchmark keeping its best. --compare
+times the benchmarks over their tolerance again (RECHECKS) and only reports the ones that stay slow.
+
+The blacklist loads and the index lookups read files through the page cache and mmap, and vary
+more from run to run than the pure CPU benchmarks, so they have a wider tolerance (TOLERANCES).
+
+Run from the repository root:
+    python benchmarks/benchmark.py                    # print results
+    python benchmarks/benchmark.py -o results.json    # also write them as JSON
+    python benchmarks/benchmark.py --save-baseline    # record bench_baseline.json
+    python benchmarks/benchmark.py --compare          # compare with bench_baseline.json, exit 1 on regressions
+"""
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import platform
+import random
+import string
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend'))
+
+import blacklist
+from blacklist_index import build_index
+from entropy import shannon_entropy
+from evaluator import evaluate_password
+from patterns import has_repetition, has_sequence, has_keyboard_pattern, check_patterns, scan_patterns
+from dictionary import has_dictionary_word
+from guesses import guesses_log10
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+DEFAULT_THRESHOLD = 0.15  # slowdown (15%) reported as a regression
+# wider tolerances for the I/O-bound benchmarks, by name prefix
+TOLERANCES = {
+    "load_blacklist/": 0.50,
+    "is_common_password[index]/": 0.35,
+}
+SLICE_SIZE = 200  # passwords per timed slice
+REFERENCE_SLICE = 200  # passwords of the typical corpus in each run of the reference workload
+LOAD_CALLS = 10  # blacklist loads per benchmark, each one its own slice
+RECHECKS = 2  # times --compare runs the benchmarks over their tolerance again before reporting them
+UNIT = "reference"  # baseline results are multiples of the reference workload's time per call
+
+WORDS = ("correct", "horse", "battery", "staple", "river", "purple", "monkey", "sunshine",
+         "window", "garden", "falcon", "marble", "copper", "thunder", "violet", "harbor")
+UNICODE = "äöüßéèêçñøåæœΩωπλжщыяעבר漢字かなカナ😀🔒🎉ﬁ①ⅷ"
+
+
+def make_corpora(size: int, seed: int = 1234) -> dict:
+    """The four synthetic corpora, size passwords each, always the same for the same seed."""
+    rng = random.Random(seed)
+    mixed = string.ascii_letters + string.digits + "!@#$%^&*"
+
+    def passphrase():
+        words = []
+        while sum(len(w) + 1 for w in words) < 64:
+            words.append(rng.choice(WORDS))
+        return " ".join(words) + str(rng.randint(0, 99))
+
+    return {
+        "pin": ["".join(rng.choice(string.digits) for _ in range(rng.randint(4, 6))) for _ in range(size)],
+        "typical": ["".join(rng.choice(mixed) for _ in range(rng.randint(8, 16))) for _ in range(size)],
+        "passphrase": [passphrase() for _ in range(size)],
+        "unicode": ["".join(rng.choice(UNICODE + string.ascii_lowercase[:6]) for _ in range(rng.randint(8, 24)))
+                    for _ in range(size)],
+    }
+
+
+def reference_workload(password: str) -> list:
+    """Machine calibration, no backend code: a per-character loop with dict updates, like the checks do."""
+    counts = {}
+    for ch in password:
+        counts[ch] = counts.get(ch, 0) + 1
+    return sorted(counts.values())
+
+
+def _elapsed_ns(run) -> int:
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter_ns()
+        run()
+        return time.perf_counter_ns() - start
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def call_slices(func, corpus: list) -> list:
+    """func over the corpus as (run, calls) slices of SLICE_SIZE passwords."""
+    def run_slice(part):
+        def run():
+            for p in part:
+                func(p)
+        return run, len(part)
+    return [run_slice(corpus[i:i + SLICE_SIZE]) for i in range(0, len(corpus), SLICE_SIZE)]
+
+
+def measure(benchmarks: list, bl, reference_corpus: list, repeat: int) -> tuple:
+    """
+    Time every benchmark `repeat` times, round-robin over the whole list.
+
+    Args:
+        benchmarks: (name, blacklist, slices) tuples. blacklist is the store the benchmark needs
+            (False for the text set, True for the index, None when it loads its own) and slices a
+            list of (run, calls) pairs.
+        bl (SyntheticBlacklist): The blacklist to switch between.
+        reference_corpus: Passwords for the reference workload, timed after every slice.
+
+    Returns:
+        tuple: (reference ns per call, {name: (ns per call, ratio to the reference)}). Every slice
+        counts at its best run and the reference at its best. Noise only ever adds time, and
+        because each pass goes through the whole suite, a slow spell of a few seconds catches one
+        run of a benchmark, not all of them.
+    """
+    best = {name: [None] * len(slices) for name, _, slices in benchmarks}
+    reference = None
+    loaded = None
+    for _ in range(repeat):
+        for name, store, slices in benchmarks:
+            if store is not None and store is not loaded:
+                bl.use(store)
+            loaded = store
+            for i, (run, _) in enumerate(slices):
+                elapsed = _elapsed_ns(run)
+                best[name][i] = elapsed if best[name][i] is None else min(best[name][i], elapsed)
+                ref = _elapsed_ns(lambda: [reference_workload(p) for p in reference_corpus]) / len(reference_corpus)
+                reference = ref if reference is None else min(reference, ref)
+
+    timings = {}
+    for name, _, slices in benchmarks:
+        per_call = sum(best[name]) / sum(calls for _, calls in slices)
+        timings[name] = per_call, per_call / reference
+    return reference, timings
+
+
+class SyntheticBlacklist:
+    """Points the blacklist module at a generated list (text file and index) for the duration of a with block."""
+
+    def __init__(self, corpora: dict, size: int, seed: int = 99):
+        rng = random.Random(seed)
+        entries = set()
+        # include part of every corpus so lookups see both hits and misses
+        for corpus in corpora.values():
+            entries.update(p.lower() for p in corpus[::4])
+        while len(entries) < size:
+            entries.add("".join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(rng.randint(6, 12))))
+        self.entries = sorted(entries)
+
+    def __enter__(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.text = os.path.join(self.folder.name, "blacklist.txt")
+        self.index = os.path.join(self.folder.name, "blacklist.idx")
+        with open(self.text, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.entries) + "\n")
+        build_index(self.text, self.index)
+        self.saved = (blacklist.g, blacklist.index_file, blacklist.bloom_file, blacklist.shard_dir)
+        return self
+
+    def use(self, index: bool):
+        """Switch to the text set (index=False) or the mmap index (index=True) and load it."""
+        blacklist.g = self.text
+        blacklist.index_file = self.index if index else os.path.join(self.folder.name, "missing.idx")
+        blacklist.bloom_file = os.path.join(self.folder.name, "missing.bloom")
+        blacklist.shard_dir = os.path.join(self.folder.name, "missing.d")
+        blacklist.load_blacklist()
+
+    def __exit__(self, *exc):
+        blacklist.g, blacklist.index_file, blacklist.bloom_file, blacklist.shard_dir = self.saved
+        blacklist._store = None  # back to lazy loading from the real files
+        self.folder.cleanup()
+
+
+FUNCTIONS = {
+    "evaluate_password": evaluate_password,
+    "shannon_entropy": shannon_entropy,
+    "has_repetition": has_repetition,
+    "has_sequence": has_sequence,
+    "has_keyboard_pattern": has_keyboard_pattern,
+    "check_patterns": check_patterns,
+    "scan_patterns": scan_patterns,
+    "has_dictionary_word": has_dictionary_word,
+    "guesses_log10": guesses_log10,
+}
+
+
+def run_suite(size: int, repeat: int, blacklist_size: int, only=None) -> tuple:
+    """
+    Run every benchmark, or the ones named in only.
+
+    Returns:
+        tuple: (reference workload ns per call, {"function/corpus": nanoseconds per call},
+            {"function/corpus": multiple of the reference workload}).
+    """
+    corpora = make_corpora(size)
+    with SyntheticBlacklist(corpora, blacklist_size) as bl:
+        benchmarks = [
+            ("load_blacklist/text", None, [(lambda: bl.use(False), 1)] * LOAD_CALLS),
+            ("load_blacklist/index", None, [(lambda: bl.use(True), 1)] * LOAD_CALLS),
+        ]
+        for corpus_name, corpus in corpora.items():
+            # evaluate_password looks passwords up in the index, like a deployed checker
+            benchmarks += [(f"{name}/{corpus_name}", True, call_slices(func, corpus)) for name, func in FUNCTIONS.items()]
+            for index in (False, True):
+                kind = "index" if index else "set"
+                benchmarks.append((f"is_common_password[{kind}]/{corpus_name}", index,
+                                   call_slices(blacklist.is_common_password, corpus)))
+        if only is not None:
+            benchmarks = [benchmark for benchmark in benchmarks if benchmark[0] in only]
+        reference, timings = measure(benchmarks, bl, corpora["typical"][:REFERENCE_SLICE], repeat)
+    return (reference, {name: ns for name, (ns, _) in timings.items()},
+            {name: ratio for name, (_, ratio) in timings.items()})
+
+
+def run_processes(processes: int, size: int, repeat: int, blacklist_size: int, only=None) -> tuple:
+    """
+    run_suite in `processes` fresh interpreters one after the other (in this one when 0), each
+    benchmark at its best.
+
+    Timings differ between processes more than between runs in one process (hash seeds, memory
+    layout), so a single process can be slow at something for its whole life.
+    """
+    if processes <= 0:
+        return run_suite(size, repeat, blacklist_size, only)
+    runs = []
+    for _ in range(processes):
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            runs.append(pool.submit(run_suite, size, repeat, blacklist_size, only).result())
+    return (min(reference for reference, _, _ in runs),
+            {name: min(results[name] for _, results, _ in runs) for name in runs[0][1]},
+            {name: min(ratios[name] for _, _, ratios in runs) for name in runs[0][2]})
+
+
+def tolerance(name: str, threshold: float) -> float:
+    """Slowdown allowed for one benchmark: threshold, or its TOLERANCES entry when that is wider."""
+    for prefix, allowed in TOLERANCES.items():
+        if name.startswith(prefix):
+            return max(threshold, allowed)
+    return threshold
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Benchmarks slower than the baseline by more than their tolerance, as (name, baseline, current) ratio tuples."""
+    regressions = []
+    for name, value in results.items():
+        old = baseline.get(name)
+        if old and value > old * (1 + tolerance(name, threshold)):
+            regressions.append((name, old, value))
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the backend hot paths.")
+    parser.add_argument("--size", type=int, default=1000, help="passwords per corpus (default 1000)")
+    parser.add_argument("--repeat", type=int, default=7, help="runs per benchmark, the best is kept (default 7)")
+    parser.add_argument("--processes", type=int, default=3,
+                        help="fresh interpreters to run the suite in, the best is kept (default 3, 0 runs it in this one)")
+    parser.add_argument("--blacklist-size", type=int, default=100_000, help="entries in the synthetic blacklist")
+    parser.add_argument("-o", "--output", help="write results as JSON to this file")
+    parser.add_argument("--save-baseline", action="store_true", help=f"record results as the baseline ({os.path.basename(BASELINE_FILE)})")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_FILE, metavar="BASELINE",
+                        help="compare with a baseline file and exit 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown counted as a regression (default 0.15, wider for the"
+                             " blacklist loads and index lookups)")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            recorded = json.load(f)
+        if recorded.get("unit") != UNIT:
+            print(f"{args.compare} holds absolute timings, not multiples of the reference workload;"
+                  " record it again with --save-baseline", file=sys.stderr)
+            return 2
+        baseline = recorded["results"]
+
+    reference, results, ratios = run_processes(args.processes, args.size, args.repeat, args.blacklist_size)
+    regressions = compare(ratios, baseline, args.threshold) if baseline is not None else []
+    for _ in range(RECHECKS):
+        if not regressions:
+            break
+        # a real slowdown shows up again, noise rarely does twice: time the suspects again in
+        # fresh processes and keep each one's best
+        suspects = {name for name, _, _ in regressions}
+        _, again, again_ratios = run_processes(args.processes, args.size, args.repeat, args.blacklist_size, suspects)
+        for name in suspects:
+            results[name] = min(results[name], again[name])
+            ratios[name] = min(ratios[name], again_ratios[name])
+        regressions = compare(ratios, baseline, args.threshold)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "size": args.size,
+            "repeat": args.repeat,
+            "processes": args.processes,
+            "blacklist_size": args.blacklist_size,
+            "date": time.strftime("%Y-%m-%d"),
+        },
+        "unit": UNIT,
+        "reference_ns": round(reference, 1),
+        "results": {name: round(value, 3) for name, value in ratios.items()},
+        "ns": {name: round(value, 1) for name, value in results.items()},
+    }
+
+    print(f"{'reference_workload/typical':45s} {reference:14,.1f} ns")
+    for name, value in report["ns"].items():
+        ratio = report["results"][name]
+        line = f"{name:45s} {value:14,.1f} ns {ratio:12,.2f}x ref"
+        if baseline and name in baseline:
+            line += f"   {ratio / baseline[name] - 1:+7.1%} vs baseline"
+        print(line)
+
+    for path in filter(None, (args.output, BASELINE_FILE if args.save_baseline else None)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    if baseline is not None:
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: {old:,.2f}x -> {new:,.2f}x reference ({new / old - 1:+.1%})", file=sys.stderr)
+        if regressions:
+            return 1
+        wider = ", ".join(f"{prefix}* {allowed:.0%}" for prefix, allowed in TOLERANCES.items())
+        print(f"no regressions beyond {args.threshold:.0%} ({wider})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
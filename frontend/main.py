@@ -1,37 +1,145 @@
 import wx
 import sys
 import os
+import threading
+import time
+from collections import deque
 
 
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-backend_dir = os.path.join(parent_dir, 'backend') 
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'backend')
 
-print(f"Current directory: {current_dir}")
-print(f"Parent directory: {parent_dir}")
-print(f"Backend directory: {backend_dir}")
+# Set by import_backend() when the app starts, not at import time
+IncrementalEvaluator = None
+current_policy = None
+generate_password = None
+suggest_edits = None
 
 
-if os.path.exists(backend_dir):
-    print(f"✓ Found backend directory at: {backend_dir}")
-    sys.path.insert(0, backend_dir)
-else:
-    print(f"✗ Backend directory NOT FOUND at: {backend_dir}")
+def import_backend():
+    """Put the backend folder on sys.path and import the evaluator. Shows an error and exits if that fails."""
+    global IncrementalEvaluator, current_policy, generate_password, suggest_edits
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    try:
+        from incremental import IncrementalEvaluator
+        from policy import current_policy
+        from generator import generate_password, suggest_edits
+        import blacklist
+    except ImportError as e:
+        wx.MessageBox(
+            f"Cannot import backend!\n\n"
+            f"Backend dir: {BACKEND_DIR}\n\n"
+            f"Error: {e}\n\n"
+            f"Make sure evaluator.py is in the backend directory!",
+            "Import Error",
+            wx.OK | wx.ICON_ERROR
+        )
+        sys.exit(1)
+
+    # without a local copy of the list, check passwords against a range server by hash prefix
+    range_url = os.environ.get("PASSWORD_RANGE_URL")
+    if range_url:
+        from hash_range import RangeClient
+        blacklist.set_remote(RangeClient(range_url, cache_dir=os.environ.get("PASSWORD_RANGE_CACHE")))
+
+    # load the blacklist in the background so the first keystroke doesn't wait for it
+    threading.Thread(target=blacklist.load_blacklist, daemon=True).start()
+
+class EvaluationWorker(threading.Thread):
+    """
+    Evaluates passwords off the UI thread.
+
+    Every keystroke submits the latest text with a generation number. The worker waits until no new
+    text has arrived for `delay` seconds (debounce), evaluates only the newest text, and hands the
+    result to the UI thread with wx.CallAfter. Results for an older generation than the newest
+    submitted one are dropped, so a slow evaluation never overwrites a newer display.
+
+    Slower one-off jobs (the detailed report, generating a password) go through run_task, on the
+    same thread, so they never block the window either.
+    """
+
+    def __init__(self, on_result, on_error, delay=0.05):
+        super().__init__(daemon=True)
+        self.on_result = on_result   # called on the UI thread with (generation, result)
+        self.on_error = on_error     # called on the UI thread with the exception
+        self.delay = delay
+        self.evaluator = IncrementalEvaluator()
+        self._eval_lock = threading.Lock()  # the evaluator is shared with evaluate_now()
+        self._cond = threading.Condition()
+        self._pending = None         # (password, generation) waiting to be evaluated
+        self._tasks = deque()        # (task, on_done) from run_task, run before pending text
+        self._submitted_at = 0.0
+        self._latest = 0             # newest generation submitted
+        self._stopped = False
+
+    def submit(self, password, generation):
+        """Queue password for evaluation, replacing any text still waiting"""
+        with self._cond:
+            self._pending = (password, generation)
+            self._latest = generation
+            self._submitted_at = time.monotonic()
+            self._cond.notify()
+
+    def cancel(self, generation):
+        """Drop whatever is waiting or running, eg. when the box was cleared"""
+        with self._cond:
+            self._pending = None
+            self._latest = generation
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def run_task(self, task, on_done):
+        """Run task() on the worker thread, then on_done(its result) on the UI thread"""
+        with self._cond:
+            self._tasks.append((task, on_done))
+            self._cond.notify()
+
+    def evaluate_now(self, password):
+        """Evaluate on the calling thread (eg. inside a run_task job)"""
+        with self._eval_lock:
+            self.evaluator.set_text(password)
+            return self.evaluator.result()
 
-try:
-    from evaluator import evaluate_password
-    print("✓ Successfully imported backend from evaluator.py")
-except ImportError as e:
-    print(f"✗ Failed to import: {e}")
-    wx.MessageBox(
-        f"Cannot import backend!\n\n"
-        f"Backend dir: {backend_dir}\n\n"
-        f"Error: {e}\n\n"
-        f"Make sure evaluator.py is in the backend directory!",
-        "Import Error",
-        wx.OK | wx.ICON_ERROR
-    )
-    sys.exit(1)
+    def run(self):
+        while True:
+            task = None
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    if self._tasks:
+                        task, on_done = self._tasks.popleft()
+                        break
+                    if self._pending is None:
+                        self._cond.wait()
+                        continue
+                    # debounce: wait until the text has been quiet for `delay`
+                    remaining = self._submitted_at + self.delay - time.monotonic()
+                    if remaining <= 0:
+                        password, generation = self._pending
+                        self._pending = None
+                        break
+                    self._cond.wait(remaining)
+
+            if task is not None:
+                try:
+                    result = task()
+                except Exception as e:
+                    wx.CallAfter(self.on_error, e)
+                    continue
+                wx.CallAfter(on_done, result)
+                continue
+
+            try:
+                result = self.evaluate_now(password)
+            except Exception as e:
+                wx.CallAfter(self.on_error, e)
+                continue
+            if generation == self._latest:  # stale results are never posted
+                wx.CallAfter(self.on_result, generation, result)
 
 # WXPYTHON FRONTEND
 class PasswordCheckerFrame(wx.Frame):
@@ -44,6 +152,12 @@ class PasswordCheckerFrame(wx.Frame):
             size=(650, 750)
         )
         
+        # Evaluation runs on a worker thread, the UI thread only submits text and applies results
+        self.generation = 0
+        self.worker = EvaluationWorker(self.on_evaluation_done, self.on_evaluation_error)
+        self.worker.start()
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+
         # Setup UI
         self.init_ui()
         self.Centre()
@@ -216,17 +330,23 @@ class PasswordCheckerFrame(wx.Frame):
         # Action buttons
         button_sizer = wx.BoxSizer(wx.HORIZONTAL)
         
-        analyze_btn = wx.Button(panel, label='🔍 Detailed Analysis', size=(150, 40))
-        analyze_btn.SetBackgroundColour(wx.Colour(0, 100, 0))
-        analyze_btn.SetForegroundColour(wx.Colour(0, 255, 0))
-        analyze_btn.Bind(wx.EVT_BUTTON, self.on_analyze_button)
+        self.analyze_btn = wx.Button(panel, label='🔍 Detailed Analysis', size=(150, 40))
+        self.analyze_btn.SetBackgroundColour(wx.Colour(0, 100, 0))
+        self.analyze_btn.SetForegroundColour(wx.Colour(0, 255, 0))
+        self.analyze_btn.Bind(wx.EVT_BUTTON, self.on_analyze_button)
+        
+        self.generate_btn = wx.Button(panel, label='🎲 Generate', size=(120, 40))
+        self.generate_btn.SetBackgroundColour(wx.Colour(0, 100, 0))
+        self.generate_btn.SetForegroundColour(wx.Colour(0, 255, 0))
+        self.generate_btn.Bind(wx.EVT_BUTTON, self.on_generate_button)
         
         clear_btn = wx.Button(panel, label='🗑️ Clear', size=(100, 40))
         clear_btn.SetBackgroundColour(wx.Colour(0, 100, 0))
         clear_btn.SetForegroundColour(wx.Colour(0, 255, 0))
         clear_btn.Bind(wx.EVT_BUTTON, self.on_clear_button)
         
-        button_sizer.Add(analyze_btn, 0, wx.ALL, 5)
+        button_sizer.Add(self.analyze_btn, 0, wx.ALL, 5)
+        button_sizer.Add(self.generate_btn, 0, wx.ALL, 5)
         button_sizer.Add(clear_btn, 0, wx.ALL, 5)
         
         main_sizer.Add(button_sizer, 0, wx.ALL | wx.CENTER, 10)
@@ -236,11 +356,34 @@ class PasswordCheckerFrame(wx.Frame):
     def on_password_change(self, event):
         """Handle real-time password input changes"""
         password = self.password_input.GetValue()
+        self.generation += 1
         if password:
-            self.update_strength_display(password)
+            self.worker.submit(password, self.generation)
         else:
+            self.worker.cancel(self.generation)
             self.reset_display()
     
+    def on_evaluation_done(self, generation, result):
+        """Worker finished, runs on the UI thread via wx.CallAfter"""
+        if not self or generation != self.generation:
+            return  # window closed, or the text changed again meanwhile
+        self.update_strength_display(result)
+    
+    def on_evaluation_error(self, error):
+        if not self:
+            return
+        self.analyze_btn.Enable()
+        self.generate_btn.Enable()
+        wx.MessageBox(
+            f'Error evaluating password:\n{str(error)}',
+            'Error',
+            wx.OK | wx.ICON_ERROR
+        )
+    
+    def on_close(self, event):
+        self.worker.stop()
+        event.Skip()
+    
     def on_analyze_button(self, event):
         """Handle analyze button click - show detailed analysis popup"""
         password = self.password_input.GetValue()
@@ -253,8 +396,22 @@ class PasswordCheckerFrame(wx.Frame):
             )
             return
         
-        # Get evaluation from the backend
-        result = evaluate_password(password)
+        # The evaluation (incremental, so cheap right after typing) and the stronger variants run
+        # on the worker thread, show_analysis gets them on the UI thread
+        policy = current_policy()
+        
+        def analyze():
+            return self.worker.evaluate_now(password), suggest_edits(password, policy=policy)
+        
+        self.analyze_btn.Disable()
+        self.worker.run_task(analyze, self.show_analysis)
+    
+    def show_analysis(self, analysis):
+        """Show the detailed analysis popup, runs on the UI thread via wx.CallAfter"""
+        if not self:
+            return  # window closed meanwhile
+        self.analyze_btn.Enable()
+        result, suggestions = analysis
         
         # Build detailed message / password analysis
         msg_parts = [
@@ -272,6 +429,9 @@ class PasswordCheckerFrame(wx.Frame):
             f"  ✓ Lowercase Letters: {'Yes' if result['has_lower'] else 'No'}",
             f"  ✓ Digits: {'Yes' if result['has_digit'] else 'No'}",
             f"  ✓ Special Characters: {'Yes' if result['has_symbol'] else 'No'}",
+            f"  ✓ Spaces: {'Yes' if result['has_space'] else 'No'}",
+            f"  ✓ Non-ASCII Letters: {'Yes' if result['has_non_ascii'] else 'No'}",
+            f"  ✓ Emoji: {'Yes' if result['has_emoji'] else 'No'}",
             "",
             "SECURITY CHECKS:",
             f"  {'⚠️' if result['is_common'] else '✓'} Common Password: {'Yes (WEAK!)' if result['is_common'] else 'No'}",
@@ -292,6 +452,13 @@ class PasswordCheckerFrame(wx.Frame):
         else:
             msg_parts.append("\n✓ Your password meets all security criteria!")
         
+        # Strong variants that need the fewest changes to the typed password
+        if suggestions:
+            msg_parts.append("\nSTRONGER VARIANTS (fewest changes):")
+            for suggestion in suggestions:
+                msg_parts.append(f"  • {suggestion['password']}  ({suggestion['score']}/100: "
+                                 f"{'; '.join(suggestion['edits'])})")
+        
         msg = '\n'.join(msg_parts)
         
         
@@ -304,100 +471,125 @@ class PasswordCheckerFrame(wx.Frame):
         dlg.ShowModal()
         dlg.Destroy()
     
+    def on_generate_button(self, event):
+        """Generate a random password that scores Strong on the worker thread"""
+        policy = current_policy()
+        self.generate_btn.Disable()
+        self.worker.run_task(lambda: generate_password(policy=policy), self.show_generated)
+    
+    def show_generated(self, password):
+        """Fill in the generated password, shown so it can be copied; runs on the UI thread via wx.CallAfter"""
+        if not self:
+            return  # window closed meanwhile
+        self.generate_btn.Enable()
+        if not self.show_password_btn.GetValue():
+            self.show_password_btn.SetValue(True)
+            self.toggle_password_visibility(None)
+        self.password_input.SetValue(password)  # evaluated like typed text
+        self.password_input.SetInsertionPointEnd()
+    
     def on_clear_button(self, event):
         """Clear all fields and reset display"""
         self.password_input.Clear()
         self.reset_display()
     
-    def update_strength_display(self, password):
-        """Update all UI elements based on password strength"""
-        try:
-            # Get evaluation from backend
-            result = evaluate_password(password)
-            
-            # Update gauge
-            score = result['score']
+    def update_strength_display(self, result):
+        """Update all UI elements from an evaluation result, touching only widgets whose value changed"""
+        changed = False
+        
+        # Update gauge
+        score = result['score']
+        if self.strength_gauge.GetValue() != score:
             self.strength_gauge.SetValue(score)
-            
-            # Update strength label with color dynamically
-            strength = result['strength']
-            self.strength_label.SetLabel(strength)
-            
-            # Color mapping based on strength - hacker theme
-            color_map = {
-                'Weak': wx.Colour(255, 0, 0),        # Red for danger
-                'Medium': wx.Colour(255, 255, 0),    # Yellow for warning
-                'Strong': wx.Colour(0, 255, 0)       # Bright green for success
-            }
-            color = color_map.get(strength, wx.Colour(0, 200, 0))
-            self.strength_label.SetForegroundColour(color)
-            
-            # Update score label
-            self.score_label.SetLabel(f"Score: {score}/100")
-            
-            # Update character requirements checkboxes
-            self.requirement_checks['has_upper'].SetValue(result['has_upper'])
-            self.requirement_checks['has_lower'].SetValue(result['has_lower'])
-            self.requirement_checks['has_digit'].SetValue(result['has_digit'])
-            self.requirement_checks['has_symbol'].SetValue(result['has_symbol'])
-            
-            # Update metrics
-            self.length_label.SetLabel(f"{result['length']} characters")
-            
-            # Entropy from backend
-            entropy = result['entropy']
-            entropy_text = f"{entropy:.2f} bits"
-            if entropy > 52:
-                entropy_text += " (Excellent)"
-            elif entropy > 29:
-                entropy_text += " (Good)"
-            else:
-                entropy_text += " (Weak)"
-            self.entropy_label.SetLabel(entropy_text)
-            
-            # Patterns
-            patterns_count = len(result['patterns'])
-            if patterns_count > 0:
-                self.patterns_label.SetLabel(f'{patterns_count} pattern(s) ⚠️')
-                self.patterns_label.SetForegroundColour(wx.Colour(255, 0, 0))  # Red
-            else:
-                self.patterns_label.SetLabel('None ✓')
-                self.patterns_label.SetForegroundColour(wx.Colour(0, 255, 0))  # Green
-            
-            # Common password check
-            is_common = result['is_common']
-            self.common_label.SetLabel('Yes ⚠️' if is_common else 'No ✓')
-            self.common_label.SetForegroundColour(
-                wx.Colour(255, 0, 0) if is_common else wx.Colour(0, 255, 0)
-            )
-            
-            # Update feedback with recommendations
-            recommendations = self.generate_recommendations(result)
-            if recommendations:
-                feedback_text = '\n'.join(f"• {rec}" for rec in recommendations)
-            else:
-                feedback_text = "✓ Excellent! Your password meets all security requirements."
-            
+        
+        # Update strength label with color dynamically
+        strength = result['strength']
+        changed |= self.set_label(self.strength_label, strength)
+        
+        # Color mapping based on strength - hacker theme
+        color_map = {
+            'Weak': wx.Colour(255, 0, 0),        # Red for danger
+            'Medium': wx.Colour(255, 255, 0),    # Yellow for warning
+            'Strong': wx.Colour(0, 255, 0)       # Bright green for success
+        }
+        self.set_colour(self.strength_label, color_map.get(strength, wx.Colour(0, 200, 0)))
+        
+        # Update score label
+        changed |= self.set_label(self.score_label, f"Score: {score}/100")
+        
+        # Update character requirements checkboxes
+        for key in ('has_upper', 'has_lower', 'has_digit', 'has_symbol'):
+            if self.requirement_checks[key].GetValue() != result[key]:
+                self.requirement_checks[key].SetValue(result[key])
+        
+        # Update metrics
+        changed |= self.set_label(self.length_label, f"{result['length']} characters")
+        
+        # Entropy from backend
+        entropy = result['entropy']
+        entropy_text = f"{entropy:.2f} bits"
+        if entropy > 52:
+            entropy_text += " (Excellent)"
+        elif entropy > 29:
+            entropy_text += " (Good)"
+        else:
+            entropy_text += " (Weak)"
+        changed |= self.set_label(self.entropy_label, entropy_text)
+        
+        # Patterns
+        patterns_count = len(result['patterns'])
+        if patterns_count > 0:
+            changed |= self.set_label(self.patterns_label, f'{patterns_count} pattern(s) ⚠️')
+            self.set_colour(self.patterns_label, wx.Colour(255, 0, 0))  # Red
+        else:
+            changed |= self.set_label(self.patterns_label, 'None ✓')
+            self.set_colour(self.patterns_label, wx.Colour(0, 255, 0))  # Green
+        
+        # Common password check
+        is_common = result['is_common']
+        changed |= self.set_label(self.common_label, 'Yes ⚠️' if is_common else 'No ✓')
+        self.set_colour(self.common_label, wx.Colour(255, 0, 0) if is_common else wx.Colour(0, 255, 0))
+        
+        # Update feedback with recommendations
+        recommendations = self.generate_recommendations(result)
+        if recommendations:
+            feedback_text = '\n'.join(f"• {rec}" for rec in recommendations)
+        else:
+            feedback_text = "✓ Excellent! Your password meets all security requirements."
+        
+        if self.feedback_text.GetValue() != feedback_text:
             self.feedback_text.SetValue(feedback_text)
-            
+        
+        # Label sizes only change when their text does
+        if changed:
             self.Layout()
-            
-        except Exception as e:
-            wx.MessageBox(
-                f'Error evaluating password:\n{str(e)}',
-                'Error',
-                wx.OK | wx.ICON_ERROR
-            )
+    
+    @staticmethod
+    def set_label(ctrl, label):
+        """SetLabel only if the text differs, returns whether it changed"""
+        if ctrl.GetLabel() == label:
+            return False
+        ctrl.SetLabel(label)
+        return True
+    
+    @staticmethod
+    def set_colour(ctrl, colour):
+        """SetForegroundColour (and repaint) only if the colour differs"""
+        if ctrl.GetForegroundColour() != colour:
+            ctrl.SetForegroundColour(colour)
+            ctrl.Refresh()
     
     def generate_recommendations(self, result):
         """Generate a list of recommendations based on evaluation results"""
         recommendations = []
+        # same thresholds as the scoring policy
+        policy = current_policy()
         
         # Length recommendations
-        if result['length'] < 7:
-            recommendations.append("Use at least 7 characters (11+ recommended)")
-        elif result['length'] < 11:
-            recommendations.append("Consider using 11+ characters for better security")
+        if result['length'] < policy.min_length:
+            recommendations.append(f"Use at least {policy.min_length} characters ({policy.good_length}+ recommended)")
+        elif result['length'] < policy.good_length:
+            recommendations.append(f"Consider using {policy.good_length}+ characters for better security")
         
         # Character variety recommendations
         if not result['has_upper']:
@@ -410,7 +602,7 @@ class PasswordCheckerFrame(wx.Frame):
             recommendations.append("Include special characters (!@#$%^&*)")
         
         # Entropy recommendations
-        if result['entropy'] < 29:
+        if result['entropy'] < policy.min_entropy:
             recommendations.append("Increase complexity - use a mix of different character types")
         
         # Common password warning
@@ -420,6 +612,9 @@ class PasswordCheckerFrame(wx.Frame):
         # Pattern warnings
         if result['patterns']:
             recommendations.append(f"⚠️ Avoid predictable patterns: {', '.join(result['patterns'])}")
+
+        if result['truncated']:
+            recommendations.append(f"Only the first {policy.max_length} characters were checked")
         
         return recommendations
     
@@ -495,6 +690,7 @@ class PasswordCheckerApp(wx.App):
     """Main application class"""
     
     def OnInit(self):
+        import_backend()
         self.frame = PasswordCheckerFrame()
         return True
 
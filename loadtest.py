@@ -0,0 +1,96 @@
+"""
+Load test for the scoring service in app.py.
+
+Opens --connections keep-alive connections and sends requests on each for --duration seconds,
+then reports requests/sec, p50/p99 latency and how many requests were turned away with 429.
+
+    python app.py &
+    python loadtest.py --url http://127.0.0.1:8080 --connections 64 --duration 10
+    python loadtest.py --batch 100      # POST /evaluate/batch with 100 passwords per request
+"""
+import argparse
+import asyncio
+import json
+import random
+import string
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(sorted_values: list, fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def random_password(rng: random.Random) -> str:
+    alphabet = string.ascii_letters + string.digits + "!@#$%^&*"
+    return "".join(rng.choice(alphabet) for _ in range(rng.randint(6, 20)))
+
+
+async def client(host: str, port: int, batch: int, stop_at: float, latencies: list, statuses: dict, seed: int):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < stop_at:
+            if batch:
+                path, payload = "/evaluate/batch", {"passwords": [random_password(rng) for _ in range(batch)]}
+            else:
+                path, payload = "/evaluate", {"password": random_password(rng)}
+            body = json.dumps(payload).encode("utf-8")
+            request = (f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                       f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body
+
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 429:
+                await asyncio.sleep(0.01)  # back off a little, like a polite client would
+    finally:
+        writer.close()
+
+
+async def run(url: str, connections: int, duration: float, batch: int):
+    parts = urlsplit(url)
+    host, port = parts.hostname or "127.0.0.1", parts.port or 80
+    latencies, statuses = [], {}
+    start = time.perf_counter()
+    stop_at = start + duration
+    await asyncio.gather(*(client(host, port, batch, stop_at, latencies, statuses, seed)
+                           for seed in range(connections)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"requests:   {total} in {elapsed:.1f}s over {connections} connections"
+          + (f", {batch} passwords per request" if batch else ""))
+    print(f"throughput: {total / elapsed:,.0f} requests/sec"
+          + (f" ({total * batch / elapsed:,.0f} passwords/sec)" if batch else ""))
+    print(f"latency:    p50 {percentile(latencies, 0.50) * 1000:.2f} ms   p99 {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"statuses:   {dict(sorted(statuses.items()))}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the local scoring service.")
+    parser.add_argument("--url", default="http://127.0.0.1:8080")
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--batch", type=int, default=0, help="passwords per request, 0 for single /evaluate requests")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.connections, args.duration, args.batch))
+
+
+if __name__ == "__main__":
+    main()
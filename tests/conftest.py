@@ -0,0 +1,46 @@
+"""
+Shared fixtures. The backend modules import each other as siblings, so backend/ goes on sys.path
+like app.py and the GUI put it there. Every test gets a small blacklist in its own temporary
+folder, nothing is read from or written to resources/.
+"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
+
+import blacklist  # noqa: E402
+
+BLACKLIST = ("password", "letmein", "dragon", "qwerty123", "sunshine", "iloveyou", "straße")
+
+
+@pytest.fixture(autouse=True)
+def blacklist_dir(tmp_path, monkeypatch):
+    """Point the blacklist at BLACKLIST written to tmp_path, with no index, bloom filter, shards or range server."""
+    text = tmp_path / "blacklist.txt"
+    text.write_text("\n".join(BLACKLIST) + "\n", encoding="utf-8")
+    monkeypatch.setattr(blacklist, "g", str(text))
+    monkeypatch.setattr(blacklist, "index_file", str(tmp_path / "blacklist.idx"))
+    monkeypatch.setattr(blacklist, "bloom_file", str(tmp_path / "blacklist.bloom"))
+    monkeypatch.setattr(blacklist, "shard_dir", str(tmp_path / "blacklist.d"))
+    monkeypatch.setattr(blacklist, "_remote", None)
+    monkeypatch.setattr(blacklist, "_store", None)
+    monkeypatch.setattr(blacklist, "_loaded_signature", None)
+    return tmp_path
+
+
+@pytest.fixture(scope="session")
+def passwords():
+    """Seeded mix of PINs, typical, blacklisted, patterned, passphrase, non-ASCII and over-long passwords."""
+    rng = random.Random(2024)
+    mixed = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!@#$%^&*"
+    unicode = "äöüßéèçñøæœΩωπжщыяעב漢字かな😀🔒ﬁ①ⅷ́"
+    out = ["", "a", "1234", "password", "Password1", "P@ssw0rd", "qwerty123", "aaaaaaa", "abcdef", "zyxw",
+           "correct horse battery staple", "Tr0ub4dor&3", "ｐａｓｓｗｏｒｄ", "pásswörd", "pаssword", "STRASSE",
+           "x" * 300, "Summer2024!" * 40]
+    out += ["".join(rng.choice("0123456789") for _ in range(rng.randint(4, 6))) for _ in range(40)]
+    out += ["".join(rng.choice(mixed) for _ in range(rng.randint(8, 16))) for _ in range(150)]
+    out += ["".join(rng.choice(unicode + "abcdef123") for _ in range(rng.randint(6, 24))) for _ in range(100)]
+    return out
@@ -0,0 +1,51 @@
+import asyncio
+import importlib.util
+import json
+import os
+
+import pytest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+spec = importlib.util.spec_from_file_location("app", APP)
+app = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app)
+
+
+class Service:
+    """What route() needs of a ScoringService, scoring in this process."""
+    stats = False
+    ranges = None
+
+    def __init__(self):
+        self.queue = asyncio.Queue()
+
+    async def evaluate(self, password):
+        return app.score_batch([password])[0][0]
+
+    async def evaluate_batch(self, passwords):
+        return app.score_batch(passwords)[0]
+
+
+def route(method, path, body=b""):
+    return asyncio.run(app.route(Service(), method, path, body))
+
+
+@pytest.mark.parametrize("path", ["/health", "/health?", "/health?verbose=1"])
+def test_query_string_is_ignored(path):
+    assert route("GET", path) == {"status": "ok", "queued": 0}
+
+
+def test_evaluate_with_query_string():
+    result = route("POST", "/evaluate?x=1", json.dumps({"password": "password"}).encode())
+    assert result["is_common"]
+    batch = route("POST", "/evaluate/batch?", json.dumps({"passwords": ["a", "b"]}).encode())
+    assert len(batch["results"]) == 2
+
+
+def test_unknown_path_and_method():
+    with pytest.raises(app.HttpError) as e:
+        route("GET", "/nothing?health")
+    assert e.value.status == 404
+    with pytest.raises(app.HttpError) as e:
+        route("GET", "/evaluate?x=1")
+    assert e.value.status == 405
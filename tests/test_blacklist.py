@@ -0,0 +1,50 @@
+import blacklist
+from blacklist_index import build_index
+from bloom import BloomFilter, build_filter
+
+
+def write_list(words):
+    with open(blacklist.g, "w", encoding="utf-8") as f:
+        f.write("\n".join(words) + "\n")
+
+
+def test_bloom_filter_in_front_of_the_text_list(capsys):
+    build_filter(blacklist.g, blacklist.bloom_file)
+    assert BloomFilter.load(blacklist.bloom_file).built_from(blacklist.g)
+    assert blacklist.is_common_password("Dragon")
+    assert blacklist.is_common_password("STRASSE")
+    assert not blacklist.is_common_password("Tr0ub4dor&3")
+    exact = blacklist._store[1]
+    assert exact[0][0] is not None  # the filter is in use
+    assert capsys.readouterr().err == ""
+
+
+def test_stale_bloom_filter_is_ignored(capsys):
+    build_filter(blacklist.g, blacklist.bloom_file)
+    assert not blacklist.is_common_password("orchid#77")
+    write_list(["password", "orchid#77"])  # the list is regenerated, the filter is not
+    assert blacklist.reload_if_changed()
+    assert blacklist.is_common_password("orchid#77")
+    assert blacklist._store[1][0][0] is None
+    assert "rebuild it with bloom.py" in capsys.readouterr().err
+
+
+def test_bloom_filter_must_match_the_index():
+    build_filter(blacklist.g, blacklist.bloom_file)  # built from the text list
+    build_index(blacklist.g, blacklist.index_file)
+    blacklist.load_blacklist()
+    assert blacklist._store[1][0][0] is None  # not trusted in front of the index
+    build_filter(blacklist.index_file, blacklist.bloom_file)
+    blacklist.load_blacklist()
+    assert blacklist._store[1][0][0] is not None
+    assert blacklist.is_common_password("sunshine") and not blacklist.is_common_password("moonshine")
+
+
+def test_filter_without_a_source_is_not_trusted():
+    bloom = BloomFilter(100)
+    for word in ("password", "dragon"):
+        bloom.add(word.encode("utf-8"))
+    bloom.save(blacklist.bloom_file)
+    assert BloomFilter.load(blacklist.bloom_file).source is None
+    assert blacklist.is_common_password("sunshine")  # missing from the filter, found anyway
+
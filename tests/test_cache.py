@@ -0,0 +1,63 @@
+import blacklist
+import dictionary
+from cache import EvaluationCache
+import policy
+from evaluator import evaluate_password
+from patterns import DICTIONARY_WORD
+
+
+def test_repeats_are_hits():
+    cache = EvaluationCache(maxsize=2)
+    first = cache.evaluate("hunter2")
+    assert cache.evaluate("hunter2") is first
+    assert first.as_dict() == evaluate_password("hunter2").as_dict()
+    cache.evaluate("a")
+    cache.evaluate("b")
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 3, "evictions": 1, "expirations": 0}
+
+
+def test_blacklist_reload_invalidates():
+    cache = EvaluationCache()
+    assert not cache.evaluate("hunter2").is_common
+    with open(blacklist.g, "a", encoding="utf-8") as f:
+        f.write("hunter2\n")
+    assert blacklist.reload_if_changed()
+    assert cache.evaluate("hunter2").is_common
+    assert cache.stats()["misses"] == 2
+
+
+def test_range_server_and_dictionary_are_part_of_the_context(monkeypatch):
+    class Remote:
+        url = "http://127.0.0.1:1"
+
+        def __contains__(self, password):
+            return password == "hunter2"
+
+    cache = EvaluationCache()
+    assert not cache.evaluate("hunter2").is_common
+    blacklist.set_remote(Remote())
+    assert cache.evaluate("hunter2").is_common
+
+    before = cache.evaluate("xylophone-tide")
+    monkeypatch.setattr(dictionary, "_automaton", dictionary.build_automaton(["xylophone"]))
+    after = cache.evaluate("xylophone-tide")
+    assert not before.pattern_mask & DICTIONARY_WORD and after.pattern_mask & DICTIONARY_WORD
+    assert cache.stats()["hits"] == 0
+
+
+def test_new_default_policy_is_a_miss(monkeypatch):
+    cache = EvaluationCache()
+    cache.evaluate("password")
+    strict = policy.compile_policy({"name": "strict", "version": 1, "common_max_score": 0})
+    monkeypatch.setattr(policy, "_default", strict)
+    assert cache.evaluate("password").score == evaluate_password("password", strict).score == 0
+    assert cache.stats()["hits"] == 0
+
+
+def test_custom_evaluate_results_are_copied():
+    cache = EvaluationCache(evaluate=lambda password: {"length": len(password), "tags": ["x"]})
+    first = cache.evaluate("abc")
+    first["tags"].append("changed")
+    assert cache.evaluate("abc") == {"length": 3, "tags": ["x"]}
+    bare = EvaluationCache(evaluate=lambda password: {"length": len(password)})
+    assert bare.evaluate("abc") == bare.evaluate("abc") == {"length": 3}
@@ -0,0 +1,51 @@
+import pytest
+
+from evaluator import evaluate_password, evaluate_many, classify_password, ResultTable, IS_COMMON, TRUNCATED
+from policy import compile_policy, current_policy
+
+POLICIES = {
+    "default": None,
+    "strict": {"name": "strict", "version": 1, "common_max_score": 0, "strength": {"Strong": 90, "Medium": 60}},
+    "short": {"name": "short", "version": 1, "max_length": 12},
+}
+
+
+@pytest.fixture(params=sorted(POLICIES))
+def policy(request):
+    spec = POLICIES[request.param]
+    return current_policy() if spec is None else compile_policy(spec)
+
+
+def test_evaluate_many_matches_evaluate_password(passwords, policy):
+    table = evaluate_many(passwords, policy)
+    assert isinstance(table, ResultTable)
+    assert len(table) == len(passwords)
+    for password, row in zip(passwords, table):
+        assert row.as_dict() == evaluate_password(password, policy).as_dict(), password
+
+
+def test_evaluate_many_accepts_an_iterator(passwords):
+    table = evaluate_many(iter(passwords))
+    assert [row.score for row in table] == [evaluate_password(p).score for p in passwords]
+
+
+def test_classify_password_matches_evaluate_password(passwords, policy):
+    for password in passwords:
+        assert classify_password(password, policy) == evaluate_password(password, policy).strength_code, password
+
+
+def test_blacklisted_password_is_flagged():
+    result = evaluate_password("Password")
+    assert result.is_common
+    assert result.flags & IS_COMMON
+    assert not evaluate_password("vK8#q2Lm!x").is_common
+
+
+def test_long_password_is_scored_on_its_prefix():
+    policy = compile_policy(POLICIES["short"])
+    result = evaluate_password("password" + "x" * 20, policy)
+    assert result.truncated and result.flags & TRUNCATED
+    assert result.length == 28
+    assert not result.is_common  # a prefix never matches the blacklist
+    longer = evaluate_password("password" + "x" * 21, policy).as_dict()
+    assert result.as_dict() == dict(longer, length=28)
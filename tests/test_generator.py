@@ -0,0 +1,56 @@
+import blacklist
+from evaluator import evaluate_password, evaluate_many
+from generator import generate_password, generate_passphrase, suggest_edits, PasswordGenerator
+from policy import current_policy
+
+
+class CountingRemote:
+    """A range client stand-in that lists nothing and counts the lookups."""
+    url = "http://127.0.0.1:1"
+
+    def __init__(self):
+        self.lookups = []
+
+    def __contains__(self, password):
+        self.lookups.append(password)
+        return False
+
+
+def test_generated_passwords_are_strong():
+    strong = current_policy().strong_score
+    for password in PasswordGenerator().passwords(20):
+        assert len(password) == 16
+        result = evaluate_password(password)
+        assert result.score >= strong and not result.is_common and not result.pattern_mask
+    assert evaluate_password(generate_passphrase()).score >= strong
+
+
+def test_candidates_never_reach_the_range_server():
+    remote = CountingRemote()
+    blacklist.set_remote(remote)
+    generator = PasswordGenerator()
+    generator.passwords(5)
+    generator.passphrases(3)
+    generate_password(length=12)
+    assert generator.stats["candidates"] >= 8
+    assert remote.lookups == []
+
+
+def test_suggestions_only_look_up_the_typed_password():
+    remote = CountingRemote()
+    blacklist.set_remote(remote)
+    suggestions = suggest_edits("summer2024")
+    assert suggestions
+    assert remote.lookups == ["summer2024"]
+    for suggestion in suggestions:
+        assert evaluate_password(suggestion["password"]).score == suggestion["score"]
+
+
+def test_evaluate_many_local_only():
+    remote = CountingRemote()
+    blacklist.set_remote(remote)
+    local = evaluate_many(["password", "Orchid#77"], remote=False)
+    assert [row.is_common for row in local] == [True, False]
+    assert remote.lookups == []
+    evaluate_many(["password", "Orchid#77"])
+    assert remote.lookups == ["Orchid#77"]  # the local list answered for "password"
@@ -0,0 +1,212 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import blacklist
+import ingest
+from hash_range import RangeClient, RangeLookupError, HIBP_INFO, password_digest
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+LISTED = ("password", "orchid#77", "straße")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture(scope="module")
+def range_server(tmp_path_factory):
+    """app.py --range serving a list exported with ingest.py export-hashes (sha256, folded)."""
+    folder = tmp_path_factory.mktemp("range")
+    hashes = str(folder / "blacklist.sha256")
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(blacklist, "g", str(folder / "blacklist.txt"))
+        mp.setattr(blacklist, "index_file", str(folder / "blacklist.idx"))
+        mp.setattr(blacklist, "shard_dir", str(folder / "blacklist.d"))
+        (folder / "dump.txt").write_text("\n".join(LISTED) + "\n", encoding="utf-8")
+        ingest.add([str(folder / "dump.txt")])
+        assert ingest.export_hashes(hashes, "sha256") == len(LISTED)
+
+    port = free_port()
+    proc = subprocess.Popen([sys.executable, APP, "--port", str(port), "--workers", "1", "--range", hashes],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            break
+        except OSError:
+            if proc.poll() is not None or time.monotonic() > deadline:
+                proc.kill()
+                pytest.fail("app.py --range did not start")
+            time.sleep(0.1)
+    yield f"http://127.0.0.1:{port}"
+    proc.terminate()
+    proc.wait(timeout=10)
+
+
+class StubServer:
+    """
+    A range server answering from a script: statuses[path] is a list of statuses, one popped per request
+    (the last one stays). 200 answers carry info on /range/info and buckets[path] elsewhere.
+    """
+
+    def __init__(self, statuses: dict, info=None, buckets: dict = None):
+        self.statuses = statuses
+        self.info = info or {"algorithm": "sha256", "normalize": "fold", "prefix_length": 5}  # dict, or a raw body
+        self.buckets = buckets or {}  # path -> body
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests.append(self.path)
+                queue = stub.statuses.get(self.path) or [200]
+                status = queue.pop(0) if len(queue) > 1 else queue[0]
+                body = b""
+                if status == 200 and self.path == "/range/info":
+                    body = stub.info if isinstance(stub.info, bytes) else json.dumps(stub.info).encode()
+                elif status == 200:
+                    body = stub.buckets.get(self.path, b"")
+                self.send_response(status)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(statuses, info=None, buckets=None):
+        servers.append(StubServer(statuses, info, buckets))
+        return servers[-1]
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_client_against_local_range_server(range_server):
+    client = RangeClient(range_server)
+    assert client.info() == {"algorithm": "sha256", "normalize": "fold", "prefix_length": 5}
+    assert client.is_listed("password")
+    assert "PASSWORD" in client  # entries were exported folded
+    assert client.is_listed("Orchid#77")
+    assert client.is_listed("STRASSE")
+    assert not client.is_listed("Tr0ub4dor&3")
+    assert client.is_listed("password")
+    stats = client.stats()
+    assert stats["errors"] == 0 and stats["hits"] >= 1
+    client.close()
+
+
+def test_buckets_are_cached_on_disk(range_server, tmp_path):
+    first = RangeClient(range_server, cache_dir=str(tmp_path))
+    assert first.is_listed("orchid#77")
+    assert first.stats()["fetches"] == 1
+    second = RangeClient(range_server, cache_dir=str(tmp_path))
+    assert second.is_listed("orchid#77")
+    assert second.stats()["fetches"] == 0 and second.stats()["disk_hits"] == 1
+
+
+def test_blacklist_asks_the_range_server(range_server, monkeypatch, tmp_path):
+    monkeypatch.setattr(blacklist, "g", str(tmp_path / "missing.txt"))  # no local list, only the server
+    assert not blacklist.is_common_password("Orchid#77")
+    blacklist.set_remote(RangeClient(range_server))
+    assert blacklist.is_common_password("Orchid#77")
+    assert not blacklist.is_common_password("Tr0ub4dor&3")
+    assert blacklist.info()["remote"] == range_server
+
+
+def test_error_status_on_info_is_not_taken_for_hibp(stub):
+    server = stub({"/range/info": [503, 200]})
+    client = RangeClient(server.url, fail_open=False)
+    with pytest.raises(RangeLookupError):
+        client.info()
+    # nothing was remembered: the next call asks again and gets the real answer
+    assert client.info() == server.info
+    assert server.requests.count("/range/info") == 2
+
+
+def test_fail_open_counts_errors_and_recovers(stub):
+    server = stub({"/range/info": [429, 200]})
+    client = RangeClient(server.url)
+    assert not client.is_listed("password")
+    assert client.stats()["errors"] == 1
+    digest = password_digest("password", "sha256", "fold")
+    assert client.info()["algorithm"] == "sha256"
+    assert client.bucket(digest[:5]) == frozenset()
+
+
+def test_missing_info_endpoint_means_hibp(stub):
+    for status in (400, 404):
+        server = stub({"/range/info": [status]})
+        assert RangeClient(server.url).info() == HIBP_INFO
+
+
+def test_error_status_on_a_bucket(stub):
+    server = stub({"/range/ABCDE": [500, 200]})
+    client = RangeClient(server.url, fail_open=False)
+    with pytest.raises(RangeLookupError):
+        client.bucket("abcde")
+    assert client.bucket("abcde") == frozenset()
+
+
+@pytest.mark.parametrize("body", [
+    b"<html>Bad gateway</html>",
+    b"\xff\xfe",
+    b"[1, 2]",
+    b'"sha256"',
+    b'{"algorithm": "sha256", "normalize": "fold"}',
+    b'{"algorithm": "sha256", "normalize": "fold", "prefix_length": "5"}',
+    b'{"algorithm": "sha256", "normalize": "fold", "prefix_length": true}',
+    b'{"algorithm": "sha256", "normalize": "fold", "prefix_length": 0}',
+    b'{"algorithm": "sha256", "normalize": "fold", "prefix_length": 64}',
+    b'{"algorithm": "md42", "normalize": "fold", "prefix_length": 5}',
+    b'{"algorithm": "shake_128", "normalize": "fold", "prefix_length": 5}',
+    b'{"algorithm": ["sha1"], "normalize": "fold", "prefix_length": 5}',
+    b'{"algorithm": "sha1", "normalize": "rot13", "prefix_length": 5}',
+])
+def test_unusable_info_is_a_lookup_error(stub, body):
+    server = stub({}, info=body)
+    with pytest.raises(RangeLookupError):
+        RangeClient(server.url, fail_open=False).info()
+    client = RangeClient(server.url)
+    assert not client.is_listed("password")  # fail open, nothing escapes to is_common_password
+    assert client.stats()["errors"] == 1
+
+
+def test_shorter_prefix_is_accepted(stub):
+    digest = password_digest("orchid#77", "sha1", "none")
+    server = stub({}, info={"algorithm": "sha1", "normalize": "none", "prefix_length": 4},
+                  buckets={"/range/" + digest[:4]: digest[4:].encode() + b":3\r\n"})
+    assert RangeClient(server.url).is_listed("orchid#77")
+
+
+def test_unreadable_bucket_is_a_lookup_error(stub, tmp_path):
+    digest = password_digest("password", "sha256", "fold")
+    server = stub({}, buckets={"/range/" + digest[:5]: b"\xff\xfe<html>"})
+    with pytest.raises(RangeLookupError):
+        RangeClient(server.url, fail_open=False).bucket(digest[:5])
+    client = RangeClient(server.url, cache_dir=str(tmp_path))
+    assert not client.is_listed("password") and client.stats()["errors"] == 1
@@ -0,0 +1,111 @@
+import random
+
+import blacklist
+import incremental
+from evaluator import evaluate_password
+from guesses import guesses_log10
+from incremental import IncrementalEvaluator
+from policy import compile_policy
+
+
+def assert_same(inc, policy=None):
+    assert inc.result().as_dict() == evaluate_password(inc.text, policy).as_dict(), inc.text
+
+
+def short(passwords):
+    """Every prefix gets a full evaluation to compare with, keep that quick."""
+    return [p for p in passwords if len(p) <= 32]
+
+
+def test_typing_one_character_at_a_time(passwords):
+    for password in short(passwords):
+        inc = IncrementalEvaluator()
+        for ch in password:
+            inc.append(ch)
+            assert_same(inc)
+
+
+def test_deleting_from_the_end(passwords):
+    for password in short(passwords):
+        inc = IncrementalEvaluator(password)
+        while len(inc):
+            inc.delete()
+            assert_same(inc)
+
+
+def test_set_text_follows_random_edits():
+    rng = random.Random(7)
+    alphabet = "passwordqwerty123!ÄöüßﬁｐΩжа́😀 "
+    inc = IncrementalEvaluator()
+    text = ""
+    for _ in range(400):
+        cut = rng.randint(0, len(text))
+        text = text[:cut] + "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 4))) + text[cut + rng.randint(0, 3):]
+        inc.set_text(text)
+        assert inc.text == text
+        assert_same(inc)
+
+
+def test_combining_marks_and_ligatures_fed_one_by_one():
+    # folding is per character, so feeding "e" then COMBINING ACUTE ends where "é" does
+    for text in ("pássword", "ﬁsh1234", "Straße!", "ｑｗｅｒｔｙ", "drаgon99"):
+        inc = IncrementalEvaluator()
+        for ch in text:
+            inc.append(ch)
+        assert_same(inc)
+
+
+def test_text_past_max_length_is_scored_on_its_prefix():
+    policy = compile_policy({"name": "short", "version": 1, "max_length": 10})
+    inc = IncrementalEvaluator(policy=policy)
+    for ch in "qwertyuiop" + "asdfghjkl" * 3:
+        inc.append(ch)
+        assert_same(inc, policy)
+    inc.delete(20)
+    assert_same(inc, policy)
+
+
+class CountingRemote:
+    """A range client stand-in that lists one password and counts the lookups."""
+    url = "http://127.0.0.1:1"
+
+    def __init__(self, listed):
+        self.listed = listed
+        self.lookups = 0
+
+    def __contains__(self, password):
+        self.lookups += 1
+        return password == self.listed
+
+
+def test_remote_lookup_only_for_final_results():
+    remote = CountingRemote("orchid#77")
+    blacklist.set_remote(remote)
+    inc = IncrementalEvaluator()
+    for ch in "orchid#77":
+        inc.append(ch)
+        assert not inc.result(final=False).is_common
+    assert remote.lookups == 0
+    assert inc.result().is_common
+    assert remote.lookups == 1
+
+
+def test_whole_text_stages_are_remembered(monkeypatch):
+    remote = CountingRemote("orchid#77")
+    blacklist.set_remote(remote)
+    calls = []
+    monkeypatch.setattr(incremental, "guesses_log10", lambda *args: calls.append(args[0]) or guesses_log10(*args))
+    inc = IncrementalEvaluator("orchid#77")
+    assert inc.result().is_common
+    inc.delete()
+    inc.result()
+    inc.append("7")  # back to a text already checked
+    assert inc.result().is_common
+    assert remote.lookups == 2 and calls == ["orchid#77", "orchid#7"]
+
+    with open(blacklist.g, "a", encoding="utf-8") as f:
+        f.write("orchid#7\n")
+    assert blacklist.reload_if_changed()
+    inc.delete()
+    assert inc.result().is_common  # checked again against the reloaded list
+    assert_same(inc)
@@ -0,0 +1,128 @@
+import gzip
+import hashlib
+import os
+
+import pytest
+
+import blacklist
+import ingest
+from blacklist_index import SortedIndex
+
+
+def write_dump(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+def shard_entries(folder, manifest, kind="text"):
+    entries = []
+    for shard in manifest["shards"]:
+        if shard["kind"] == kind:
+            with SortedIndex(os.path.join(folder, shard["file"])) as index:
+                entries += [e.decode("utf-8") for e in index]
+    return entries
+
+
+def test_add_normalizes_and_deduplicates(tmp_path):
+    folder = blacklist.shard_dir
+    dump = write_dump(tmp_path / "dump.txt", ["Monkey123", "monkey123", "  ｍｏｎｋｅｙ１２３ ", "", "Shadow!", "zaq1zaq1"])
+    manifest = ingest.add([dump])
+    assert manifest["version"] == 1
+    assert [s["entries"] for s in manifest["shards"]] == [3]
+    assert shard_entries(folder, manifest) == ["monkey123", "shadow!", "zaq1zaq1"]
+
+    # a second dump only adds what no shard has yet, from a gzip file this time
+    with gzip.open(tmp_path / "more.txt.gz", "wt", encoding="utf-8") as f:
+        f.write("shadow!\nMONKEY123\nbatman1\n")
+    manifest = ingest.add([str(tmp_path / "more.txt.gz")])
+    assert manifest["version"] == 2
+    assert [s["entries"] for s in manifest["shards"]] == [3, 1]
+    assert shard_entries(folder, manifest) == ["monkey123", "shadow!", "zaq1zaq1", "batman1"]
+
+    # nothing new: no shard and no new version
+    assert ingest.add([dump]) == manifest
+
+
+def test_add_sha1_dump_with_min_count(tmp_path):
+    lines = [hashlib.sha1(p.encode()).hexdigest().upper() + f":{n}" for p, n in (("hunter2", 500), ("rare", 3))]
+    manifest = ingest.add([write_dump(tmp_path / "pwned.txt", lines)], min_count=100)
+    assert [(s["kind"], s["entries"]) for s in manifest["shards"]] == [("sha1", 1)]
+    assert blacklist.is_common_password("hunter2")
+    assert not blacklist.is_common_password("rare")
+    assert not blacklist.is_common_password("HUNTER2")  # hashes are of the password as leaked
+
+
+def test_malformed_hash_lines_are_skipped(tmp_path, capsys):
+    good = hashlib.sha1(b"hunter2").hexdigest().upper()
+    lines = [good + ":500", "", "not a hash", good[:39] + ":7", "Z" * 40 + ":9", good + ":lots",
+             hashlib.sha1(b"letmein1").hexdigest() + ":12", hashlib.sha1(b"qwerty12").hexdigest()]
+    manifest = ingest.add([write_dump(tmp_path / "pwned.txt", lines)], kind="sha1", min_count=10)
+    shard, = manifest["shards"]
+    assert (shard["entries"], shard["skipped_lines"]) == (2, 4)
+    assert "skipped 4 malformed lines" in capsys.readouterr().err
+    assert blacklist.is_common_password("letmein1") and not blacklist.is_common_password("qwerty12")
+
+
+def test_shard_indexes_are_closed_after_add_and_compact(tmp_path, monkeypatch):
+    opened = []
+
+    def tracked(cls):
+        class Tracked(cls):
+            def __init__(self, path):
+                super().__init__(path)
+                opened.append(self)
+        return Tracked
+
+    monkeypatch.setattr(ingest, "SortedIndex", tracked(ingest.SortedIndex))
+    monkeypatch.setattr(ingest, "HashIndex", tracked(ingest.HashIndex))
+    hashes = [hashlib.sha1(p.encode()).hexdigest() + ":5" for p in ("echo5", "foxtrot6")]
+    for n, words in enumerate((["alpha1", "bravo2"], ["charlie3"], hashes[:1], hashes[1:])):
+        ingest.add([write_dump(tmp_path / f"dump{n}.txt", words)])
+    ingest.compact()
+    ingest.export_hashes(str(tmp_path / "out.sha256"))
+    assert len(opened) >= 6
+    assert all(index._mm.closed for index in opened)  # nothing left mapped, compaction can delete the files
+
+
+def test_compact_merges_shards_and_removes_their_files(tmp_path):
+    folder = blacklist.shard_dir
+    for i, words in enumerate((["alpha1", "beta22"], ["gamma333", "alpha1"], ["delta4444"])):
+        ingest.add([write_dump(tmp_path / f"dump{i}.txt", words)])
+    before = ingest.read_manifest(folder)
+    assert len(before["shards"]) == 3
+
+    manifest = ingest.compact()
+    assert manifest["version"] == before["version"] + 1
+    assert len(manifest["shards"]) == 1
+    assert shard_entries(folder, manifest) == ["alpha1", "beta22", "delta4444", "gamma333"]
+    assert manifest["shards"][0]["sources"] == ["dump0.txt", "dump1.txt", "dump2.txt"]
+    left = {name for name in os.listdir(folder) if name.startswith("shard-")}
+    assert left == {manifest["shards"][0]["file"], manifest["shards"][0]["bloom"]}
+    assert ingest.compact() == manifest  # one shard per kind already
+
+
+def test_lookups_pick_up_new_shards_on_reload(tmp_path):
+    assert blacklist.is_common_password("password")  # the text list of the fixture
+    assert not blacklist.is_common_password("Orchid#77")
+    assert not blacklist.reload_if_changed()
+
+    ingest.add([write_dump(tmp_path / "dump.txt", ["orchid#77"])])
+    assert not blacklist.is_common_password("Orchid#77")  # still the lists loaded before
+    assert blacklist.reload_if_changed()
+    assert blacklist.is_common_password("Orchid#77")
+    assert blacklist.is_common_password("password")
+    assert blacklist.info()["shards"] == 1
+
+    ingest.add([write_dump(tmp_path / "dump2.txt", ["tulip#88"])])
+    ingest.compact()
+    assert blacklist.reload_if_changed()
+    assert blacklist.is_common_password("Orchid#77") and blacklist.is_common_password("tulip#88")
+    assert blacklist.info()["shards"] == 1
+
+
+def test_concurrent_ingest_is_refused(tmp_path):
+    folder = blacklist.shard_dir
+    os.makedirs(folder)
+    with ingest.IngestLock(folder):
+        with pytest.raises(RuntimeError):
+            ingest.add([write_dump(tmp_path / "dump.txt", ["x1y2z3"])])
@@ -0,0 +1,66 @@
+import pytest
+
+import normalize
+from blacklist import is_common_password
+from dictionary import find_words, has_dictionary_word
+from patterns import has_keyboard_pattern
+
+LOOKALIKES = [
+    "ｐａｓｓｗｏｒｄ",       # fullwidth
+    "PÁSSWÖRD",              # accented, upper case
+    "pa\u0301ssword",        # combining acute accent
+    "p\u0430ssword",         # Cyrillic a
+    "\u0440\u0430ssw\u043erd",  # Cyrillic r, a and o
+]
+MIXED = ["straße", "STRASSE", "ﬁnal", "ﬂower", "café", "ｑｗｅｒｔｙ", "Ǆemal", "x́̂y", "𝐩𝐚𝐬𝐬", "ABC-123"]
+
+
+@pytest.mark.parametrize("password", LOOKALIKES)
+def test_lookalikes_fold_to_the_listed_word(password):
+    assert normalize.fold(password) == "password"
+    assert is_common_password(password)
+    assert has_dictionary_word(password)
+
+
+def test_skeleton_keeps_case():
+    assert normalize.skeleton("PÁSSWÖRD") == "PASSWORD"
+    assert normalize.skeleton("ｐａｓｓ") == "pass"
+    assert normalize.fold("PÁSSWÖRD") == "password"
+
+
+def test_sharp_s_folds_like_double_s():
+    assert normalize.fold("straße") == normalize.fold("STRASSE") == "strasse"
+    assert is_common_password("STRASSE")
+
+
+def test_keyboard_pattern_in_fullwidth():
+    assert has_keyboard_pattern("ｑｗｅｒｔｙ")
+    assert has_keyboard_pattern("ＡＳＤＦＧＨ")
+
+
+@pytest.mark.parametrize("a", MIXED)
+@pytest.mark.parametrize("b", MIXED[:4])
+def test_fold_is_per_character(a, b):
+    assert normalize.fold(a + b) == normalize.fold(a) + normalize.fold(b)
+    assert normalize.skeleton(a + b) == normalize.skeleton(a) + normalize.skeleton(b)
+
+
+@pytest.mark.parametrize("text", MIXED + LOOKALIKES)
+def test_char_forms_agree_with_string_forms(text):
+    assert "".join(normalize.fold_char(ch) for ch in text) == normalize.fold(text)
+    assert "".join(normalize.skeleton_char(ch) for ch in text) == normalize.skeleton(text)
+
+
+@pytest.mark.parametrize("password, span", [
+    ("xxpässwörd!", (2, 10)),
+    ("1pa\u0301ssword2", (1, 10)),    # the combining mark stays inside the match
+    ("ßpasswordß", (1, 9)),            # ß folds to two characters before the match
+    ("ﬂowerpower", (0, 5)),            # the ligature is one character of the password
+    ("ｄｒａｇｏｎ99", (0, 6)),
+])
+def test_found_words_map_back_to_the_password(password, span):
+    found = find_words(password)
+    assert span in [(start, end) for start, end, _ in found]
+    for start, end, _ in found:
+        assert 0 <= start < end <= len(password)
+        assert has_dictionary_word(password[start:end])
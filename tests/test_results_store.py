@@ -0,0 +1,90 @@
+import pytest
+
+import blacklist
+from evaluator import evaluate_many
+from policy import compile_policy
+from results_store import ResultStore, scoring_context
+
+PASSWORDS = ["hunter2", "password", "Tr0ub4dor&3", "correct horse battery staple", "pásswörd", "hunter2"]
+STRICT = {"name": "strict", "version": 1, "common_max_score": 0, "strength": {"Strong": 90, "Medium": 60}}
+
+
+def rows(table):
+    return [row.as_dict() for row in table]
+
+
+def test_results_are_reused(tmp_path):
+    with ResultStore(str(tmp_path / "results.db")) as store:
+        first = store.evaluate_many(PASSWORDS)
+        assert rows(first) == rows(evaluate_many(PASSWORDS))
+        assert (store.hits, store.misses) == (1, 5)  # the repeated password is scored once
+
+        assert rows(store.evaluate_many(PASSWORDS)) == rows(first)
+        assert (store.hits, store.misses) == (7, 5)
+        assert store.lookup_many(["hunter2", "not stored"])[1] is None
+
+
+def test_store_keeps_digests_not_passwords(tmp_path):
+    path = tmp_path / "results.db"
+    with ResultStore(str(path)) as store:
+        store.evaluate_many(["hunter2-secret"])
+    assert b"hunter2-secret" not in path.read_bytes()
+
+
+def test_other_policy_is_another_context(tmp_path):
+    strict = compile_policy(STRICT)
+    assert scoring_context(strict) != scoring_context()
+    with ResultStore(str(tmp_path / "results.db")) as store:
+        store.evaluate_many(PASSWORDS)
+        assert store.lookup_many(PASSWORDS, strict) == [None] * len(PASSWORDS)
+        assert rows(store.evaluate_many(PASSWORDS, strict)) == rows(evaluate_many(PASSWORDS, strict))
+        assert len(store.stats()["contexts"]) == 2
+
+
+def test_new_blacklist_invalidates_results(tmp_path, blacklist_dir):
+    with ResultStore(str(tmp_path / "results.db")) as store:
+        before = store.evaluate_many(["hunter2"])
+        assert not before.row(0).is_common
+
+        with open(blacklist.g, "a", encoding="utf-8") as f:
+            f.write("hunter2\n")
+        assert blacklist.reload_if_changed()
+        assert store.lookup_many(["hunter2"]) == [None]
+        assert store.evaluate_many(["hunter2"]).row(0).is_common
+
+        assert store.prune() == 1  # the result scored against the old list
+        assert len(store.stats()["contexts"]) == 1
+
+
+def test_own_key_is_kept_in_the_store(tmp_path):
+    path = str(tmp_path / "results.db")
+    with ResultStore(path) as store:
+        store.evaluate_many(["hunter2"])
+    with ResultStore(path) as store:
+        assert store.lookup_many(["hunter2"])[0] is not None
+    with pytest.raises(ValueError):
+        ResultStore(path, key=b"another key")
+
+
+def test_passed_key_is_checked(tmp_path):
+    path = str(tmp_path / "results.db")
+    key = b"k" * 32
+    with ResultStore(path, key=key) as store:
+        store.evaluate_many(["hunter2"])
+    assert b"k" * 32 not in (tmp_path / "results.db").read_bytes()
+    with pytest.raises(ValueError):
+        ResultStore(path)
+    with pytest.raises(ValueError):
+        ResultStore(path, key=b"x" * 32)
+    with ResultStore(path, key=key) as store:
+        assert store.lookup_many(["hunter2"])[0] is not None
+
+
+def test_checkpoints(tmp_path):
+    with ResultStore(str(tmp_path / "results.db")) as store:
+        assert store.checkpoint("audit") is None
+        store.save_checkpoint("audit", {"offset": 10, "counts": [1, 2]})
+        store.save_checkpoint("audit", {"offset": 20, "counts": [3, 4]})
+        assert store.checkpoint("audit") == {"offset": 20, "counts": [3, 4]}
+        store.clear_checkpoint("audit")
+        assert store.checkpoint("audit") is None
@@ -0,0 +1,48 @@
+from collections import Counter
+
+import pytest
+
+import vectorized
+from charclass import class_mask
+from entropy import entropy_from_counts
+from patterns import pattern_mask
+
+EDGE_CASES = ["", "a", "aa", "aaa", "abc", "cba", "QWERTY", "zxcv", "Keyboard", "ｑｗｅｒｔｙ", "ááá",
+              "\ud800x", "😀😀😀", "ß" * 5, "x" * 256, "y" * 257, "Dragon" + "!" * 300]
+
+
+def expected(passwords):
+    return {
+        "length": [len(p) for p in passwords],
+        "flags": [class_mask(Counter(p)) for p in passwords],
+        "entropy": [entropy_from_counts(Counter(p), len(p)) for p in passwords],
+        "patterns": [pattern_mask(p) for p in passwords],
+    }
+
+
+def test_numpy_columns_equal_the_scalar_ones(passwords):
+    pytest.importorskip("numpy")
+    batch = passwords + EDGE_CASES
+    features = vectorized.batch_features(batch)
+    for name, column in expected(batch).items():
+        assert features[name].tolist() == column, name  # exact, entropy included
+
+
+def test_small_chunks(passwords, monkeypatch):
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(vectorized, "CHUNK_SIZE", 7)
+    monkeypatch.setattr(vectorized, "MAX_VECTOR_LENGTH", 12)
+    features = vectorized.batch_features(passwords)
+    assert features["entropy"].tolist() == expected(passwords)["entropy"]
+    assert features["patterns"].tolist() == expected(passwords)["patterns"]
+
+
+def test_without_numpy(passwords, monkeypatch):
+    monkeypatch.setattr(vectorized, "HAVE_NUMPY", False)
+    features = vectorized.batch_features(iter(passwords))
+    assert features == expected(passwords)
+
+
+def test_empty_batch():
+    features = vectorized.batch_features([])
+    assert all(len(column) == 0 for column in features.values())